@@ -0,0 +1,119 @@
+"""
+Database concurrency benchmark.
+
+Runs concurrent writer threads (the validation progress path: update the run,
+insert a result) against reader threads (the web UI path: list runs and URLs)
+and reports writes per second, reads per second and lock errors.
+
+    python benchmarks/bench_database.py --writers 4 --readers 4 --seconds 10
+    python benchmarks/bench_database.py --baseline   # one connection per call, rollback journal
+    python benchmarks/bench_database.py --database-url postgresql://localhost/schema_validator_bench
+"""
+
+import argparse
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from schema_validator.web.database import Database
+from schema_validator.web.storage import open_storage
+
+
+class BaselineDatabase(Database):
+    """The previous behaviour: a fresh default-journal connection per call."""
+    
+    def get_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.Connection(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+
+def run(db, writers: int, readers: int, seconds: float, urls: int) -> dict:
+    project_id = db.create_project('bench')
+    url_ids = [db.add_url(f'https://example.com/p/{i}', project_id) for i in range(urls)]
+    run_id = db.create_validation_run(project_id, total_urls=urls)
+    
+    counts = {'writes': 0, 'reads': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+    
+    result = {
+        'status': 'success',
+        'schema_data': {'@type': 'Product', 'name': 'Bench product', 'offers': {'price': '9.99'}},
+        'validation': {'score': 90.0, 'errors': [], 'warnings': ['Missing recommended field: brand']},
+        'response_time': 1.2
+    }
+    
+    def writer(offset):
+        i = offset
+        while time.monotonic() < deadline:
+            try:
+                db.update_validation_run(run_id, processed_urls=i)
+                db.add_validation_result(run_id, url_ids[i % urls], result)
+                key = 'writes'
+            except db.OperationalError:
+                key = 'errors'
+            with lock:
+                counts[key] += 1
+            i += writers
+    
+    def reader():
+        while time.monotonic() < deadline:
+            try:
+                db.get_validation_runs(project_id=project_id)
+                db.get_urls(project_id=project_id, status='active')
+                key = 'reads'
+            except db.OperationalError:
+                key = 'errors'
+            with lock:
+                counts[key] += 1
+    
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    db.close()
+    
+    return {
+        'writes_per_sec': round(counts['writes'] / seconds, 1),
+        'reads_per_sec': round(counts['reads'] / seconds, 1),
+        'lock_errors': counts['errors']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Database concurrency benchmark')
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--urls', type=int, default=500)
+    parser.add_argument('--baseline', action='store_true', help='Benchmark per-call connections only')
+    parser.add_argument('--database-url', help='Benchmark this store (e.g. a scratch PostgreSQL database) instead')
+    args = parser.parse_args()
+    
+    def temp_path():
+        return Path(tempfile.mkdtemp()) / 'bench.db'
+    
+    if args.database_url:
+        modes = [('store', lambda: open_storage(args.database_url))]
+    else:
+        modes = [('baseline', lambda: BaselineDatabase(temp_path()))]
+        if not args.baseline:
+            modes.append(('pooled', lambda: Database(temp_path())))
+    
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds}s")
+    for name, open_db in modes:
+        stats = run(open_db(), args.writers, args.readers, args.seconds, args.urls)
+        print(f"{name:>9}: {stats['writes_per_sec']:>8} writes/s  "
+              f"{stats['reads_per_sec']:>8} reads/s  {stats['lock_errors']} lock errors")
+
+
+if __name__ == '__main__':
+    main()
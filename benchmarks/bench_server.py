@@ -0,0 +1,303 @@
+"""
+Web server latency benchmark.
+
+Starts the server in each serving mode on a scratch database, keeps
+validation runs going with dashboards following them over Socket.IO, and
+measures API request latency from concurrent clients. Reports p50, p95 and
+p99 latency per mode.
+
+The browser layer is replaced by a simulated page (a network wait plus CPU
+spent on the page, then the real schema validation), so the benchmark
+measures the server rather than the sites.
+
+    python benchmarks/bench_server.py --clients 8 --dashboards 4 --seconds 30
+    python benchmarks/bench_server.py --modes production --page-cpu-ms 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Serving modes: the development server, and gunicorn with the validation worker process
+MODES = ('dev', 'production')
+
+PRODUCT = {
+    '@context': 'https://schema.org',
+    '@type': 'Product',
+    'name': 'Bench product',
+    'image': 'https://example.com/p.jpg',
+    'description': 'A product page for the server benchmark. ' * 20,
+    'brand': {'@type': 'Brand', 'name': 'Bench'},
+    'offers': {'@type': 'Offer', 'price': '9.99', 'priceCurrency': 'USD',
+               'availability': 'https://schema.org/InStock'},
+    'review': [{'@type': 'Review', 'reviewBody': 'Fine. ' * 40, 'author': {'@type': 'Person', 'name': 'A'}}] * 10
+}
+
+
+def simulate_pages(network_ms: float, cpu_ms: float):
+    """Replace browser launches and page loads with a network wait and CPU-bound page work."""
+    from schema_validator.core.validator import SchemaValidator
+    
+    class Browser:
+        async def close(self):
+            pass
+    
+    async def launch_browser(self, playwright):
+        return Browser()
+    
+    async def process_url_in_context(self, browser, url, timeout=None):
+        started = time.time()
+        await asyncio.sleep(network_ms / 1000)
+        # Parsing the page holds the GIL, as BeautifulSoup and jsonschema do
+        deadline = time.thread_time() + cpu_ms / 1000
+        schema_data = PRODUCT
+        while time.thread_time() < deadline:
+            schema_data = json.loads(json.dumps(PRODUCT))
+        return {
+            'url': url,
+            'status': 'success',
+            'schema_found': True,
+            'schema_data': schema_data,
+            'validation': self.validate_schema(schema_data),
+            'error': None,
+            'response_time': round(time.time() - started, 3)
+        }
+    
+    SchemaValidator.launch_browser = launch_browser
+    SchemaValidator.process_url_in_context = process_url_in_context
+
+
+def serve(args):
+    """Server process: run the app in one mode on the scratch database."""
+    from schema_validator.config import Config
+    
+    Config.HOST, Config.PORT = '127.0.0.1', args.port
+    if args.serve == 'production':
+        from schema_validator.__main__ import serve_production
+        serve_production()
+    else:
+        from schema_validator.web.app import create_app, socketio
+        socketio.run(create_app(), host=Config.HOST, port=Config.PORT, allow_unsafe_werkzeug=True)
+
+
+def prepare_server(args):
+    """
+    Point the config at the scratch database and simulate pages. Done at
+    import, so the validation worker process (which re-imports this script)
+    gets the same setup.
+    """
+    from schema_validator.config import Config
+    
+    Config.DATA_DIR = Path(args.data_dir)
+    Config.RESULTS_DIR = Config.DATA_DIR / 'results'
+    Config.DATABASE_PATH = Config.DATA_DIR / 'validator.db'
+    Config.DATABASE_URL = None
+    simulate_pages(args.page_network_ms, args.page_cpu_ms)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def seed(data_dir: Path, projects: int, urls: int):
+    """A scratch database with `projects` projects of `urls` URLs each."""
+    from schema_validator.web.database import Database
+    
+    db = Database(data_dir / 'validator.db')
+    project_ids = []
+    for n in range(projects):
+        project_id = db.create_project(f'bench {n}')
+        for i in range(urls):
+            db.add_url(f'https://example.com/{n}/p/{i}', project_id)
+        project_ids.append(project_id)
+    db.close()
+    return project_ids
+
+
+def run(mode: str, args) -> dict:
+    import requests
+    import socketio
+    
+    data_dir = Path(tempfile.mkdtemp())
+    project_ids = seed(data_dir, args.projects, args.urls)
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    env = dict(os.environ, SERVER_THREADS=str(args.threads))
+    env.pop('VALIDATION_WORKER', None)
+    server = subprocess.Popen(
+        [sys.executable, __file__, '--serve', mode, '--port', str(port), '--data-dir', str(data_dir),
+         '--page-network-ms', str(args.page_network_ms), '--page-cpu-ms', str(args.page_cpu_ms)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    
+    try:
+        for _ in range(300):
+            try:
+                requests.get(f'{base}/api/projects', timeout=1)
+                break
+            except requests.RequestException:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError(f'{mode} server did not start')
+        
+        settings = {'concurrent_limit': args.workers, 'delay_min': 0, 'delay_max': 0}
+        runs = {}
+        
+        def start_run(project_id):
+            response = requests.post(f'{base}/api/validation/start',
+                                     json={'project_id': project_id, 'settings': settings}, timeout=30)
+            runs[project_id] = response.json()['run_id']
+        
+        for project_id in project_ids:
+            start_run(project_id)
+        
+        # Dashboards following every run; a finished run is replaced by a new one
+        progress_messages = [0]
+        dashboards = []
+        for n in range(args.dashboards):
+            client = socketio.Client()
+            
+            @client.on('validation_progress')
+            def on_progress(data):
+                progress_messages[0] += 1
+            
+            @client.on('validation_complete')
+            def on_complete(data, owner=n):
+                if owner == 0:
+                    project_id = next((p for p, r in runs.items() if r == data['run_id']), None)
+                    if project_id is not None:
+                        threading.Thread(target=follow_new_run, args=(project_id,)).start()
+            
+            client.connect(base, transports=['websocket'])
+            for run_id in runs.values():
+                client.emit('join_run', {'run_id': run_id})
+            dashboards.append(client)
+        
+        def follow_new_run(project_id):
+            start_run(project_id)
+            for client in dashboards:
+                client.emit('join_run', {'run_id': runs[project_id]})
+        
+        latencies = []
+        errors = [0]
+        lock = threading.Lock()
+        deadline = time.monotonic() + args.seconds
+        
+        def api_client(n):
+            session = requests.Session()
+            paths = [
+                '/api/projects',
+                '/api/validation/active',
+                '/api/stats',
+                lambda: f'/api/validation/runs?project_id={project_ids[n % len(project_ids)]}',
+                lambda: f'/api/urls?project_id={project_ids[n % len(project_ids)]}&page=1&per_page=50',
+                lambda: f'/api/validation/results/{runs[project_ids[n % len(project_ids)]]}?page=1&per_page=50'
+            ]
+            i = n
+            while time.monotonic() < deadline:
+                path = paths[i % len(paths)]
+                path = path() if callable(path) else path
+                started = time.perf_counter()
+                try:
+                    ok = session.get(base + path, timeout=30).status_code == 200
+                except requests.RequestException:
+                    ok = False
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+                    errors[0] += not ok
+                i += 1
+                time.sleep(args.think_ms / 1000)
+        
+        clients = [threading.Thread(target=api_client, args=(n,)) for n in range(args.clients)]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        time.sleep(max(0.0, deadline - time.monotonic()))
+        
+        validated = sum(run['processed_urls'] for project_id in project_ids
+                        for run in requests.get(f'{base}/api/validation/runs?project_id={project_id}').json())
+        
+        for client in dashboards:
+            client.disconnect()
+    finally:
+        server.terminate()
+        try:
+            server.wait(30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+    
+    ms = 1000
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': round(len(latencies) / args.seconds, 1),
+        'p50': round(percentile(latencies, 50) * ms, 1),
+        'p95': round(percentile(latencies, 95) * ms, 1),
+        'p99': round(percentile(latencies, 99) * ms, 1),
+        'max': round(max(latencies, default=0) * ms, 1),
+        'progress_messages': progress_messages[0],
+        'urls_per_sec': round(validated / args.seconds, 1)
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Web server latency benchmark')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent API clients')
+    parser.add_argument('--think-ms', type=float, default=100, help='Pause between a client\'s requests')
+    parser.add_argument('--dashboards', type=int, default=4, help='Socket.IO clients following the runs')
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--projects', type=int, default=2, help='Projects, each with a run going throughout')
+    parser.add_argument('--urls', type=int, default=2000, help='URLs per project')
+    parser.add_argument('--workers', type=int, default=4, help='Browsers per run')
+    parser.add_argument('--threads', type=int, default=64, help='Server threads in production mode')
+    parser.add_argument('--page-network-ms', type=float, default=50)
+    parser.add_argument('--page-cpu-ms', type=float, default=10)
+    # Internal: run as the server process
+    parser.add_argument('--serve', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--data-dir', help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.serve:
+        serve(args)
+        return
+    
+    print(f"{args.clients} API clients ({args.think_ms:g}ms think time), {args.dashboards} dashboards, {args.projects} runs, "
+          f"{args.page_network_ms:g}ms network + {args.page_cpu_ms:g}ms CPU per page, {args.seconds:g}s")
+    for mode in args.modes:
+        stats = run(mode, args)
+        print(f"{mode:>11}: {stats['rps']:>7} req/s  p50 {stats['p50']:>7}ms  p95 {stats['p95']:>7}ms  "
+              f"p99 {stats['p99']:>7}ms  max {stats['max']:>7}ms  {stats['errors']} errors  "
+              f"{stats['progress_messages']} progress messages  {stats['urls_per_sec']} URLs/s validated")
+
+
+if '--serve' in sys.argv:
+    prepare_server(parse_args())
+
+if __name__ == '__main__':
+    main()
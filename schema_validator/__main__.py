@@ -13,8 +13,25 @@ def main():
     parser = argparse.ArgumentParser(description='Schema Validator Web Server')
     parser.add_argument('--port', type=int, help='Port to run the server on')
     parser.add_argument('--host', type=str, help='Host to bind the server to')
+    parser.add_argument('--production', action='store_true',
+                        help='Serve with gunicorn instead of the development server, validating in a worker process')
+    parser.add_argument('--migrate-schema-blobs', action='store_true',
+                        help='Move inline schema data into the compressed blob store and exit')
+    parser.add_argument('--collect-orphans', action='store_true',
+                        help='Delete rows left behind by deleted projects, URLs and runs, then exit')
+    parser.add_argument('--vacuum', action='store_true',
+                        help='With --migrate-schema-blobs or --collect-orphans, VACUUM afterwards '
+                             'to return freed space to the OS')
     args = parser.parse_args()
     
+    if args.migrate_schema_blobs:
+        migrate_schema_blobs(vacuum=args.vacuum)
+        return
+    
+    if args.collect_orphans:
+        collect_orphans(vacuum=args.vacuum)
+        return
+    
     try:
         from schema_validator.web.app import create_app, socketio
         from schema_validator.config import Config
@@ -32,9 +49,13 @@ def main():
         print("Press CTRL+C to stop")
         print("=" * 60)
         
+        if args.production:
+            serve_production()
+            return
+        
         app = create_app()
         socketio.run(app, host=Config.HOST, port=Config.PORT, debug=Config.DEBUG, allow_unsafe_werkzeug=True)
-        
+    
     except KeyboardInterrupt:
         print("\n\nShutting down gracefully...")
         sys.exit(0)
@@ -46,6 +67,78 @@ def main():
         sys.exit(1)
 
 
+def serve_production():
+    """Serve schema_validator.wsgi with gunicorn's threaded worker."""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("\n--production needs gunicorn:")
+        print("  pip install -e .[production]")
+        sys.exit(1)
+    from schema_validator.config import Config
+    
+    class ProductionServer(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'{Config.HOST}:{Config.PORT}')
+            # One process, since Socket.IO sessions and active runs live in it;
+            # its threads serve requests and WebSocket connections
+            self.cfg.set('workers', 1)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('threads', Config.SERVER_THREADS)
+        
+        def load(self):
+            from schema_validator.wsgi import app
+            return app
+    
+    ProductionServer().run()
+
+
+def migrate_schema_blobs(vacuum: bool = False):
+    """Run the schema blob migration and print the space report."""
+    from pathlib import Path
+    from schema_validator.web.storage import open_storage
+    
+    db = open_storage()
+    # SQLite stores report their file size; PostgreSQL has no single file
+    db_path = Path(db.db_path) if getattr(db, 'db_path', None) else None
+    size_before = db_path.stat().st_size if db_path and db_path.exists() else 0
+    
+    print(f"Migrating schema data in {db_path or db.database_url}...")
+    report = db.migrate_schema_blobs(vacuum=vacuum)
+    db.close()
+    
+    size_after = db_path.stat().st_size if db_path and db_path.exists() else 0
+    mb = 1024 * 1024
+    
+    print(f"Migrated results:     {report['migrated_rows']}")
+    print(f"New blobs:            {report['new_blobs']}")
+    print(f"Inline data moved:    {report['moved_bytes'] / mb:.1f} MB")
+    print(f"Blob store size:      {report['stored_bytes'] / mb:.1f} MB "
+          f"({report['blobs']} blobs, {report['dedupe_ratio']}x dedupe, {report['compression_ratio']}x compression)")
+    print(f"Space saved:          {report['bytes_saved'] / mb:.1f} MB")
+    if db_path:
+        print(f"Database file:        {size_before / mb:.1f} MB -> {size_after / mb:.1f} MB")
+    if not vacuum:
+        print("Run again with --vacuum to shrink the database file.")
+
+
+def collect_orphans(vacuum: bool = False):
+    """Run the orphan garbage collector once and print what it removed."""
+    from schema_validator.web.storage import open_storage
+    from schema_validator.config import Config
+    
+    print(f"Collecting orphaned rows in {Config.DATABASE_URL or Config.DATABASE_PATH}...")
+    db = open_storage()
+    removed = db.collect_orphans()
+    if vacuum:
+        db.vacuum()
+    db.close()
+    
+    for table, count in sorted(removed.items()):
+        print(f"{table + ':':<22}{count}")
+    print(f"{'Total removed:':<22}{sum(removed.values())}")
+
+
 if __name__ == '__main__':
     main()
 
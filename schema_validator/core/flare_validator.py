@@ -17,40 +17,11 @@ from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 import validators
 
 from .schemas import PRODUCT_SCHEMA, REQUIRED_FIELDS, RECOMMENDED_FIELDS
+from .validator import ValidationState
 
 
-class FlareValidationState:
+class FlareValidationState(ValidationState):
     """Manages validation state for pause/resume functionality."""
-    
-    def __init__(self):
-        self.is_running = False
-        self.is_paused = False
-        self.should_stop = False
-    
-    def start(self):
-        """Start validation."""
-        self.is_running = True
-        self.is_paused = False
-        self.should_stop = False
-    
-    def pause(self):
-        """Pause validation."""
-        self.is_paused = True
-    
-    def resume(self):
-        """Resume validation."""
-        self.is_paused = False
-    
-    def stop(self):
-        """Stop validation."""
-        self.should_stop = True
-        self.is_paused = False
-    
-    def reset(self):
-        """Reset state."""
-        self.is_running = False
-        self.is_paused = False
-        self.should_stop = False
 
 
 class FlareSchemaValidator:
@@ -438,23 +409,28 @@ class FlareSchemaValidator:
         results = []
         
         # Process URLs in batches
-        for i in range(0, len(urls), self.concurrent_limit):
+        i = 0
+        while i < len(urls):
             if self.state.should_stop:
                 break
                 
             # Wait if paused
-            while self.state.is_paused and not self.state.should_stop:
-                await asyncio.sleep(0.1)
+            await self.state.wait_resumed()
             
             if self.state.should_stop:
                 break
             
-            # Process batch
+            # Process batch; a pause or stop interrupts it in flight
             batch = urls[i:i + self.concurrent_limit]
             tasks = [self.validate_url(url) for url in batch]
             
             try:
-                batch_results = await asyncio.gather(*tasks, return_exceptions=True)
+                finished, batch_results = await self.state.guard(
+                    asyncio.gather(*tasks, return_exceptions=True)
+                )
+                if not finished:
+                    # Paused mid-batch: rerun it after resume
+                    continue
                 
                 for result in batch_results:
                     if isinstance(result, Exception):
@@ -482,13 +458,16 @@ class FlareSchemaValidator:
                             except Exception as e:
                                 print(f"Error in progress callback: {e}")
                 
+                i += self.concurrent_limit
+                
                 # Add delay between batches
-                if i + self.concurrent_limit < len(urls):
+                if i < len(urls):
                     delay = random.uniform(self.delay_min, self.delay_max)
-                    await asyncio.sleep(delay)
+                    await self.state.sleep(delay)
                     
             except Exception as e:
                 print(f"Error processing batch: {e}")
+                i += self.concurrent_limit
                 continue
         
         self.state.reset()
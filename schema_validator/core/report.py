@@ -7,7 +7,7 @@ import json
 import csv
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from jinja2 import Template
 
@@ -15,11 +15,15 @@ from jinja2 import Template
 class ReportGenerator:
     """Generates interactive HTML reports from validation results."""
     
-    def __init__(self, results: List[Dict]):
+    def __init__(self, results: List[Dict], summary: Optional[Dict] = None):
         self.results = results
+        self.summary = summary  # Precomputed stats (e.g. from the database counters)
     
     def generate_summary_stats(self) -> Dict:
         """Generate summary statistics from results."""
+        if self.summary is not None:
+            return self.summary
+        
         total = len(self.results)
         if total == 0:
             return {
@@ -0,0 +1,116 @@
+"""
+Deadline-aware scheduling for time-budgeted validation runs.
+Orders URLs by value, estimates per-URL cost from history and reports coverage.
+"""
+
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+
+def url_domain(url: str) -> str:
+    """Return the lowercased host of a URL."""
+    return urlparse(url).netloc.lower()
+
+
+def domain_costs(url_history: Dict[int, Dict], urls: List[Dict]) -> Dict[str, float]:
+    """Average historical response time per domain, in seconds."""
+    totals: Dict[str, List[float]] = {}
+    for url_obj in urls:
+        history = url_history.get(url_obj['id'])
+        if history and history.get('avg_response_time'):
+            totals.setdefault(url_domain(url_obj['url']), []).append(history['avg_response_time'])
+    
+    return {domain: sum(times) / len(times) for domain, times in totals.items()}
+
+
+def prioritize_urls(urls: List[Dict], url_history: Dict[int, Dict],
+                    skipped_ids: Optional[Set[int]] = None) -> List[Dict]:
+    """
+    Order URLs highest value first.
+    
+    URLs skipped by a previous budgeted run come first, then URLs never
+    validated, then the rest from least recently validated. Ties go to the
+    cheaper URL so more of the catalog fits in the budget.
+    """
+    skipped_ids = skipped_ids or set()
+    
+    def sort_key(url_obj):
+        history = url_history.get(url_obj['id']) or {}
+        if url_obj['id'] in skipped_ids:
+            tier = 0
+        elif not history.get('last_validated_at'):
+            tier = 1
+        else:
+            tier = 2
+        return (tier, history.get('last_validated_at') or '', history.get('avg_response_time') or 0.0)
+    
+    return sorted(urls, key=sort_key)
+
+
+class RunBudget:
+    """Wall-clock budget for a run, with per-URL cost estimates by domain."""
+    
+    def __init__(self,
+                 seconds: float,
+                 costs: Optional[Dict[str, float]] = None,
+                 default_cost: float = 10.0,
+                 overhead: float = 0.0,
+                 min_timeout: int = 5000):
+        self.seconds = seconds
+        self.costs = costs or {}
+        self.default_cost = default_cost
+        self.overhead = overhead  # Per-URL rate-limit delay, in seconds
+        self.min_timeout = min_timeout  # milliseconds
+        self.started_at = None
+        self.deadline = None
+    
+    def start(self):
+        """Start the clock."""
+        self.started_at = time.monotonic()
+        self.deadline = self.started_at + self.seconds
+    
+    def remaining(self) -> float:
+        """Seconds left before the deadline."""
+        if self.deadline is None:
+            return float(self.seconds)
+        return max(0.0, self.deadline - time.monotonic())
+    
+    def elapsed(self) -> float:
+        """Seconds since the clock started."""
+        return time.monotonic() - self.started_at if self.started_at else 0.0
+    
+    def estimate(self, url: str) -> float:
+        """Expected seconds to validate a URL."""
+        return self.costs.get(url_domain(url), self.default_cost) + self.overhead
+    
+    def fits(self, url: str) -> bool:
+        """Whether a URL is expected to finish before the deadline."""
+        return self.remaining() >= self.estimate(url)
+    
+    def page_timeout(self, base_timeout: int) -> int:
+        """Per-page timeout in milliseconds, shortened as the deadline approaches."""
+        remaining_ms = int(self.remaining() * 1000)
+        return max(self.min_timeout, min(base_timeout, remaining_ms))
+    
+    def coverage_report(self, urls: List[str], processed: List[str], skipped: List[str]) -> Dict:
+        """
+        Summarize what the budget covered and what it had to skip.
+        
+        URLs neither processed nor skipped (still queued when the run was
+        stopped) count as skipped too, so the next run takes them first.
+        """
+        done = set(processed) | set(skipped)
+        skipped = list(skipped) + [url for url in urls if url not in done]
+        total = len(urls)
+        return {
+            'budget_seconds': self.seconds,
+            'elapsed_seconds': round(self.elapsed(), 1),
+            'total_urls': total,
+            'processed_urls': len(processed),
+            'skipped_urls': len(skipped),
+            'coverage': round((len(processed) / total) * 100, 1) if total else 100.0,
+            'skipped': skipped,
+            'generated_at': datetime.now().isoformat()
+        }
@@ -0,0 +1,194 @@
+"""
+Streaming sitemap reader.
+Walks sitemap index files and (gzipped) sitemaps incrementally, from local
+files or over HTTP, without holding whole documents in memory.
+"""
+
+import gzip
+import hashlib
+import io
+import math
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Iterator, List, Optional
+from urllib.parse import urljoin, urlparse
+from xml.etree.ElementTree import iterparse
+
+import requests
+
+
+SitemapEntry = namedtuple('SitemapEntry', ['loc', 'lastmod'])
+
+GZIP_MAGIC = b'\x1f\x8b'
+SITEMAP_NAMESPACE = 'http://www.sitemaps.org/schemas/sitemap/'
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter for memory-bounded membership checks."""
+    
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+    
+    def _positions(self, item: str):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+    
+    def add(self, item: str):
+        """Add an item."""
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+    
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+def normalize_lastmod(value: Optional[str]) -> Optional[str]:
+    """Convert a W3C datetime to a naive local ISO timestamp comparable with validated_at."""
+    if not value:
+        return None
+    
+    value = value.strip()
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed.isoformat()
+
+
+def matches_patterns(url: str, include: Optional[List[str]] = None,
+                     exclude: Optional[List[str]] = None) -> bool:
+    """Check a URL's path against include/exclude glob patterns (e.g. '/products/*')."""
+    path = urlparse(url).path or '/'
+    
+    if include and not any(fnmatch(path, pattern) for pattern in include):
+        return False
+    if exclude and any(fnmatch(path, pattern) for pattern in exclude):
+        return False
+    return True
+
+
+def _is_remote(location: str) -> bool:
+    return urlparse(location).scheme in ('http', 'https')
+
+
+def resolve_sitemap_location(location: str, local_dir=None, parent: Optional[str] = None) -> str:
+    """
+    Where a sitemap may be read from. http(s) URLs always; local files only
+    inside `local_dir`, and not at all without one. A remote sitemap index's
+    children resolve against it and must be remote too. Raises ValueError
+    for anything else.
+    """
+    if parent and _is_remote(parent):
+        location = urljoin(parent, location)
+        if not _is_remote(location):
+            raise ValueError(f'A remote sitemap index can only list http(s) sitemaps: {location}')
+    if _is_remote(location):
+        return location
+    # Any other scheme (file:, ftp:, ...); a single letter is a Windows drive
+    if local_dir is None or len(urlparse(location).scheme) > 1:
+        raise ValueError('Sitemap must be an http(s) URL')
+    
+    root = Path(local_dir).expanduser().resolve()
+    path = (root / Path(location).expanduser()).resolve()
+    if path != root and root not in path.parents:
+        raise ValueError(f'Sitemap file must be inside {root}')
+    return str(path)
+
+
+@contextmanager
+def open_sitemap(location: str, timeout: int = 30):
+    """Open a local or remote sitemap as a binary stream, transparently gunzipping it."""
+    response = None
+    if _is_remote(location):
+        response = requests.get(location, stream=True, timeout=timeout)
+        response.raise_for_status()
+        response.raw.decode_content = True  # Undo transfer-level Content-Encoding
+        raw = response.raw
+    else:
+        raw = open(Path(location).expanduser(), 'rb')
+    
+    stream = io.BufferedReader(raw) if not hasattr(raw, 'peek') else raw
+    try:
+        if stream.peek(2)[:2] == GZIP_MAGIC:
+            stream = gzip.GzipFile(fileobj=stream)
+        yield stream
+    finally:
+        stream.close()
+        raw.close()
+        if response is not None:
+            response.close()
+
+
+def _sitemap_name(tag: str) -> Optional[str]:
+    """Local name of a sitemap-protocol tag; None for extensions such as image:loc."""
+    if tag.startswith('{'):
+        namespace, _, name = tag[1:].partition('}')
+        return name if namespace.startswith(SITEMAP_NAMESPACE) else None
+    return tag
+
+
+def parse_sitemap(stream) -> Iterator[tuple]:
+    """
+    Incrementally parse a sitemap or sitemap index.
+    Yields ('url' | 'sitemap', SitemapEntry) and clears elements as it goes.
+    """
+    root = None
+    loc = lastmod = None
+    
+    for event, elem in iterparse(stream, events=('start', 'end')):
+        if root is None:
+            root = elem
+        if event == 'start':
+            continue
+        
+        name = _sitemap_name(elem.tag)
+        if name == 'loc':
+            loc = (elem.text or '').strip()
+        elif name == 'lastmod':
+            lastmod = (elem.text or '').strip()
+        elif name in ('url', 'sitemap'):
+            if loc:
+                yield name, SitemapEntry(loc, normalize_lastmod(lastmod))
+            loc = lastmod = None
+            root.clear()  # Drop processed entries so memory stays flat
+
+
+def iter_sitemap(location: str, max_depth: int = 3, timeout: int = 30, local_dir=None) -> Iterator[SitemapEntry]:
+    """
+    Stream page entries from a sitemap, following sitemap index files.
+    Local files are read only from inside `local_dir` (see resolve_sitemap_location).
+    """
+    location = resolve_sitemap_location(location, local_dir)
+    with open_sitemap(location, timeout=timeout) as stream:
+        children = []
+        for kind, entry in parse_sitemap(stream):
+            if kind == 'url':
+                yield entry
+            else:
+                children.append(entry.loc)
+    
+    if max_depth <= 0:
+        return
+    
+    for child in children:
+        try:
+            child = resolve_sitemap_location(child, local_dir, parent=location)
+            yield from iter_sitemap(child, max_depth - 1, timeout, local_dir)
+        except (requests.RequestException, OSError, ValueError) as e:
+            print(f"Error reading sitemap {child}: {e}")
@@ -7,6 +7,7 @@ import asyncio
 import json
 import random
 import time
+from collections import deque
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple, Callable
 from urllib.parse import urlparse
@@ -17,40 +18,190 @@ from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 import validators
 
 from .schemas import PRODUCT_SCHEMA, REQUIRED_FIELDS, RECOMMENDED_FIELDS
+from .scheduler import RunBudget
 
 
 class ValidationState:
-    """Manages validation state for pause/resume functionality."""
+    """
+    Event-driven run control for pause/resume/stop.
+    
+    The flags stay readable from any thread; the asyncio events that wake the
+    engine are bound to the loop that called start(), and controller threads
+    (Socket.IO handlers, REST routes) are marshalled onto it thread-safely.
+    """
     
     def __init__(self):
         self.is_running = False
         self.is_paused = False
         self.should_stop = False
+        self._loop = None
+        self._resumed = None  # Set while not paused
+        self._paused = None  # Set while paused
+        self._stopped = None  # Set once stop is requested
+        self._limit_changed = None  # Set, then replaced, whenever the worker limit changes
     
     def start(self):
-        """Start validation."""
+        """
+        Start validation, binding run control to the running event loop.
+        A pause or stop requested before the engine started still applies.
+        """
         self.is_running = True
-        self.is_paused = False
-        self.should_stop = False
+        
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+            return
+        
+        self._resumed = asyncio.Event()
+        self._paused = asyncio.Event()
+        self._stopped = asyncio.Event()
+        self._limit_changed = asyncio.Event()
+        if self.should_stop:
+            self._stopped.set()
+        if self.is_paused:
+            self._paused.set()
+        else:
+            self._resumed.set()
     
     def pause(self):
         """Pause validation."""
         self.is_paused = True
+        self._signal(self._apply_pause)
     
     def resume(self):
         """Resume validation."""
         self.is_paused = False
+        self._signal(self._apply_resume)
     
     def stop(self):
         """Stop validation."""
         self.should_stop = True
         self.is_paused = False
+        self._signal(self._apply_stop)
+    
+    def limit_changed(self):
+        """Wake the workers waiting for the worker limit to change."""
+        self._signal(self._apply_limit_changed)
     
     def reset(self):
         """Reset state."""
         self.is_running = False
         self.is_paused = False
         self.should_stop = False
+        self._loop = None
+        self._resumed = self._paused = self._stopped = self._limit_changed = None
+    
+    def _signal(self, callback: Callable):
+        """Run an event mutation on the bound loop, from whichever thread calls."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        
+        if running is loop:
+            callback()
+        else:
+            loop.call_soon_threadsafe(callback)
+    
+    def _apply_pause(self):
+        if self._resumed is not None and self.is_paused:
+            self._resumed.clear()
+            self._paused.set()
+    
+    def _apply_resume(self):
+        if self._resumed is not None and not self.is_paused:
+            self._paused.clear()
+            self._resumed.set()
+    
+    def _apply_stop(self):
+        if self._stopped is not None:
+            self._stopped.set()
+            self._paused.clear()
+            self._resumed.set()
+    
+    def _apply_limit_changed(self):
+        if self._limit_changed is not None:
+            # Release every current waiter; later ones wait for the next change
+            self._limit_changed.set()
+            self._limit_changed = asyncio.Event()
+    
+    async def wait_resumed(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the run is resumed or stopped.
+        Returns False if the timeout elapsed while still paused.
+        """
+        if self._resumed is None:
+            return True
+        if self._resumed.is_set():
+            # Yield so a pause signalled from another thread can land
+            await asyncio.sleep(0)
+            return True
+        
+        try:
+            await asyncio.wait_for(self._resumed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    async def sleep(self, seconds: float):
+        """Sleep for up to `seconds`, returning early if the run is stopped."""
+        if self._stopped is None:
+            await asyncio.sleep(seconds)
+            return
+        
+        try:
+            await asyncio.wait_for(self._stopped.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+    
+    async def wait_limit_changed(self):
+        """Wait until the worker limit changes or the run is paused or stopped."""
+        if self._limit_changed is None:
+            return
+        
+        waiters = [asyncio.ensure_future(event.wait())
+                   for event in (self._limit_changed, self._stopped, self._paused)]
+        try:
+            await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+    
+    async def guard(self, coro, interrupt_on_pause: bool = True,
+                    cancel_timeout: float = 5.0) -> Tuple[bool, object]:
+        """
+        Run a coroutine until it finishes or the run is stopped (or paused).
+        
+        Interrupted work is cancelled and given at most `cancel_timeout`
+        seconds to unwind. Returns (finished, result).
+        """
+        task = asyncio.ensure_future(coro)
+        if self._stopped is None:
+            return True, await task
+        
+        watchers = [asyncio.ensure_future(self._stopped.wait())]
+        if interrupt_on_pause:
+            watchers.append(asyncio.ensure_future(self._paused.wait()))
+        
+        try:
+            await asyncio.wait([task] + watchers, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for watcher in watchers:
+                watcher.cancel()
+        
+        if task.done():
+            return True, task.result()
+        
+        task.cancel()
+        # Retrieve the outcome of work that outlives the grace period
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        await asyncio.wait([task], timeout=cancel_timeout)
+        return False, None
 
 
 class SchemaValidator:
@@ -63,13 +214,21 @@ class SchemaValidator:
                  max_retries: int = 1,
                  concurrent_limit: int = 3,
                  user_agents: Optional[List[str]] = None,
-                 progress_callback: Optional[Callable] = None):
+                 progress_callback: Optional[Callable] = None,
+                 pause_release_after: float = 30.0,
+                 stop_timeout: float = 5.0,
+                 budget: Optional[RunBudget] = None):
         self.headless = headless
         self.timeout = timeout
         self.delay_range = delay_range
         self.max_retries = max_retries
         self.concurrent_limit = concurrent_limit
         self.progress_callback = progress_callback
+        self.pause_release_after = pause_release_after  # Seconds paused before browsers are closed
+        self.stop_timeout = stop_timeout  # Seconds in-flight pages get to unwind after stop
+        self.budget = budget  # Optional wall-clock budget for the run
+        self.worker_limit = concurrent_limit  # Workers allowed a browser; lowered to share a global budget
+        self.skipped_urls = []  # URLs the budget could not cover
         
         # Validation state
         self.state = ValidationState()
@@ -90,7 +249,13 @@ class SchemaValidator:
     
     async def create_browser_context(self, playwright) -> Tuple[Browser, BrowserContext]:
         """Create browser with stealth settings."""
-        browser = await playwright.chromium.launch(
+        browser = await self.launch_browser(playwright)
+        context = await self.new_context(browser)
+        return browser, context
+    
+    async def launch_browser(self, playwright) -> Browser:
+        """Launch a stealth-configured Chromium instance."""
+        return await playwright.chromium.launch(
             headless=self.headless,
             args=[
                 '--no-sandbox',
@@ -138,7 +303,9 @@ class SchemaValidator:
                 '--use-mock-keychain'
             ]
         )
-        
+    
+    async def new_context(self, browser: Browser) -> BrowserContext:
+        """Create an isolated browser context with a rotated user agent and stealth scripts."""
         context = await browser.new_context(
             viewport={'width': 1920, 'height': 1080},
             user_agent=random.choice(self.user_agents),
@@ -255,13 +422,14 @@ class SchemaValidator:
             delete window.cdc_adoQpoasnfa76pfcZLmcfl_Symbol;
         """)
         
-        return browser, context
+        return context
     
-    async def extract_schema(self, page: Page, url: str) -> Optional[Dict]:
+    async def extract_schema(self, page: Page, url: str, timeout: Optional[int] = None) -> Optional[Dict]:
         """Extract Product schema from page using FlareSolverr approach."""
+        timeout = timeout or self.timeout
         try:
             # Wait for domcontentloaded first
-            await page.wait_for_load_state('domcontentloaded', timeout=self.timeout)
+            await page.wait_for_load_state('domcontentloaded', timeout=timeout)
             
             # Wait longer for dynamic content to load (Lumens loads schema via JS)
             await page.wait_for_timeout(3000)
@@ -284,7 +452,7 @@ class SchemaValidator:
                                 return item
                     elif isinstance(data, dict) and data.get('@type') == 'Product':
                         return data
-                        
+                
                 except (json.JSONDecodeError, AttributeError):
                     continue
             
@@ -305,7 +473,7 @@ class SchemaValidator:
                 return product_data
             
             return None
-            
+        
         except Exception as e:
             print(f"Error extracting schema from {url}: {e}")
             return None
@@ -368,8 +536,9 @@ class SchemaValidator:
             'score': round(final_score, 1)
         }
     
-    async def process_url(self, page: Page, url: str) -> Dict:
+    async def process_url(self, page: Page, url: str, timeout: Optional[int] = None) -> Dict:
         """Process a single URL and return validation results."""
+        timeout = timeout or self.timeout
         result = {
             'url': url,
             'timestamp': datetime.now().isoformat(),
@@ -384,7 +553,7 @@ class SchemaValidator:
         
         try:
             # Navigate to URL
-            response = await page.goto(url, timeout=self.timeout, wait_until='domcontentloaded')
+            response = await page.goto(url, timeout=timeout, wait_until='domcontentloaded')
             
             # Check for HTTP errors first
             if response and response.status >= 400:
@@ -393,7 +562,7 @@ class SchemaValidator:
                 return result
             
             # Extract schema
-            schema_data = await self.extract_schema(page, url)
+            schema_data = await self.extract_schema(page, url, timeout)
             
             if schema_data:
                 result['schema_found'] = True
@@ -426,7 +595,7 @@ class SchemaValidator:
                 # Page loaded but no schema found
                 result['status'] = 'No Schema'
                 result['error'] = 'No Product schema found'
-            
+        
         except Exception as e:
             error_message = str(e)
             result['error'] = error_message
@@ -442,64 +611,105 @@ class SchemaValidator:
         result['response_time'] = round(time.time() - start_time, 2)
         return result
     
+    async def process_url_in_context(self, browser: Browser, url: str, timeout: Optional[int] = None) -> Dict:
+        """Process a URL in a fresh context on a shared browser."""
+        context = await self.new_context(browser)
+        try:
+            page = await context.new_page()
+            return await self.process_url(page, url, timeout)
+        finally:
+            await self._close_quietly(context)
+    
+    async def _close_quietly(self, closable):
+        """Close a browser or context without letting a wedged page block the run."""
+        try:
+            await asyncio.wait_for(closable.close(), self.stop_timeout)
+        except Exception:
+            pass
+    
     async def validate_urls_async(self, urls: List[str]) -> List[Dict]:
         """Process URLs with pause/resume support and progress callbacks."""
         results = []
         self.state.start()
-        semaphore = asyncio.Semaphore(self.concurrent_limit)
+        self.skipped_urls = []
+        if self.budget:
+            self.budget.start()
         
+        pending = deque(urls)
         total_urls = len(urls)
         processed = 0
         
-        async def process_with_semaphore(url):
+        async def worker(index, playwright):
             nonlocal processed
+            browser = None
             
-            # Check for pause/stop
-            while self.state.is_paused and not self.state.should_stop:
-                await asyncio.sleep(0.5)
-            
-            if self.state.should_stop:
-                return None
-            
-            async with semaphore:
-                async with async_playwright() as p:
-                    browser, context = await self.create_browser_context(p)
-                    page = await context.new_page()
+            try:
+                while pending and not self.state.should_stop:
+                    if self.state.is_paused:
+                        if not await self.state.wait_resumed(self.pause_release_after) and browser:
+                            # Long pause: hand the browser back until we resume
+                            await self._close_quietly(browser)
+                            browser = None
+                        await self.state.wait_resumed()
+                        continue
                     
-                    try:
-                        result = await self.process_url(page, url)
-                        processed += 1
-                        
-                        # Emit progress callback
-                        if self.progress_callback:
-                            self.progress_callback({
-                                'url': url,
-                                'result': result,
-                                'progress': processed / total_urls * 100,
-                                'processed': processed,
-                                'total': total_urls
-                            })
-                        
-                        return result
-                    finally:
-                        await browser.close()
-        
-        # Process URLs
-        tasks = [process_with_semaphore(url) for url in urls]
-        
-        for coro in asyncio.as_completed(tasks):
-            if self.state.should_stop:
-                break
-            
-            result = await coro
-            if result:
-                results.append(result)
-                
-                # Rate limiting
-                delay = random.uniform(*self.delay_range)
-                await asyncio.sleep(delay)
+                    if index >= self.worker_limit:
+                        # Over the run's share: hand the browser back until the limit grows
+                        if browser:
+                            await self._close_quietly(browser)
+                            browser = None
+                        await self.state.wait_limit_changed()
+                        continue
+                    
+                    url = pending.popleft()
+                    timeout = self.timeout
+                    if self.budget:
+                        # Skip what can't finish in time; shorten pages near the deadline
+                        if not self.budget.fits(url):
+                            self.skipped_urls.append(url)
+                            continue
+                        timeout = self.budget.page_timeout(self.timeout)
+                    
+                    if browser is None:
+                        browser = await self.launch_browser(playwright)
+                    
+                    finished, result = await self.state.guard(
+                        self.process_url_in_context(browser, url, timeout),
+                        cancel_timeout=self.stop_timeout
+                    )
+                    
+                    if not finished:
+                        # Interrupted by pause: revisit the URL once resumed
+                        if not self.state.should_stop:
+                            pending.appendleft(url)
+                        continue
+                    
+                    processed += 1
+                    results.append(result)
+                    
+                    # Emit progress callback
+                    if self.progress_callback:
+                        self.progress_callback({
+                            'url': url,
+                            'result': result,
+                            'progress': processed / total_urls * 100,
+                            'processed': processed,
+                            'total': total_urls
+                        })
+                    
+                    # Rate limiting
+                    await self.state.sleep(random.uniform(*self.delay_range))
+            finally:
+                if browser:
+                    await self._close_quietly(browser)
+        
+        try:
+            async with async_playwright() as p:
+                workers = [worker(index, p) for index in range(min(self.concurrent_limit, total_urls))]
+                await asyncio.gather(*workers)
+        finally:
+            self.state.reset()
         
-        self.state.reset()
         return results
     
     def start(self):
@@ -518,11 +728,17 @@ class SchemaValidator:
         """Stop validation."""
         self.state.stop()
     
+    def set_worker_limit(self, limit: int):
+        """Let at most `limit` workers hold a browser; the rest finish their page and wait."""
+        self.worker_limit = max(0, min(limit, self.concurrent_limit))
+        self.state.limit_changed()
+    
     def get_state(self) -> Dict:
         """Get current validation state."""
         return {
             'is_running': self.state.is_running,
             'is_paused': self.state.is_paused,
-            'should_stop': self.state.should_stop
+            'should_stop': self.state.should_stop,
+            'workers': self.worker_limit
         }
 
@@ -2,12 +2,19 @@
 Flask application for Schema Validator web interface.
 """
 
+import atexit
 import os
 from flask import Flask, render_template
 from flask_socketio import SocketIO
 
 from ..config import Config
-from .database import Database
+from .storage import Storage, open_storage
+from .cache import CachedStorage, ReadCache
+from .result_writer import ResultWriter
+from .progress import ProgressBroadcaster
+from .runs import RunManager
+from .worker import ValidationWorker
+from .retention import RetentionCompactor
 
 # Initialize SocketIO
 socketio = SocketIO(cors_allowed_origins="*", async_mode='threading')
@@ -15,6 +22,21 @@ socketio = SocketIO(cors_allowed_origins="*", async_mode='threading')
 # Global database instance
 db = None
 
+# Global read cache in front of the database
+read_cache = None
+
+# Global background writer for validation results
+result_writer = None
+
+# Global background compactor applying retention policies
+retention_compactor = None
+
+# Global broadcaster of coalesced validation progress
+progress_broadcaster = None
+
+# Global registry of active validation runs
+run_manager = None
+
 
 def create_app(config_class=Config):
     """Create and configure Flask application."""
@@ -29,16 +51,39 @@ def create_app(config_class=Config):
     config_class.init_app()
     
     # Initialize database
-    global db
-    db = Database()
+    global db, read_cache, result_writer, retention_compactor, progress_broadcaster, run_manager
+    # Wrapped before the background workers get it, so their writes invalidate too
+    read_cache = ReadCache(config_class.READ_CACHE_SIZE)
+    db = CachedStorage(open_storage(), read_cache, config_class.READ_CACHE_TTL)
+    result_writer = ResultWriter(db)
+    atexit.register(result_writer.close)
+    retention_compactor = RetentionCompactor(db)
+    retention_compactor.start()
+    atexit.register(retention_compactor.close)
     
     # Initialize SocketIO
-    socketio.init_app(app, cors_allowed_origins="*")
+    socketio.init_app(
+        app,
+        cors_allowed_origins="*",
+        http_compression=config_class.SOCKETIO_COMPRESSION,
+        compression_threshold=config_class.SOCKETIO_COMPRESSION_THRESHOLD,
+        message_queue=config_class.SOCKETIO_MESSAGE_QUEUE
+    )
+    progress_broadcaster = ProgressBroadcaster(socketio, interval=config_class.PROGRESS_INTERVAL)
+    atexit.register(progress_broadcaster.close)
     
     # Register routes
     from . import routes
     app.register_blueprint(routes.bp)
     
+    # Validation runs in this process, or in a worker process of its own
+    if config_class.VALIDATION_WORKER:
+        from .socketio_events import notify_run
+        run_manager = ValidationWorker(progress_broadcaster, notify_run, on_finished=db.invalidate_run, db=db)
+        atexit.register(run_manager.close)
+    else:
+        run_manager = RunManager(config_class.MAX_BROWSERS, config_class.SMALL_RUN_URLS, config_class.PRIORITY_BOOST)
+    
     # Register error handlers
     @app.errorhandler(404)
     def not_found(error):
@@ -51,7 +96,31 @@ def create_app(config_class=Config):
     return app
 
 
-def get_db() -> Database:
+def get_db() -> Storage:
     """Get database instance."""
     return db
 
+
+def get_read_cache() -> ReadCache:
+    """Get the read cache in front of the database."""
+    return read_cache
+
+
+def get_result_writer() -> ResultWriter:
+    """Get the background result writer."""
+    return result_writer
+
+
+def get_retention_compactor() -> RetentionCompactor:
+    """Get the background retention compactor."""
+    return retention_compactor
+
+
+def get_progress_broadcaster() -> ProgressBroadcaster:
+    """Get the validation progress broadcaster."""
+    return progress_broadcaster
+
+
+def get_run_manager():
+    """Get the registry of active validation runs: a RunManager, or the ValidationWorker hosting them."""
+    return run_manager
@@ -0,0 +1,274 @@
+"""
+In-process read-through cache in front of the store.
+Hot reads (projects, run metadata, finished runs' result pages, help content)
+are served from memory and invalidated by the store's own write methods.
+"""
+
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional
+
+from .storage import Storage
+
+
+def _copy(value, depth: int = 3):
+    """Copy the outer dicts and lists of a cached value, so callers can annotate what they get."""
+    if depth and isinstance(value, dict):
+        return {key: _copy(item, depth - 1) for key, item in value.items()}
+    if depth and isinstance(value, list):
+        return [_copy(item, depth - 1) for item in value]
+    return value
+
+
+class ReadCache:
+    """
+    Size-bounded LRU of loaded values, grouped by namespace and an optional
+    scope within it (e.g. a run id) for invalidation.
+    
+    Each namespace has a generation, bumped by every invalidation; a value
+    loaded while its namespace was invalidated is returned but not stored,
+    so a read racing a write never caches what the write replaced.
+    """
+    
+    def __init__(self, max_entries: int = 2000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, namespace, scope, expires_at)
+        self._generations = Counter()
+        self._lock = threading.Lock()
+        
+        self.hits = Counter()
+        self.misses = Counter()
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def get_or_load(self, namespace: str, key: Hashable, load: Callable, scope=None,
+                    ttl: Optional[float] = None, cacheable: Optional[Callable] = None):
+        """
+        Return the cached value for (namespace, key), or load() it and cache it
+        unless `cacheable(value)` says otherwise. `scope` is a value or a
+        function of the loaded value; `ttl` (seconds) bounds the entry's age.
+        """
+        key = (namespace, key)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and (entry[3] is None or entry[3] > now):
+                self._entries.move_to_end(key)
+                self.hits[namespace] += 1
+                return _copy(entry[0])
+            self.misses[namespace] += 1
+            generation = self._generations[namespace]
+        
+        value = load()
+        if self.max_entries > 0 and (cacheable is None or cacheable(value)):
+            entry_scope = scope(value) if callable(scope) else scope
+            expires_at = now + ttl if ttl else None
+            with self._lock:
+                if self._generations[namespace] == generation:
+                    self._entries[key] = (value, namespace, entry_scope, expires_at)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+        return _copy(value)
+    
+    def invalidate(self, namespace: Optional[str] = None, scope=None):
+        """Drop a namespace's entries (those for one scope, if given), or everything."""
+        with self._lock:
+            if namespace is None:
+                for name in set(self._generations) | {entry[1] for entry in self._entries.values()}:
+                    self._generations[name] += 1
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                return
+            
+            self._generations[namespace] += 1
+            stale = [key for key, entry in self._entries.items()
+                     if entry[1] == namespace and (scope is None or entry[2] == scope)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+    
+    def stats(self) -> Dict:
+        """Cache statistics for monitoring, with hit ratios overall and per namespace."""
+        def ratio(hits, misses):
+            return round(hits / (hits + misses), 4) if hits + misses else 0.0
+        
+        with self._lock:
+            namespaces = {
+                name: {'hits': self.hits[name], 'misses': self.misses[name],
+                       'hit_ratio': ratio(self.hits[name], self.misses[name])}
+                for name in sorted(set(self.hits) | set(self.misses))
+            }
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': sum(self.hits.values()),
+                'misses': sum(self.misses.values()),
+                'hit_ratio': ratio(sum(self.hits.values()), sum(self.misses.values())),
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'namespaces': namespaces
+            }
+
+
+class CachedStorage:
+    """
+    A Storage with a ReadCache in front of its hot reads.
+    
+    Projects and run metadata are cached for up to `ttl` seconds, which bounds
+    how stale they get when other nodes share a PostgreSQL store. A finished
+    run's result pages, summary and stats don't change once written, so they
+    are cached until evicted or invalidated; live runs' results are always
+    read from the store. Every write method made through this object
+    invalidates what it changes. Everything else passes straight through.
+    """
+    
+    # Runs in these states are still being written
+    LIVE_STATUSES = ('running', 'paused', 'pending')
+    
+    def __init__(self, storage: Storage, cache: ReadCache, ttl: float = 5.0):
+        self.storage = storage
+        self.cache = cache
+        self.ttl = ttl
+    
+    def __getattr__(self, name):
+        return getattr(self.storage, name)
+    
+    @classmethod
+    def _key(cls, *parts) -> tuple:
+        """A hashable cache key from call arguments, lists (e.g. fields) included."""
+        return tuple(cls._key(*part) if isinstance(part, (list, tuple)) else part for part in parts)
+    
+    # Cached reads
+    def get_projects(self) -> List[Dict]:
+        return self.cache.get_or_load('projects', ('all',), self.storage.get_projects, ttl=self.ttl)
+    
+    def get_project(self, project_id: int) -> Optional[Dict]:
+        return self.cache.get_or_load('projects', ('one', project_id), lambda: self.storage.get_project(project_id),
+                                      ttl=self.ttl)
+    
+    def get_validation_runs(self, project_id: int = None, limit: int = 50) -> List[Dict]:
+        return self.cache.get_or_load('runs', ('list', project_id, limit),
+                                      lambda: self.storage.get_validation_runs(project_id, limit), ttl=self.ttl)
+    
+    def get_validation_run(self, run_id: int) -> Optional[Dict]:
+        return self.cache.get_or_load('runs', ('one', run_id), lambda: self.storage.get_validation_run(run_id),
+                                      ttl=self.ttl)
+    
+    def _run_finished(self, run_id: int) -> bool:
+        run = self.get_validation_run(run_id)
+        return bool(run) and run['status'] not in self.LIVE_STATUSES
+    
+    def _run_read(self, run_id: int, key: tuple, load: Callable):
+        """A read of one run's results, cached if the run had finished before it started."""
+        finished = self._run_finished(run_id)
+        return self.cache.get_or_load('results', key, load, scope=run_id, cacheable=lambda value: finished)
+    
+    def query_validation_results(self, run_id: int, *args, **kwargs) -> Dict:
+        return self._run_read(run_id, self._key('page', run_id, *args, *sorted(kwargs.items())),
+                              lambda: self.storage.query_validation_results(run_id, *args, **kwargs))
+    
+    def search_results(self, run_id: int, *args, **kwargs) -> Dict:
+        return self._run_read(run_id, self._key('search', run_id, *args, *sorted(kwargs.items())),
+                              lambda: self.storage.search_results(run_id, *args, **kwargs))
+    
+    def get_results_summary(self, run_id: int) -> Dict:
+        return self._run_read(run_id, ('summary', run_id), lambda: self.storage.get_results_summary(run_id))
+    
+    def get_run_stats(self, run_id: int) -> Dict:
+        return self._run_read(run_id, ('stats', run_id), lambda: self.storage.get_run_stats(run_id))
+    
+    def get_validation_result(self, result_id: int) -> Optional[Dict]:
+        return self.cache.get_or_load(
+            'results', ('result', result_id), lambda: self.storage.get_validation_result(result_id),
+            scope=lambda value: value['run_id'],
+            cacheable=lambda value: bool(value) and self._run_finished(value['run_id'])
+        )
+    
+    def invalidate_run(self, run_id: int):
+        """Drop what is cached about a run another process has been writing."""
+        self.cache.invalidate('runs')
+        self.cache.invalidate('results', run_id)
+    
+    # Writes, with the invalidation each one needs
+    def _write(self, method: str, invalidate: List[tuple], *args, **kwargs):
+        try:
+            return getattr(self.storage, method)(*args, **kwargs)
+        finally:
+            for namespace, scope in invalidate:
+                self.cache.invalidate(namespace, scope)
+    
+    def create_project(self, *args, **kwargs) -> int:
+        return self._write('create_project', [('projects', None)], *args, **kwargs)
+    
+    def update_project(self, *args, **kwargs):
+        return self._write('update_project', [('projects', None)], *args, **kwargs)
+    
+    def delete_project(self, *args, **kwargs):
+        return self._write('delete_project', [(None, None)], *args, **kwargs)
+    
+    # Result pages show each result's URL and filter on its tags
+    def update_url(self, *args, **kwargs):
+        return self._write('update_url', [('results', None)], *args, **kwargs)
+    
+    def bulk_update_urls(self, *args, **kwargs) -> int:
+        return self._write('bulk_update_urls', [('results', None)], *args, **kwargs)
+    
+    def update_url_tags(self, *args, **kwargs) -> int:
+        return self._write('update_url_tags', [('results', None)], *args, **kwargs)
+    
+    def ingest_urls(self, *args, **kwargs):
+        return self._write('ingest_urls', [('results', None)], *args, **kwargs)
+    
+    def delete_url(self, *args, **kwargs):
+        return self._write('delete_url', [('results', None)], *args, **kwargs)
+    
+    def bulk_delete_urls(self, *args, **kwargs) -> int:
+        return self._write('bulk_delete_urls', [('results', None)], *args, **kwargs)
+    
+    def create_validation_run(self, *args, **kwargs) -> int:
+        return self._write('create_validation_run', [('runs', None)], *args, **kwargs)
+    
+    # A status change can end or resume a run, so its results' cacheability changes too
+    def update_validation_run(self, run_id: int, *args, **kwargs):
+        return self._write('update_validation_run', [('runs', None), ('results', run_id)], run_id, *args, **kwargs)
+    
+    def set_validation_run_paused(self, run_id: int, *args, **kwargs) -> bool:
+        return self._write('set_validation_run_paused', [('runs', None), ('results', run_id)], run_id, *args, **kwargs)
+    
+    def finish_validation_run(self, run_id: int, *args, **kwargs) -> bool:
+        return self._write('finish_validation_run', [('runs', None), ('results', run_id)], run_id, *args, **kwargs)
+    
+    def record_run_coverage(self, *args, **kwargs):
+        return self._write('record_run_coverage', [('runs', None)], *args, **kwargs)
+    
+    def add_validation_result(self, run_id: int, *args, **kwargs) -> int:
+        return self._write('add_validation_result', [('results', run_id)], run_id, *args, **kwargs)
+    
+    def write_results_batch(self, results: List[tuple], progress: Dict[int, int] = None):
+        runs = {run_id for run_id, _, _ in results}
+        invalidate = [('results', run_id) for run_id in sorted(runs)]
+        if progress:
+            invalidate.append(('runs', None))
+        return self._write('write_results_batch', invalidate, results, progress)
+    
+    def delete_validation_run(self, run_id: int):
+        return self._write('delete_validation_run', [('runs', None), ('results', run_id)], run_id)
+    
+    def compact_validation_run(self, run_id: int, *args, **kwargs) -> int:
+        return self._write('compact_validation_run', [('runs', None), ('results', run_id)], run_id, *args, **kwargs)
+    
+    def archive_validation_run(self, run_id: int) -> str:
+        return self._write('archive_validation_run', [('runs', None), ('results', run_id)], run_id)
+    
+    def collect_orphans(self, *args, **kwargs) -> Dict[str, int]:
+        return self._write('collect_orphans', [(None, None)], *args, **kwargs)
+    
+    def rebuild_counters(self):
+        return self._write('rebuild_counters', [(None, None)])
+
+
+# Routes and background workers type against Storage
+Storage.register(CachedStorage)
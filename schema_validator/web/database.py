@@ -2,36 +2,225 @@
 Database operations for Schema Validator using SQLite.
 """
 
+import base64
+import hashlib
 import sqlite3
 import json
-from datetime import datetime
+import queue
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 
 from ..config import Config
+from ..core.sitemap import BloomFilter
 from ..models import Project, URL, ValidationRun, ValidationResult
+from .storage import Storage
 
 
-class Database:
+class PooledConnection:
+    """
+    A pooled sqlite3 connection.
+    
+    Behaves like the underlying connection, except close() hands it back to
+    the pool (rolling back anything left uncommitted) instead of closing it.
+    """
+    
+    def __init__(self, pool: 'ConnectionPool', conn: sqlite3.Connection):
+        self._pool = pool
+        self._conn = conn
+    
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise sqlite3.ProgrammingError('Cannot operate on a released connection.')
+        return getattr(self._conn, name)
+    
+    def __enter__(self):
+        return self._conn.__enter__()
+    
+    def __exit__(self, *exc_info):
+        return self._conn.__exit__(*exc_info)
+    
+    def close(self):
+        """Return the connection to the pool."""
+        if self._conn is not None:
+            self._pool.release(self._conn)
+            self._conn = None
+    
+    def __del__(self):
+        # Methods that raise before close() still give their connection back
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    Pool of tuned SQLite connections shared by request and validation threads.
+    
+    Every connection runs in WAL mode with synchronous=NORMAL, a busy timeout
+    and foreign keys enforced, and keeps its own prepared-statement cache.
+    """
+    
+    PRAGMAS = (
+        'PRAGMA synchronous = NORMAL',
+        'PRAGMA foreign_keys = ON',
+        'PRAGMA temp_store = MEMORY',
+        'PRAGMA cache_size = -16000',  # 16 MB page cache
+    )
+    
+    def __init__(self, db_path: Path, max_idle: int = 8, busy_timeout: float = 10.0,
+                 cached_statements: int = 256):
+        self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue(maxsize=max_idle)
+        self._wal_enabled = False
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        # uri=True lets ATTACH take file: URIs, e.g. mode=rw to never create a file
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+            uri=True
+        )
+        conn.row_factory = sqlite3.Row
+        
+        with self._lock:
+            if not self._wal_enabled:
+                # Persistent in the file; set once. auto_vacuum only takes effect on a
+                # new, empty database (existing files switch via Database.vacuum())
+                conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                conn.execute('PRAGMA journal_mode = WAL')
+                self._wal_enabled = True
+        
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}')
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def acquire(self) -> sqlite3.Connection:
+        """Take an idle connection or open a new one."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+    
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection, closing it if the pool is already full."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put_nowait(conn)
+        except (queue.Full, sqlite3.Error):
+            conn.close()
+    
+    def close_all(self):
+        """Close every idle connection."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class Database(Storage):
     """SQLite database handler for Schema Validator."""
     
+    IntegrityError = sqlite3.IntegrityError
+    OperationalError = sqlite3.OperationalError
+    
     def __init__(self, db_path: Optional[Path] = None):
         self.db_path = db_path or Config.DATABASE_PATH
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.pool = ConnectionPool(self.db_path)
         self.init_database()
     
     def get_connection(self) -> sqlite3.Connection:
-        """Get database connection."""
-        conn = sqlite3.Connection(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        """Get a pooled database connection; close() returns it to the pool."""
+        return PooledConnection(self.pool, self.pool.acquire())
+    
+    def close(self):
+        """Close pooled connections."""
+        self.pool.close_all()
     
     def init_database(self):
-        """Initialize database schema."""
-        Config.init_app()  # Ensure directories exist
-        
+        """Bring the schema up to date by applying any migrations it hasn't had yet."""
         conn = self.get_connection()
-        cursor = conn.cursor()
+        try:
+            # Fast path: an up-to-date database costs a single pragma read
+            version = self._schema_version(conn)
+            if version < self.SCHEMA_VERSION:
+                self._migrate(conn)
+            elif version > self.SCHEMA_VERSION:
+                print(f"Warning: database schema version {version} is newer than this app "
+                      f"({self.SCHEMA_VERSION}); upgrade the app")
+        finally:
+            conn.close()
         
+        # Don't create default project - let users start fresh
+    
+    # Ordered schema migrations: (user_version, method name). Each runs in its own
+    # transaction together with the user_version bump, so a database is always at
+    # exactly one version. Steps are idempotent, because databases created before
+    # versioning start at 0 with part of the schema already in place. Never edit a
+    # released step; append a new one.
+    MIGRATIONS = (
+        (1, '_migration_core_tables'),
+        (2, '_migration_budgets_and_sitemaps'),
+        (3, '_migration_query_indexes'),
+        (4, '_migration_schema_blobs'),
+        (5, '_migration_retention'),
+        (6, '_migration_counters'),
+        (7, '_migration_latest_results'),
+        (8, '_migration_tags_and_bulk_operations'),
+        (9, '_migration_search'),
+    )
+    SCHEMA_VERSION = MIGRATIONS[-1][0]
+    
+    def _migrate(self, conn: sqlite3.Connection):
+        """Apply pending migrations in order, one transaction per step."""
+        for version, method in self.MIGRATIONS:
+            # Processes starting together apply each step once: take the
+            # migration lock, then re-check the version under it
+            self._lock_schema(conn)
+            try:
+                if self._schema_version(conn) < version:
+                    getattr(self, method)(conn.cursor())
+                    self._set_schema_version(conn, version)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+    
+    @staticmethod
+    def _schema_version(conn: sqlite3.Connection) -> int:
+        return conn.execute('PRAGMA user_version').fetchone()[0]
+    
+    @staticmethod
+    def _set_schema_version(conn: sqlite3.Connection, version: int):
+        conn.execute(f'PRAGMA user_version = {int(version)}')
+    
+    @staticmethod
+    def _lock_schema(conn: sqlite3.Connection):
+        """Start a migration transaction holding the write lock."""
+        conn.execute('BEGIN IMMEDIATE')
+    
+    @staticmethod
+    def _add_column(cursor: sqlite3.Cursor, table: str, column: str, definition: str):
+        """Add a column unless the table already has it."""
+        cursor.execute(f'PRAGMA table_info({table})')
+        if column not in {row['name'] for row in cursor.fetchall()}:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+    
+    def _migration_core_tables(self, cursor: sqlite3.Cursor):
         # Create projects table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS projects (
@@ -91,27 +280,594 @@ class Database:
             )
         ''')
         
-        # Add new fields to existing validation_results table if they don't exist
-        try:
-            cursor.execute('ALTER TABLE validation_results ADD COLUMN warnings TEXT')
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        try:
-            cursor.execute('ALTER TABLE validation_results ADD COLUMN has_warnings BOOLEAN DEFAULT 0')
-        except sqlite3.OperationalError:
-            pass  # Column already exists
+        # Columns added to validation_results after its first release
+        self._add_column(cursor, 'validation_results', 'warnings', 'TEXT')
+        self._add_column(cursor, 'validation_results', 'has_warnings', 'BOOLEAN DEFAULT 0')
         
-        # Create indexes
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_urls_project ON urls(project_id)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_runs_project ON validation_runs(project_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_results_run ON validation_results(run_id)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_results_url ON validation_results(url_id)')
+    
+    def _migration_budgets_and_sitemaps(self, cursor: sqlite3.Cursor):
+        self._add_column(cursor, 'validation_runs', 'coverage_json', 'TEXT')
+        self._add_column(cursor, 'urls', 'lastmod', 'TEXT')
+        
+        # URLs a time-budgeted run had to skip, prioritized by the next run
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS url_skips (
+                url_id INTEGER PRIMARY KEY,
+                run_id INTEGER NOT NULL,
+                skipped_at TEXT NOT NULL,
+                FOREIGN KEY (url_id) REFERENCES urls (id) ON DELETE CASCADE,
+                FOREIGN KEY (run_id) REFERENCES validation_runs (id) ON DELETE CASCADE
+            )
+        ''')
+    
+    def _migration_query_indexes(self, cursor: sqlite3.Cursor):
+        # Composite indexes backing paginated sorts and filters
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_urls_project_added ON urls(project_id, added_date)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_urls_project_status ON urls(project_id, status, added_date)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_results_run_validated ON validation_results(run_id, validated_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_results_run_score ON validation_results(run_id, score)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_results_run_status ON validation_results(run_id, status)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_results_run_response ON validation_results(run_id, response_time)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_results_run_url ON validation_results(run_id, url_id)')
+        
+        # One row per URL per project; merge legacy duplicates before indexing
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_urls_project_url'")
+        if cursor.fetchone() is None:
+            self._merge_duplicate_urls(cursor)
+            cursor.execute('CREATE UNIQUE INDEX idx_urls_project_url ON urls(project_id, url)')
+    
+    def _migration_schema_blobs(self, cursor: sqlite3.Cursor):
+        # Content-addressed, zlib-compressed schema_data shared by all results with the same schema
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_blobs (
+                hash TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                raw_size INTEGER NOT NULL,
+                stored_size INTEGER NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        ''')
+        self._add_column(cursor, 'validation_results', 'schema_hash', 'TEXT')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_results_schema_hash ON validation_results(schema_hash)')
+    
+    def _migration_retention(self, cursor: sqlite3.Cursor):
+        # Retention: per-run summaries and per-URL score history outlive compacted results
+        self._add_column(cursor, 'validation_runs', 'summary_json', 'TEXT')
+        self._add_column(cursor, 'validation_runs', 'compacted_at', 'TEXT')
         
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS url_score_history (
+                url_id INTEGER NOT NULL,
+                run_id INTEGER NOT NULL,
+                status TEXT,
+                score REAL DEFAULT 0.0,
+                response_time REAL DEFAULT 0.0,
+                validated_at TEXT NOT NULL,
+                PRIMARY KEY (url_id, run_id),
+                FOREIGN KEY (url_id) REFERENCES urls (id) ON DELETE CASCADE,
+                FOREIGN KEY (run_id) REFERENCES validation_runs (id) ON DELETE CASCADE
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_run ON url_score_history(run_id)')
+    
+    def _migration_counters(self, cursor: sqlite3.Cursor):
+        # The triggers as released in this step; migration 8 redefines them
+        self._create_counters(cursor, {
+            'counters_urls_insert': '''
+                AFTER INSERT ON urls BEGIN
+                    {bump_url_new}
+                END''',
+            'counters_urls_delete': '''
+                AFTER DELETE ON urls BEGIN
+                    {drop_url_old}
+                END''',
+            'counters_urls_update': '''
+                AFTER UPDATE OF project_id, status ON urls
+                WHEN OLD.project_id IS NOT NEW.project_id OR OLD.status IS NOT NEW.status BEGIN
+                    {drop_url_old}
+                    {bump_url_new}
+                END''',
+            'counters_results_insert': '''
+                AFTER INSERT ON validation_results BEGIN
+                    {bump_result_new}
+                END''',
+            'counters_results_delete': '''
+                AFTER DELETE ON validation_results BEGIN
+                    {drop_result_old}
+                END''',
+            'counters_results_update': '''
+                AFTER UPDATE OF run_id, status, score, schema_data, schema_hash ON validation_results BEGIN
+                    {drop_result_old}
+                    {bump_result_new}
+                END''',
+            'counters_runs_insert': '''
+                AFTER INSERT ON validation_runs BEGIN
+                    INSERT INTO counters (scope, scope_id, name, value)
+                    VALUES ('project', COALESCE(NEW.project_id, 0), 'runs', 1)
+                    ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = value + 1;
+                END''',
+            'counters_runs_delete': '''
+                AFTER DELETE ON validation_runs BEGIN
+                    UPDATE counters SET value = value - 1
+                    WHERE scope = 'project' AND scope_id = COALESCE(OLD.project_id, 0) AND name = 'runs';
+                    DELETE FROM counters WHERE scope = 'run' AND scope_id = OLD.id;
+                END''',
+            'counters_projects_delete': '''
+                AFTER DELETE ON projects BEGIN
+                    DELETE FROM counters WHERE scope = 'project' AND scope_id = OLD.id;
+                END''',
+        })
+    
+    def _migration_latest_results(self, cursor: sqlite3.Cursor):
+        self._create_latest_results(cursor)
+    
+    def _migration_tags_and_bulk_operations(self, cursor: sqlite3.Cursor):
+        # Set-based bulk operations pause per-row triggers for the length of their
+        # transaction by inserting a row here, and do the triggers' work themselves
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS trigger_pauses (
+                name TEXT PRIMARY KEY
+            ) WITHOUT ROWID
+        ''')
+        
+        # Recreate the counter triggers with their pause checks
+        self._create_counters(cursor, self.COUNTER_TRIGGERS)
+        self._create_tags(cursor)
+        
+        # Single-column indexes that the composites cover; dropping them
+        # saves an index write per row on every insert, update and delete
+        cursor.execute('DROP INDEX IF EXISTS idx_urls_project')
+        cursor.execute('DROP INDEX IF EXISTS idx_results_run')
+    
+    def _migration_search(self, cursor: sqlite3.Cursor):
+        self._create_search(cursor)
+    
+    # Aggregate counters, kept current by triggers in the same transaction as each write
+    # (these definitions since migration 8). scope 'project': urls, urls:<status>, runs;
+    # scope 'run': results, results:<status>, score_sum, schema_found. URLs without a
+    # project count under project 0.
+    COUNTER_TRIGGERS = {
+        'counters_urls_insert': '''
+            AFTER INSERT ON urls BEGIN
+                {bump_url_new}
+            END''',
+        'counters_urls_delete': '''
+            AFTER DELETE ON urls
+            WHEN NOT EXISTS (SELECT 1 FROM trigger_pauses WHERE name = 'url_counters') BEGIN
+                {drop_url_old}
+            END''',
+        'counters_urls_update': '''
+            AFTER UPDATE OF project_id, status ON urls
+            WHEN (OLD.project_id IS NOT NEW.project_id OR OLD.status IS NOT NEW.status)
+             AND NOT EXISTS (SELECT 1 FROM trigger_pauses WHERE name = 'url_counters') BEGIN
+                {drop_url_old}
+                {bump_url_new}
+            END''',
+        'counters_results_insert': '''
+            AFTER INSERT ON validation_results BEGIN
+                {bump_result_new}
+            END''',
+        'counters_results_delete': '''
+            AFTER DELETE ON validation_results BEGIN
+                {drop_result_old}
+            END''',
+        'counters_results_update': '''
+            AFTER UPDATE OF run_id, status, score, schema_data, schema_hash ON validation_results BEGIN
+                {drop_result_old}
+                {bump_result_new}
+            END''',
+        'counters_runs_insert': '''
+            AFTER INSERT ON validation_runs BEGIN
+                INSERT INTO counters (scope, scope_id, name, value)
+                VALUES ('project', COALESCE(NEW.project_id, 0), 'runs', 1)
+                ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = value + 1;
+            END''',
+        'counters_runs_delete': '''
+            AFTER DELETE ON validation_runs BEGIN
+                UPDATE counters SET value = value - 1
+                WHERE scope = 'project' AND scope_id = COALESCE(OLD.project_id, 0) AND name = 'runs';
+                DELETE FROM counters WHERE scope = 'run' AND scope_id = OLD.id;
+            END''',
+        'counters_projects_delete': '''
+            AFTER DELETE ON projects BEGIN
+                DELETE FROM counters WHERE scope = 'project' AND scope_id = OLD.id;
+            END''',
+    }
+    
+    COUNTER_STATEMENTS = {
+        # Decrements only ever UPDATE, so cascaded child deletes that run after the
+        # parent's counters are gone can't resurrect them as negative rows
+        'bump_url_new': '''
+                INSERT INTO counters (scope, scope_id, name, value)
+                VALUES ('project', COALESCE(NEW.project_id, 0), 'urls', 1),
+                       ('project', COALESCE(NEW.project_id, 0), 'urls:' || COALESCE(NEW.status, ''), 1)
+                ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = value + excluded.value;''',
+        'drop_url_old': '''
+                UPDATE counters SET value = value - 1
+                WHERE scope = 'project' AND scope_id = COALESCE(OLD.project_id, 0)
+                  AND name IN ('urls', 'urls:' || COALESCE(OLD.status, ''));''',
+        'bump_result_new': '''
+                INSERT INTO counters (scope, scope_id, name, value)
+                VALUES ('run', NEW.run_id, 'results', 1),
+                       ('run', NEW.run_id, 'results:' || COALESCE(NEW.status, ''), 1),
+                       ('run', NEW.run_id, 'score_sum', COALESCE(NEW.score, 0)),
+                       ('run', NEW.run_id, 'schema_found', {schema_found_new})
+                ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = value + excluded.value;''',
+        'drop_result_old': '''
+                UPDATE counters SET value = value - CASE name
+                        WHEN 'score_sum' THEN COALESCE(OLD.score, 0)
+                        WHEN 'schema_found' THEN {schema_found_old}
+                        ELSE 1 END
+                WHERE scope = 'run' AND scope_id = OLD.run_id
+                  AND name IN ('results', 'results:' || COALESCE(OLD.status, ''), 'score_sum', 'schema_found');''',
+    }
+    
+    # A result found schema if it references a blob or holds legacy inline schema_data
+    SCHEMA_FOUND_SQL = {
+        'schema_found_new': "(NEW.schema_hash IS NOT NULL OR COALESCE(NEW.schema_data, 'null') NOT IN ('null', '{}'))",
+        'schema_found_old': "(OLD.schema_hash IS NOT NULL OR COALESCE(OLD.schema_data, 'null') NOT IN ('null', '{}'))",
+    }
+    
+    def _create_counters(self, cursor: sqlite3.Cursor, triggers: Dict[str, str]):
+        """Create the counters table and the given triggers, backfilling it on first creation."""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'counters'")
+        created = cursor.fetchone() is None
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS counters (
+                scope TEXT NOT NULL,
+                scope_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                value REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (scope, scope_id, name)
+            ) WITHOUT ROWID
+        ''')
+        
+        # Triggers are dropped and recreated, so a migration can call this to change their definitions
+        statements = {name: sql.format(**self.SCHEMA_FOUND_SQL) for name, sql in self.COUNTER_STATEMENTS.items()}
+        for name, body in triggers.items():
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(f'CREATE TRIGGER {name} {body.format(**statements)}')
+        
+        if created:
+            self._backfill_counters(cursor)
+    
+    # Latest result per URL, maintained by triggers on validation_results
+    LATEST_RESULT_TRIGGERS = {
+        'latest_result_insert': '''
+            AFTER INSERT ON validation_results BEGIN
+                INSERT INTO url_latest_result (url_id, result_id, run_id, status, score, errors, validated_at)
+                VALUES (NEW.url_id, NEW.id, NEW.run_id, NEW.status, NEW.score, NEW.errors, NEW.validated_at)
+                ON CONFLICT (url_id) DO UPDATE SET
+                    result_id = excluded.result_id, run_id = excluded.run_id, status = excluded.status,
+                    score = excluded.score, errors = excluded.errors, validated_at = excluded.validated_at
+                WHERE excluded.validated_at >= url_latest_result.validated_at;
+            END''',
+        # Deleting the latest result (run deleted or compacted) falls back to the URL's
+        # previous result or compacted history; skipped when the URL itself is going away
+        'latest_result_delete': '''
+            AFTER DELETE ON validation_results
+            WHEN EXISTS (SELECT 1 FROM url_latest_result WHERE url_id = OLD.url_id AND result_id = OLD.id)
+             AND EXISTS (SELECT 1 FROM urls WHERE id = OLD.url_id) BEGIN
+                DELETE FROM url_latest_result WHERE url_id = OLD.url_id;
+                INSERT INTO url_latest_result (url_id, result_id, run_id, status, score, errors, validated_at)
+                SELECT url_id, result_id, run_id, status, score, errors, validated_at FROM (
+                    SELECT url_id, id AS result_id, run_id, status, score, errors, validated_at
+                    FROM validation_results WHERE url_id = OLD.url_id
+                    UNION ALL
+                    SELECT url_id, NULL, run_id, status, score, NULL, validated_at
+                    FROM url_score_history WHERE url_id = OLD.url_id
+                ) ORDER BY validated_at DESC LIMIT 1;
+            END''',
+    }
+    
+    def _create_latest_results(self, cursor: sqlite3.Cursor):
+        """Create url_latest_result and its triggers, backfilling it on first creation."""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'url_latest_result'")
+        created = cursor.fetchone() is None
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS url_latest_result (
+                url_id INTEGER PRIMARY KEY,
+                result_id INTEGER,
+                run_id INTEGER,
+                status TEXT,
+                score REAL,
+                errors TEXT,
+                validated_at TEXT NOT NULL,
+                FOREIGN KEY (url_id) REFERENCES urls (id) ON DELETE CASCADE
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_latest_status ON url_latest_result(status)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_latest_score ON url_latest_result(score)')
+        
+        for name, body in self.LATEST_RESULT_TRIGGERS.items():
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(f'CREATE TRIGGER {name} {body}')
+        
+        if created:
+            cursor.execute('''
+                INSERT INTO url_latest_result (url_id, result_id, run_id, status, score, errors, validated_at)
+                SELECT url_id, result_id, run_id, status, score, errors, validated_at FROM (
+                    SELECT *, ROW_NUMBER() OVER (
+                        PARTITION BY url_id ORDER BY validated_at DESC, result_id DESC
+                    ) AS position FROM (
+                        SELECT url_id, id AS result_id, run_id, status, score, errors, validated_at
+                        FROM validation_results
+                        UNION ALL
+                        SELECT url_id, NULL, run_id, status, score, NULL, validated_at FROM url_score_history
+                    )
+                ) WHERE position = 1
+            ''')
+    
+    # The comma-separated urls.tags string as a JSON array for json_each. Triggers
+    # can't use recursive CTEs, so the string is quoted into JSON instead of split;
+    # anything still not valid JSON yields no tags rather than failing the write.
+    TAG_ARRAY_SQL = '''(SELECT CASE WHEN json_valid(a) THEN a ELSE '[]' END FROM (
+                SELECT '["' || REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(COALESCE({0}, ''),
+                    '\\', '\\\\'), '"', '\\"'), char(9), ' '), char(10), ' '), char(13), ' '),
+                    ',', '","') || '"]' AS a))'''
+    
+    # url_tags mirrors urls.tags, kept in step by triggers on urls
+    TAG_TRIGGERS = {
+        'url_tags_insert': '''
+            AFTER INSERT ON urls WHEN COALESCE(NEW.tags, '') <> '' BEGIN
+                INSERT OR IGNORE INTO tags (name)
+                SELECT TRIM(value) FROM json_each({new_tags}) WHERE TRIM(value) <> '';
+                INSERT OR IGNORE INTO url_tags (url_id, tag_id)
+                SELECT NEW.id, id FROM tags WHERE name IN (SELECT TRIM(value) FROM json_each({new_tags}));
+            END''',
+        'url_tags_update': '''
+            AFTER UPDATE OF tags ON urls
+            WHEN OLD.tags IS NOT NEW.tags
+             AND NOT EXISTS (SELECT 1 FROM trigger_pauses WHERE name = 'url_tags') BEGIN
+                INSERT OR IGNORE INTO tags (name)
+                SELECT TRIM(value) FROM json_each({new_tags}) WHERE TRIM(value) <> '';
+                DELETE FROM url_tags WHERE url_id = NEW.id AND tag_id NOT IN (
+                    SELECT id FROM tags WHERE name IN (SELECT TRIM(value) FROM json_each({new_tags})));
+                INSERT OR IGNORE INTO url_tags (url_id, tag_id)
+                SELECT NEW.id, id FROM tags WHERE name IN (SELECT TRIM(value) FROM json_each({new_tags}));
+            END''',
+    }
+    
+    def _create_tags(self, cursor: sqlite3.Cursor):
+        """Create the tags and url_tags tables and their triggers, backfilling on first creation."""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'url_tags'")
+        created = cursor.fetchone() is None
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS tags (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE COLLATE NOCASE
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS url_tags (
+                url_id INTEGER NOT NULL,
+                tag_id INTEGER NOT NULL,
+                PRIMARY KEY (url_id, tag_id),
+                FOREIGN KEY (url_id) REFERENCES urls (id) ON DELETE CASCADE,
+                FOREIGN KEY (tag_id) REFERENCES tags (id) ON DELETE CASCADE
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_url_tags_tag ON url_tags(tag_id, url_id)')
+        
+        new_tags = self.TAG_ARRAY_SQL.format('NEW.tags')
+        for name, body in self.TAG_TRIGGERS.items():
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(f'CREATE TRIGGER {name} {body.format(new_tags=new_tags)}')
+        
+        if created:
+            url_tags = self.TAG_ARRAY_SQL.format('u.tags')
+            cursor.execute(f'''
+                INSERT OR IGNORE INTO tags (name)
+                SELECT TRIM(j.value) FROM urls u, json_each({url_tags}) j
+                WHERE COALESCE(u.tags, '') <> '' AND TRIM(j.value) <> ''
+            ''')
+            cursor.execute(f'''
+                INSERT OR IGNORE INTO url_tags (url_id, tag_id)
+                SELECT u.id, t.id FROM urls u, json_each({url_tags}) j
+                JOIN tags t ON t.name = TRIM(j.value)
+                WHERE COALESCE(u.tags, '') <> ''
+            ''')
+    
+    # Full-text indexes over urls and over results' findings. Both are external-content
+    # FTS5 tables (the text stays in its own table, FTS5 keeps only the index), kept in
+    # step by triggers. findings_fts also indexes run_id so a run's matches come
+    # straight out of the index.
+    SEARCH_TABLES = {
+        'urls_fts': ('urls', ('url', 'tags', 'notes')),
+        'findings_fts': ('validation_results', ('run_id', 'errors', 'warnings')),
+    }
+    
+    # bm25 column weights: a hit in the URL itself outranks one in its tags or notes,
+    # an error outranks a warning; run_id is a filter, not a relevance signal
+    SEARCH_RANKS = {
+        'urls_fts': 'bm25(10.0, 5.0, 1.0)',
+        'findings_fts': 'bm25(0.0, 2.0, 1.0)',
+    }
+    
+    def _create_search(self, cursor: sqlite3.Cursor, tables: Optional[Iterable[str]] = None):
+        """Create the full-text tables and their triggers, building the index on first creation."""
+        for table in tables or self.SEARCH_TABLES:
+            content, columns = self.SEARCH_TABLES[table]
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+            created = cursor.fetchone() is None
+            
+            column_list = ', '.join(columns)
+            old_values = ', '.join(f'OLD.{column}' for column in columns)
+            new_values = ', '.join(f'NEW.{column}' for column in columns)
+            changed = ' OR '.join(f'OLD.{column} IS NOT NEW.{column}' for column in columns)
+            
+            cursor.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(
+                    {column_list}, content='{content}', content_rowid='id'
+                )
+            ''')
+            
+            triggers = {
+                f'{table}_insert': f'''
+                    AFTER INSERT ON {content} BEGIN
+                        INSERT INTO {table} (rowid, {column_list}) VALUES (NEW.id, {new_values});
+                    END''',
+                f'{table}_delete': f'''
+                    AFTER DELETE ON {content} BEGIN
+                        INSERT INTO {table} ({table}, rowid, {column_list}) VALUES ('delete', OLD.id, {old_values});
+                    END''',
+                f'{table}_update': f'''
+                    AFTER UPDATE OF {column_list} ON {content} WHEN {changed} BEGIN
+                        INSERT INTO {table} ({table}, rowid, {column_list}) VALUES ('delete', OLD.id, {old_values});
+                        INSERT INTO {table} (rowid, {column_list}) VALUES (NEW.id, {new_values});
+                    END''',
+            }
+            for name, body in triggers.items():
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+                cursor.execute(f'CREATE TRIGGER {name} {body}')
+            
+            if created:
+                cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('rebuild')")
+                cursor.execute(f"INSERT INTO {table} ({table}, rank) VALUES ('rank', ?)",
+                               (self.SEARCH_RANKS[table],))
+    
+    def _backfill_counters(self, cursor: sqlite3.Cursor):
+        """Recompute every counter from the base tables."""
+        cursor.execute('DELETE FROM counters')
+        cursor.execute('''
+            INSERT INTO counters (scope, scope_id, name, value)
+            SELECT 'project', COALESCE(project_id, 0), 'urls', COUNT(*) FROM urls GROUP BY 1, 2
+            UNION ALL
+            SELECT 'project', COALESCE(project_id, 0), 'urls:' || COALESCE(status, ''), COUNT(*)
+            FROM urls GROUP BY 2, 3
+            UNION ALL
+            SELECT 'project', COALESCE(project_id, 0), 'runs', COUNT(*) FROM validation_runs GROUP BY 2
+            UNION ALL
+            SELECT 'run', run_id, 'results', COUNT(*) FROM validation_results GROUP BY 2
+            UNION ALL
+            SELECT 'run', run_id, 'results:' || COALESCE(status, ''), COUNT(*)
+            FROM validation_results GROUP BY 2, 3
+            UNION ALL
+            SELECT 'run', run_id, 'score_sum', COALESCE(SUM(score), 0) FROM validation_results GROUP BY 2
+            UNION ALL
+            SELECT 'run', run_id, 'schema_found',
+                   SUM(CASE WHEN schema_hash IS NOT NULL OR COALESCE(schema_data, 'null') NOT IN ('null', '{}')
+                       THEN 1 ELSE 0 END)
+            FROM validation_results GROUP BY 2
+        ''')
+    
+    def rebuild_counters(self):
+        """Recompute the aggregate counters from scratch (repair tool)."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        self._backfill_counters(cursor)
         conn.commit()
         conn.close()
+    
+    def _read_counters(self, scope: str, scope_id: int) -> Dict[str, float]:
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT name, value FROM counters WHERE scope = ? AND scope_id = ?',
+                       (scope, scope_id))
+        counters = {row['name']: row['value'] for row in cursor.fetchall()}
+        conn.close()
+        return counters
+    
+    def get_url_counts(self) -> Dict[int, int]:
+        """Number of URLs per project id."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT scope_id, value FROM counters WHERE scope = 'project' AND name = 'urls'")
+        counts = {row['scope_id']: int(row['value']) for row in cursor.fetchall()}
+        conn.close()
+        return counts
+    
+    def get_project_stats(self, project_id: int) -> Dict:
+        """URL and run counts for a project dashboard."""
+        counters = self._read_counters('project', project_id)
+        url_statuses = {name[len('urls:'):]: int(value) for name, value in counters.items()
+                        if name.startswith('urls:') and value}
+        
+        return {
+            'total_urls': int(counters.get('urls', 0)),
+            'active_urls': url_statuses.get('active', 0),
+            'total_runs': int(counters.get('runs', 0)),
+            'url_statuses': url_statuses
+        }
+    
+    def get_run_stats(self, run_id: int) -> Dict:
+        """Result counts by status group and average score for a run."""
+        counters = self._read_counters('run', run_id)
+        if not counters.get('results'):
+            summary = self._compacted_summary(run_id)
+            if summary:
+                return {key: value for key, value in summary.items()
+                        if key not in ('error_details', 'warning_details')}
+        total = int(counters.get('results', 0))
+        
+        stats = {'total': total, 'success': 0, 'warning': 0, 'error': 0, 'no_schema': 0, 'http_status': 0}
+        statuses = {}
+        for name, value in counters.items():
+            if not name.startswith('results:') or not value:
+                continue
+            status = name[len('results:'):]
+            count = int(value)
+            statuses[status] = count
+            
+            # Same groups as the results filter (ERROR_STATUS_SQL / WARNING_STATUS_SQL)
+            lowered = status.lower()
+            if status == 'success':
+                stats['success'] += count
+            if 'warning' in lowered:
+                stats['warning'] += count
+            if 'error' in lowered or status in ('Blocked', 'No Schema') or status.startswith('HTTP '):
+                stats['error'] += count
+            if status == 'No Schema':
+                stats['no_schema'] += count
+            if status.startswith('HTTP '):
+                stats['http_status'] += count
+        
+        schema_found = int(counters.get('schema_found', 0))
+        stats.update({
+            'statuses': statuses,
+            'schema_found': schema_found,
+            'avg_score': round(counters.get('score_sum', 0) / total, 1) if total else 0,
+            'success_rate': round((stats['success'] / total) * 100, 1) if total else 0,
+            'schema_rate': round((schema_found / total) * 100, 1) if total else 0
+        })
+        return stats
+    
+    def _merge_duplicate_urls(self, cursor: sqlite3.Cursor):
+        """Fold duplicate (project_id, url) rows into the oldest one, keeping their results."""
+        cursor.execute('''
+            SELECT MIN(id) AS keep_id, GROUP_CONCAT(id) AS ids
+            FROM urls GROUP BY project_id, url HAVING COUNT(*) > 1
+        ''')
         
-        # Don't create default project - let users start fresh
+        duplicates = cursor.fetchall()
+        # Whichever tables reference urls at this point in the migration history
+        children = self._referencing_tables(cursor, 'urls')
+        
+        for row in duplicates:
+            keep_id = row['keep_id']
+            extra_ids = [int(url_id) for url_id in row['ids'].split(',') if int(url_id) != keep_id]
+            placeholders = ','.join('?' * len(extra_ids))
+            for table, column in children:
+                cursor.execute(f'UPDATE OR IGNORE {table} SET {column} = ? WHERE {column} IN ({placeholders})',
+                               [keep_id] + extra_ids)
+            cursor.execute(f'DELETE FROM urls WHERE id IN ({placeholders})', extra_ids)
+    
+    @staticmethod
+    def _insert(cursor: sqlite3.Cursor, sql: str, values) -> int:
+        """Run an INSERT and return the new row's id."""
+        cursor.execute(sql, values)
+        return cursor.lastrowid
+    
+    def _default_project_id(self, cursor: sqlite3.Cursor) -> Optional[int]:
+        """ID of the project URLs go to when none is given (the newest one)."""
+        cursor.execute('SELECT id FROM projects ORDER BY created_date DESC LIMIT 1')
+        row = cursor.fetchone()
+        return row['id'] if row else None
     
     # Project operations
     def create_project(self, name: str, description: str = "", settings: Dict = None) -> int:
@@ -119,12 +875,11 @@ class Database:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
+        project_id = self._insert(cursor, '''
             INSERT INTO projects (name, description, created_date, settings_json)
             VALUES (?, ?, ?, ?)
         ''', (name, description, datetime.now().isoformat(), json.dumps(settings or {})))
         
-        project_id = cursor.lastrowid
         conn.commit()
         conn.close()
         return project_id
@@ -177,21 +932,32 @@ class Database:
         conn.close()
     
     def delete_project(self, project_id: int):
-        """Delete project and all associated data."""
+        """Delete project and all associated data, in one transaction."""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        # First delete all URLs for this project
-        cursor.execute('DELETE FROM urls WHERE project_id = ?', (project_id,))
+        # Dependents are removed explicitly, as in bulk_delete_urls
+        conn.execute('PRAGMA foreign_keys = OFF')
+        try:
+            self._delete_project_rows(cursor, project_id)
+            conn.commit()
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.execute('PRAGMA foreign_keys = ON')
+            conn.close()
+        
+        self.prune_schema_blobs()
+    
+    def _delete_project_rows(self, cursor: sqlite3.Cursor, project_id: int):
+        """Delete a project's URLs, its runs and their dependent rows, then the project, set-based."""
+        self._delete_selected_urls(cursor, None, {'project_id': project_id})
         
-        # Delete all validation runs for this project (this will cascade to results)
+        runs = 'SELECT id FROM validation_runs WHERE project_id = ?'
+        for table, column in self._referencing_tables(cursor, 'validation_runs'):
+            cursor.execute(f'DELETE FROM {table} WHERE {column} IN ({runs})', (project_id,))
         cursor.execute('DELETE FROM validation_runs WHERE project_id = ?', (project_id,))
-        
-        # Finally delete the project
         cursor.execute('DELETE FROM projects WHERE id = ?', (project_id,))
-        
-        conn.commit()
-        conn.close()
     
     # URL operations
     def add_url(self, url: str, project_id: int = None, tags: str = "", notes: str = "", status: str = "active") -> int:
@@ -201,19 +967,60 @@ class Database:
         
         # Use first project if none specified
         if project_id is None:
-            projects = self.get_projects()
-            project_id = projects[0]['id'] if projects else None
+            project_id = self._default_project_id(cursor)
         
-        cursor.execute('''
+        url_id = self._insert(cursor, '''
             INSERT INTO urls (project_id, url, added_date, status, tags, notes)
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (project_id, url, datetime.now().isoformat(), status, tags, notes))
         
-        url_id = cursor.lastrowid
         conn.commit()
         conn.close()
         return url_id
     
+    def add_urls_bulk(self, urls: Iterable[str], project_id: int = None, status: str = "active",
+                      tags: str = "", notes: str = "") -> Dict:
+        """
+        Insert many URLs in one transaction, skipping any already in the project.
+        Returns added and duplicate counts.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        # Use first project if none specified
+        if project_id is None:
+            project_id = self._default_project_id(cursor)
+        
+        now = datetime.now().isoformat()
+        rows = [(project_id, url, now, status, tags, notes) for url in urls]
+        
+        try:
+            # rowcount, unlike total_changes, leaves out rows written by triggers
+            cursor.executemany('''
+                INSERT OR IGNORE INTO urls (project_id, url, added_date, status, tags, notes)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+            added = cursor.rowcount
+            conn.commit()
+        finally:
+            conn.close()
+        
+        return {'added_count': added, 'duplicate_count': len(rows) - added}
+    
+    def find_url(self, url: str, project_id: int = None) -> Optional[Dict]:
+        """Look up a URL in a project through the (project_id, url) index."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        if project_id is None:
+            cursor.execute('SELECT * FROM urls WHERE project_id IS NULL AND url = ?', (url,))
+        else:
+            cursor.execute('SELECT * FROM urls WHERE project_id = ? AND url = ?', (project_id, url))
+        row = cursor.fetchone()
+        conn.close()
+        
+        return dict(row) if row else None
+    
     def get_urls(self, project_id: int = None, status: str = None) -> List[Dict]:
         """Get URLs, optionally filtered by project and status."""
         conn = self.get_connection()
@@ -241,6 +1048,106 @@ class Database:
         
         return [dict(row) for row in rows]
     
+    def ingest_urls(self, project_id: int, entries: Iterable, status: str = "active",
+                    tags: str = "", batch_size: int = 1000) -> Dict:
+        """
+        Stream (url, lastmod) entries into a project in bulk batches.
+        
+        A Bloom filter seeded from the project's existing URLs screens each
+        entry; only possible duplicates are confirmed against the database.
+        Existing URLs whose lastmod changed get it updated.
+        
+        Each batch is committed as it fills. If reading `entries` fails
+        partway, the error is raised with `ingested` set to the counts of what
+        was imported before it.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT COUNT(*) FROM urls WHERE project_id = ?', (project_id,))
+        existing_count = cursor.fetchone()[0]
+        seen = BloomFilter(capacity=max(100000, existing_count * 2))
+        for row in conn.execute('SELECT url FROM urls WHERE project_id = ?', (project_id,)):
+            seen.add(row['url'])
+        
+        stats = {'seen': 0, 'added': 0, 'duplicates': 0, 'lastmod_updated': 0}
+        new_rows = []
+        candidates = {}
+        
+        def flush():
+            now = datetime.now().isoformat()
+            # Rows another import added meanwhile are ignored; rowcount leaves them out
+            cursor.executemany('''
+                INSERT OR IGNORE INTO urls (project_id, url, added_date, status, tags, notes, lastmod)
+                VALUES (?, ?, ?, ?, ?, '', ?)
+            ''', [(project_id, url, now, status, tags, lastmod) for url, lastmod in new_rows])
+            added = max(cursor.rowcount, 0) if new_rows else 0
+            stats['added'] += added
+            stats['duplicates'] += len(new_rows) - added
+            new_rows.clear()
+            
+            # Confirm Bloom hits against the database
+            existing = {}
+            pending = list(candidates)
+            for i in range(0, len(pending), 500):
+                chunk = pending[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                cursor.execute(
+                    f'SELECT id, url, lastmod FROM urls WHERE project_id = ? AND url IN ({placeholders})',
+                    [project_id] + chunk
+                )
+                for row in cursor.fetchall():
+                    existing[row['url']] = row
+            
+            lastmod_updates = []
+            false_positives = []
+            for url, lastmod in candidates.items():
+                row = existing.get(url)
+                if row is None:
+                    false_positives.append((project_id, url, now, status, tags, lastmod))
+                    continue
+                stats['duplicates'] += 1
+                if lastmod and lastmod != row['lastmod']:
+                    lastmod_updates.append((lastmod, row['id']))
+            
+            cursor.executemany('''
+                INSERT OR IGNORE INTO urls (project_id, url, added_date, status, tags, notes, lastmod)
+                VALUES (?, ?, ?, ?, ?, '', ?)
+            ''', false_positives)
+            added = max(cursor.rowcount, 0) if false_positives else 0
+            stats['added'] += added
+            stats['duplicates'] += len(false_positives) - added
+            cursor.executemany('UPDATE urls SET lastmod = ? WHERE id = ?', lastmod_updates)
+            stats['lastmod_updated'] += len(lastmod_updates)
+            candidates.clear()
+            conn.commit()
+        
+        try:
+            for url, lastmod in entries:
+                stats['seen'] += 1
+                if url in seen:
+                    if url in candidates:
+                        stats['duplicates'] += 1
+                    candidates[url] = lastmod
+                else:
+                    seen.add(url)
+                    new_rows.append((url, lastmod))
+                
+                if len(new_rows) + len(candidates) >= batch_size:
+                    flush()
+            flush()
+        except Exception as e:
+            e.ingested = dict(stats)
+            raise
+        finally:
+            conn.close()
+        
+        return stats
+    
+    def get_changed_urls(self, project_id: int) -> List[Dict]:
+        """Get active URLs never validated or whose sitemap lastmod is newer than their last validation."""
+        return self.get_scoped_urls(project_id, {'changed': True})
+    
     def get_url(self, url_id: int) -> Optional[Dict]:
         """Get URL by ID."""
         conn = self.get_connection()
@@ -280,6 +1187,173 @@ class Database:
         
         conn.close()
     
+    def _select_urls(self, cursor: sqlite3.Cursor, url_ids: Optional[List[int]] = None,
+                     filters: Optional[Dict] = None) -> int:
+        """
+        Load the target URLs of a bulk operation into the selected_urls temp
+        table, from an explicit id list or a filter (see URL_FILTERS).
+        Returns the number of URLs selected.
+        """
+        cursor.execute('CREATE TEMP TABLE IF NOT EXISTS selected_urls (id INTEGER PRIMARY KEY)')
+        cursor.execute('DELETE FROM selected_urls')
+        
+        if url_ids is not None:
+            # One JSON parameter instead of an IN list, so there is no variable limit
+            cursor.execute(f'''
+                INSERT INTO selected_urls (id)
+                SELECT id FROM urls WHERE id IN ({self.ID_LIST_SQL})
+            ''', (json.dumps([int(url_id) for url_id in url_ids]),))
+            return cursor.rowcount
+        
+        filters = filters or {}
+        unknown = set(filters) - set(self.URL_FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown URL filter: {', '.join(sorted(unknown))}")
+        conditions, values = self._url_filter(**filters)
+        if not conditions:
+            raise ValueError('A URL filter needs at least one condition')
+        
+        cursor.execute(f'''
+            INSERT INTO selected_urls (id)
+            SELECT u.id FROM urls u LEFT JOIN url_latest_result lr ON lr.url_id = u.id
+            WHERE {' AND '.join(conditions)}
+        ''', values)
+        return cursor.rowcount
+    
+    # A JSON array parameter as a one-column subquery of integers or of strings
+    ID_LIST_SQL = 'SELECT CAST(value AS INTEGER) FROM json_each(?)'
+    TEXT_LIST_SQL = 'SELECT value FROM json_each(?)'
+    
+    @staticmethod
+    def _pause_triggers(cursor: sqlite3.Cursor, *names: str):
+        """Pause the named per-row triggers until the end of the current transaction."""
+        cursor.executemany('INSERT OR IGNORE INTO trigger_pauses (name) VALUES (?)', [(name,) for name in names])
+    
+    @staticmethod
+    def _resume_triggers(cursor: sqlite3.Cursor):
+        cursor.execute('DELETE FROM trigger_pauses')
+    
+    @staticmethod
+    def _adjust_url_counters(cursor: sqlite3.Cursor, sign: int):
+        """Add (1) or remove (-1) the selected URLs' contribution to the project URL counters."""
+        cursor.execute('''
+            SELECT COALESCE(u.project_id, 0) AS project_id, COALESCE(u.status, '') AS status, COUNT(*) AS count
+            FROM selected_urls s JOIN urls u ON u.id = s.id
+            GROUP BY 1, 2
+        ''')
+        deltas = Counter()
+        for row in cursor.fetchall():
+            deltas[(row['project_id'], 'urls')] += sign * row['count']
+            deltas[(row['project_id'], 'urls:' + row['status'])] += sign * row['count']
+        
+        # In key order, so concurrent writers lock counter rows in the same order
+        cursor.executemany('''
+            INSERT INTO counters (scope, scope_id, name, value) VALUES ('project', ?, ?, ?)
+            ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = counters.value + excluded.value
+        ''', [(project_id, name, value) for (project_id, name), value in sorted(deltas.items())])
+    
+    # A URL's tags joined back into the urls.tags string
+    TAG_LIST_SQL = "GROUP_CONCAT(t.name, ', ')"
+    
+    def _apply_tag_changes(self, cursor: sqlite3.Cursor, replace: Optional[List[str]],
+                           add: List[str], remove: List[str]):
+        """
+        Replace, add and remove tags on the selected URLs with set-based
+        statements on url_tags, then rewrite their tags strings from it.
+        """
+        cursor.execute('CREATE TEMP TABLE IF NOT EXISTS touched_urls (id INTEGER PRIMARY KEY)')
+        cursor.execute('DELETE FROM touched_urls')
+        
+        new_tags = (replace or []) + add
+        if new_tags:
+            cursor.executemany('INSERT OR IGNORE INTO tags (name) VALUES (?)', [(tag,) for tag in new_tags])
+        
+        if replace is not None:
+            cursor.execute('INSERT INTO touched_urls (id) SELECT id FROM selected_urls')
+            cursor.execute('DELETE FROM url_tags WHERE url_id IN (SELECT id FROM selected_urls)')
+            add = new_tags
+        
+        if add:
+            cursor.execute(f'''
+                INSERT OR IGNORE INTO touched_urls (id)
+                SELECT s.id FROM selected_urls s
+                WHERE EXISTS (
+                    SELECT 1 FROM tags t WHERE t.name IN ({self.TEXT_LIST_SQL})
+                      AND NOT EXISTS (SELECT 1 FROM url_tags WHERE url_id = s.id AND tag_id = t.id)
+                )
+            ''', (json.dumps(add),))
+            cursor.execute(f'''
+                INSERT OR IGNORE INTO url_tags (url_id, tag_id)
+                SELECT s.id, t.id FROM selected_urls s
+                JOIN tags t ON t.name IN ({self.TEXT_LIST_SQL})
+            ''', (json.dumps(add),))
+        
+        if remove:
+            cursor.execute(f'''
+                INSERT OR IGNORE INTO touched_urls (id)
+                SELECT DISTINCT ut.url_id FROM url_tags ut JOIN selected_urls s ON s.id = ut.url_id
+                WHERE ut.tag_id IN (SELECT id FROM tags WHERE name IN ({self.TEXT_LIST_SQL}))
+            ''', (json.dumps(remove),))
+            cursor.execute(f'''
+                DELETE FROM url_tags
+                WHERE url_id IN (SELECT id FROM selected_urls)
+                  AND tag_id IN (SELECT id FROM tags WHERE name IN ({self.TEXT_LIST_SQL}))
+            ''', (json.dumps(remove),))
+        
+        # url_tags is already current, so the string rewrite doesn't need the sync trigger
+        self._pause_triggers(cursor, 'url_tags')
+        cursor.execute(f'''
+            UPDATE urls SET tags = COALESCE((
+                SELECT {self.TAG_LIST_SQL} FROM url_tags ut JOIN tags t ON t.id = ut.tag_id
+                WHERE ut.url_id = urls.id
+            ), '')
+            WHERE id IN (SELECT id FROM touched_urls)
+        ''')
+        cursor.execute('DELETE FROM touched_urls')
+    
+    def bulk_update_urls(self, url_ids: Optional[List[int]] = None, filters: Optional[Dict] = None,
+                         status: str = None, tags: str = None, notes: str = None,
+                         add_tags: List[str] = None, remove_tags: List[str] = None) -> int:
+        """
+        Update many URLs, chosen by id list or filter, with set-based statements
+        in one transaction. `tags` replaces the tag set; `add_tags` and
+        `remove_tags` edit it. Returns the number of URLs selected.
+        """
+        add_tags = self.split_tags(add_tags)
+        remove_tags = self.split_tags(remove_tags)
+        replace_tags = self.split_tags(tags) if tags is not None else None
+        
+        if status is None and notes is None and replace_tags is None and not (add_tags or remove_tags):
+            return 0
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            count = self._select_urls(cursor, url_ids, filters)
+            
+            if status is not None:
+                self._pause_triggers(cursor, 'url_counters')
+                self._adjust_url_counters(cursor, -1)
+                cursor.execute('UPDATE urls SET status = ? WHERE id IN (SELECT id FROM selected_urls)', (status,))
+                self._adjust_url_counters(cursor, 1)
+            if notes is not None:
+                cursor.execute('UPDATE urls SET notes = ? WHERE id IN (SELECT id FROM selected_urls)', (notes,))
+            if replace_tags is not None or add_tags or remove_tags:
+                self._apply_tag_changes(cursor, replace_tags, add_tags, remove_tags)
+            
+            self._resume_triggers(cursor)
+            cursor.execute('DELETE FROM selected_urls')
+            conn.commit()
+        finally:
+            conn.close()
+        
+        return count
+    
+    def update_url_tags(self, url_ids: List[int], add: List[str] = None, remove: List[str] = None) -> int:
+        """Add and remove tags on many URLs in one transaction. Returns the number of URLs selected."""
+        return self.bulk_update_urls(url_ids, add_tags=add, remove_tags=remove)
+    
     def delete_url(self, url_id: int):
         """Delete URL."""
         conn = self.get_connection()
@@ -288,17 +1362,66 @@ class Database:
         conn.commit()
         conn.close()
     
-    def bulk_delete_urls(self, url_ids: List[int]):
-        """Delete multiple URLs."""
-        if not url_ids:
-            return
+    def bulk_delete_urls(self, url_ids: Optional[List[int]] = None, filters: Optional[Dict] = None) -> int:
+        """
+        Delete many URLs, chosen by id list or filter, in one transaction.
+        Dependent rows are deleted table by table, set-based, before the URLs
+        themselves rather than by a per-row cascade. Returns the number deleted.
+        """
+        if url_ids is not None and not url_ids:
+            return 0
         
         conn = self.get_connection()
         cursor = conn.cursor()
-        placeholders = ','.join('?' * len(url_ids))
-        cursor.execute(f'DELETE FROM urls WHERE id IN ({placeholders})', url_ids)
-        conn.commit()
-        conn.close()
+        
+        # Dependents are removed explicitly below, so skip the per-row cascade checks.
+        # The pragma only takes effect outside a transaction.
+        conn.execute('PRAGMA foreign_keys = OFF')
+        try:
+            deleted = self._delete_selected_urls(cursor, url_ids, filters)
+            conn.commit()
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.execute('PRAGMA foreign_keys = ON')
+            conn.close()
+        
+        return deleted
+    
+    def _delete_selected_urls(self, cursor: sqlite3.Cursor, url_ids: Optional[List[int]],
+                              filters: Optional[Dict]) -> int:
+        """Select URLs and delete them and their dependent rows, table by table. Returns the number deleted."""
+        self._select_urls(cursor, url_ids, filters)
+        self._pause_triggers(cursor, 'url_counters')
+        self._adjust_url_counters(cursor, -1)
+        
+        # Latest rows go first so deleting results doesn't recompute them
+        children = [(table, column) for table, column in self._referencing_tables(cursor, 'urls')
+                    if table != 'url_latest_result']
+        cursor.execute('DELETE FROM url_latest_result WHERE url_id IN (SELECT id FROM selected_urls)')
+        for table, column in children:
+            cursor.execute(f'DELETE FROM {table} WHERE {column} IN (SELECT id FROM selected_urls)')
+        
+        cursor.execute('DELETE FROM urls WHERE id IN (SELECT id FROM selected_urls)')
+        deleted = cursor.rowcount
+        self._resume_triggers(cursor)
+        cursor.execute('DELETE FROM selected_urls')
+        return deleted
+    
+    @staticmethod
+    def _foreign_keys(cursor: sqlite3.Cursor) -> List[tuple]:
+        """(table, column, parent, parent_column, without_rowid) for every foreign key in the schema."""
+        cursor.execute('''
+            SELECT m.name, fk."from", fk."table", COALESCE(fk."to", 'rowid'),
+                   instr(upper(m.sql), 'WITHOUT ROWID') > 0
+            FROM sqlite_master m, pragma_foreign_key_list(m.name) fk
+            WHERE m.type = 'table'
+        ''')
+        return [tuple(row) for row in cursor.fetchall()]
+    
+    def _referencing_tables(self, cursor: sqlite3.Cursor, parent: str) -> List[tuple]:
+        """(table, column) pairs with a foreign key to `parent`."""
+        return [(table, column) for table, column, target, _, _ in self._foreign_keys(cursor) if target == parent]
     
     # Validation run operations
     def create_validation_run(self, project_id: int = None, total_urls: int = 0, settings: Dict = None) -> int:
@@ -306,12 +1429,11 @@ class Database:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
+        run_id = self._insert(cursor, '''
             INSERT INTO validation_runs (project_id, start_time, status, total_urls, settings_snapshot)
             VALUES (?, ?, 'running', ?, ?)
         ''', (project_id, datetime.now().isoformat(), total_urls, json.dumps(settings or {})))
         
-        run_id = cursor.lastrowid
         conn.commit()
         conn.close()
         return run_id
@@ -373,12 +1495,342 @@ class Database:
         
         conn.close()
     
-    # Validation result operations
-    def add_validation_result(self, run_id: int, url_id: int, result: Dict) -> int:
-        """Add a validation result."""
+    def set_validation_run_paused(self, run_id: int, paused: bool) -> bool:
+        """
+        Record a pause or resume in one conditional statement, like
+        finish_validation_run: a run that has already finished keeps its final
+        state. Returns False if it had.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "UPDATE validation_runs SET status = ? WHERE id = ? AND status IN ('running', 'paused')",
+            ('paused' if paused else 'running', run_id)
+        )
+        
+        updated = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        return updated
+    
+    def finish_validation_run(self, run_id: int, status: str, processed_urls: int = None) -> bool:
+        """
+        Record a run's final state in one conditional statement.
+        
+        Only a run that is still running or paused transitions, so a stop
+        recorded by a control handler is never overwritten by the engine's
+        own completion (and vice versa). Returns True if this call won.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            UPDATE validation_runs
+            SET status = ?, end_time = ?, processed_urls = COALESCE(?, processed_urls)
+            WHERE id = ? AND status IN ('running', 'paused')
+        ''', (status, datetime.now().isoformat(), processed_urls, run_id))
+        
+        finished = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        return finished
+    
+    def get_url_history(self, project_id: int) -> Dict[int, Dict]:
+        """Get average response time and last validation time per URL in a project."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT vr.url_id,
+                   AVG(CASE WHEN vr.response_time > 0 THEN vr.response_time END) AS avg_response_time,
+                   MAX(vr.validated_at) AS last_validated_at
+            FROM (
+                SELECT url_id, response_time, validated_at FROM validation_results
+                UNION ALL
+                SELECT url_id, response_time, validated_at FROM url_score_history h WHERE NOT EXISTS (
+                    SELECT 1 FROM validation_results r WHERE r.run_id = h.run_id AND r.url_id = h.url_id
+                )
+            ) vr
+            JOIN urls u ON vr.url_id = u.id
+            WHERE u.project_id = ?
+            GROUP BY vr.url_id
+        ''', (project_id,))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return {row['url_id']: dict(row) for row in rows}
+    
+    def get_skipped_url_ids(self, project_id: int) -> set:
+        """Get IDs of URLs skipped by the project's budgeted runs and not yet revisited."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT s.url_id FROM url_skips s
+            JOIN urls u ON s.url_id = u.id
+            WHERE u.project_id = ?
+        ''', (project_id,))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return {row['url_id'] for row in rows}
+    
+    def record_run_coverage(self, run_id: int, coverage: Dict, processed_ids: List[int], skipped_ids: List[int]):
+        """Store a budgeted run's coverage report and carry its skipped URLs forward."""
         conn = self.get_connection()
         cursor = conn.cursor()
+        now = datetime.now().isoformat()
         
+        cursor.executemany('DELETE FROM url_skips WHERE url_id = ?', [(url_id,) for url_id in processed_ids])
+        cursor.executemany('''
+            INSERT INTO url_skips (url_id, run_id, skipped_at) VALUES (?, ?, ?)
+            ON CONFLICT (url_id) DO UPDATE SET run_id = excluded.run_id, skipped_at = excluded.skipped_at
+        ''', [(url_id, run_id, now) for url_id in skipped_ids])
+        cursor.execute('UPDATE validation_runs SET coverage_json = ? WHERE id = ?', (json.dumps(coverage), run_id))
+        
+        conn.commit()
+        conn.close()
+    
+    # Schema blob store
+    @staticmethod
+    def _encode_schema(schema_data) -> Optional[tuple]:
+        """
+        Canonicalize, hash and compress schema data.
+        Returns a schema_blobs row (hash, data, raw_size, stored_size, created_at),
+        or None when there is no schema to store.
+        """
+        if not schema_data:
+            return None
+        
+        canonical = json.dumps(schema_data, sort_keys=True, separators=(',', ':'),
+                               ensure_ascii=False).encode('utf-8')
+        data = zlib.compress(canonical, 6)
+        return (hashlib.sha256(canonical).hexdigest(), data, len(canonical), len(data),
+                datetime.now().isoformat())
+    
+    @staticmethod
+    def _decode_schema(value):
+        """Decode schema data from a compressed blob or a legacy inline JSON string."""
+        if isinstance(value, bytes):
+            value = zlib.decompress(value)
+        return json.loads(value)
+    
+    def _store_blobs(self, cursor: sqlite3.Cursor, blobs: List[tuple], schema: str = '') -> int:
+        """Insert blobs not already stored. Returns the number of new blobs."""
+        # In hash order, so concurrent writers lock rows in the same order
+        blobs = sorted(blob for blob in blobs if blob)
+        if not blobs:
+            return 0
+        cursor.executemany(f'''
+            INSERT OR IGNORE INTO {schema}schema_blobs (hash, data, raw_size, stored_size, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', blobs)
+        return cursor.rowcount
+    
+    def migrate_schema_blobs(self, batch_size: int = 1000, vacuum: bool = False) -> Dict:
+        """
+        Move inline schema_data into the blob store, in batches of `batch_size`
+        results per transaction. Safe to interrupt and re-run.
+        """
+        report = {'migrated_rows': 0, 'moved_bytes': 0, 'new_blobs': 0}
+        last_id = 0
+        
+        while True:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, schema_data FROM validation_results
+                WHERE id > ? AND schema_hash IS NULL AND schema_data IS NOT NULL
+                ORDER BY id LIMIT ?
+            ''', (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                conn.close()
+                break
+            
+            blobs = []
+            updates = []
+            for row in rows:
+                try:
+                    blob = self._encode_schema(json.loads(row['schema_data']))
+                except (json.JSONDecodeError, TypeError):
+                    continue  # Leave unreadable rows untouched
+                blobs.append(blob)
+                updates.append((blob[0] if blob else None, row['id']))
+                report['moved_bytes'] += len(row['schema_data'].encode('utf-8'))
+            
+            report['new_blobs'] += self._store_blobs(cursor, blobs)
+            cursor.executemany(
+                'UPDATE validation_results SET schema_hash = ?, schema_data = NULL WHERE id = ?',
+                updates
+            )
+            conn.commit()
+            conn.close()
+            
+            report['migrated_rows'] += len(updates)
+            last_id = rows[-1]['id']
+        
+        if vacuum:
+            self.vacuum()
+        
+        report.update(self.get_schema_storage_stats())
+        return report
+    
+    def get_schema_storage_stats(self) -> Dict:
+        """Space used by schema data versus what inline storage would take."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT COUNT(*), COALESCE(SUM(stored_size), 0), COALESCE(SUM(raw_size), 0) FROM schema_blobs')
+        blob_count, stored_bytes, unique_raw_bytes = cursor.fetchone()
+        
+        cursor.execute('''
+            SELECT COUNT(*), COALESCE(SUM(sb.raw_size), 0)
+            FROM validation_results vr JOIN schema_blobs sb ON sb.hash = vr.schema_hash
+        ''')
+        referencing_results, referenced_raw_bytes = cursor.fetchone()
+        
+        cursor.execute('SELECT COUNT(*), COALESCE(SUM(LENGTH(schema_data)), 0) FROM validation_results '
+                       'WHERE schema_hash IS NULL AND schema_data IS NOT NULL')
+        inline_results, inline_bytes = cursor.fetchone()
+        conn.close()
+        
+        return {
+            'blobs': blob_count,
+            'results_using_blobs': referencing_results,
+            'results_inline': inline_results,
+            'inline_bytes': inline_bytes,
+            'unique_raw_bytes': unique_raw_bytes,
+            'stored_bytes': stored_bytes,
+            'uncompressed_bytes': referenced_raw_bytes,
+            'bytes_saved': referenced_raw_bytes - stored_bytes,
+            'dedupe_ratio': round(referenced_raw_bytes / unique_raw_bytes, 2) if unique_raw_bytes else 0,
+            'compression_ratio': round(unique_raw_bytes / stored_bytes, 2) if stored_bytes else 0
+        }
+    
+    def prune_schema_blobs(self) -> int:
+        """Delete blobs no result references any more. Returns the number removed."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            DELETE FROM schema_blobs WHERE NOT EXISTS (
+                SELECT 1 FROM validation_results vr WHERE vr.schema_hash = schema_blobs.hash
+            )
+        ''')
+        removed = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return removed
+    
+    def collect_orphans(self, batch_size: int = 5000, pause: float = 0.05,
+                        should_stop=None) -> Dict[str, int]:
+        """
+        Delete rows whose parent no longer exists: leftovers from before foreign
+        keys were enforced, plus unused tags, stale counters and unreferenced
+        blobs. Each table is walked in rowid windows of `batch_size`, one short
+        transaction per window with `pause` seconds after any window that
+        deleted rows, so the app's writers are never held up for long.
+        Returns rows removed per table.
+        """
+        removed = Counter()
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            for table, column, parent, parent_column, without_rowid in self._orphan_checks(cursor):
+                orphan = (f'{column} IS NOT NULL AND NOT EXISTS '
+                          f'(SELECT 1 FROM {parent} p WHERE p.{parent_column} = {table}.{column})')
+                if without_rowid:
+                    statements = self._orphan_batches_by_value(cursor, table, column, orphan, batch_size)
+                else:
+                    statements = self._orphan_batches_by_rowid(cursor, table, orphan, batch_size)
+                
+                for sql, params in statements:
+                    if should_stop and should_stop():
+                        return dict(removed)
+                    cursor.execute(sql, params)
+                    deleted = cursor.rowcount
+                    conn.commit()
+                    if deleted:
+                        removed[table] += deleted
+                        time.sleep(pause)
+            
+            while True:
+                cursor.execute('''
+                    DELETE FROM tags WHERE id IN (
+                        SELECT id FROM tags t WHERE NOT EXISTS (SELECT 1 FROM url_tags WHERE tag_id = t.id)
+                        LIMIT ?
+                    )
+                ''', (batch_size,))
+                deleted = cursor.rowcount
+                conn.commit()
+                if not deleted:
+                    break
+                removed['tags'] += deleted
+            
+            cursor.execute('''
+                DELETE FROM counters
+                WHERE (scope = 'run' AND scope_id NOT IN (SELECT id FROM validation_runs))
+                   OR (scope = 'project' AND scope_id <> 0 AND scope_id NOT IN (SELECT id FROM projects))
+            ''')
+            removed['counters'] += cursor.rowcount
+            conn.commit()
+        finally:
+            conn.close()
+        
+        removed['schema_blobs'] += self.prune_schema_blobs()
+        return {table: count for table, count in removed.items() if count}
+    
+    def _orphan_checks(self, cursor: sqlite3.Cursor) -> List[tuple]:
+        """Foreign keys to check for dangling rows, which rows written before they were enforced may have."""
+        return self._foreign_keys(cursor)
+    
+    @staticmethod
+    def _orphan_batches_by_rowid(cursor: sqlite3.Cursor, table: str, orphan: str, batch_size: int):
+        """Yield DELETE statements covering `table` one rowid window at a time."""
+        last = 0
+        while True:
+            cursor.execute(
+                f'SELECT MAX(rowid) FROM (SELECT rowid FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?)',
+                (last, batch_size)
+            )
+            upper = cursor.fetchone()[0]
+            if upper is None:
+                return
+            yield (f'DELETE FROM {table} WHERE rowid > ? AND rowid <= ? AND {orphan}', (last, upper))
+            last = upper
+    
+    def _orphan_batches_by_value(self, cursor: sqlite3.Cursor, table: str, column: str, orphan: str,
+                                 batch_size: int):
+        """Yield DELETE statements for WITHOUT ROWID tables, a batch of missing parent ids at a time."""
+        while True:
+            cursor.execute(f'SELECT DISTINCT {column} FROM {table} WHERE {orphan} LIMIT ?', (batch_size,))
+            values = [row[0] for row in cursor.fetchall()]
+            if not values:
+                return
+            yield (f'DELETE FROM {table} WHERE {column} IN ({self.ID_LIST_SQL})', (json.dumps(values),))
+    
+    # Validation result operations
+    def _attach_runs(self, cursor: sqlite3.Cursor, run_ids: Iterable[int]) -> Dict[int, str]:
+        """
+        Make runs' results readable on the cursor's connection. Returns, per run,
+        the schema prefix its validation_results and schema_blobs tables live
+        under: '' while every run's results are in the main database.
+        """
+        return {run_id: '' for run_id in run_ids}
+    
+    def _result_schema(self, cursor: sqlite3.Cursor, result_id: int) -> Optional[str]:
+        """Schema prefix of the validation_results table holding a result, or None when it's gone."""
+        return ''
+    
+    def _result_values(self, run_id: int, url_id: int, result: Dict) -> tuple:
+        """
+        Build the validation_results row for an engine result.
+        Returns (row, blob) where blob is the schema_blobs row or None.
+        """
         # Handle different result structures
         status = result.get('status', 'error')
         schema_data = result.get('schema_data', {})
@@ -388,7 +1840,7 @@ class Database:
         validation = result.get('validation', {})
         if isinstance(validation, dict):
             score = validation.get('score', 0.0)
-            errors = validation.get('errors', [])
+            errors = list(validation.get('errors', []))
             warnings = validation.get('warnings', [])
         else:
             score = 0.0
@@ -402,28 +1854,67 @@ class Database:
         # Check if result has warnings
         has_warnings = result.get('has_warnings', False) or (len(warnings) > 0)
         
-        cursor.execute('''
-            INSERT INTO validation_results 
-            (run_id, url_id, status, schema_data, errors, warnings, score, validated_at, response_time, has_warnings)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        blob = self._encode_schema(schema_data)
+        
+        return (
             run_id,
             url_id,
             status,
-            json.dumps(schema_data),
+            blob[0] if blob else None,
             json.dumps(errors),
             json.dumps(warnings),
             score,
             datetime.now().isoformat(),
             response_time,
             has_warnings
-        ))
+        ), blob
+    
+    def add_validation_result(self, run_id: int, url_id: int, result: Dict) -> int:
+        """Add a validation result."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        row, blob = self._result_values(run_id, url_id, result)
+        self._store_blobs(cursor, [blob])
+        result_id = self._insert(cursor, '''
+            INSERT INTO validation_results 
+            (run_id, url_id, status, schema_hash, errors, warnings, score, validated_at, response_time, has_warnings)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', row)
         
-        result_id = cursor.lastrowid
         conn.commit()
         conn.close()
         return result_id
     
+    def write_results_batch(self, results: List[tuple], progress: Dict[int, int] = None):
+        """
+        Insert many (run_id, url_id, result) tuples and apply processed_urls
+        updates for their runs in a single transaction.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            self._write_results(cursor, results, progress)
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def _write_results(self, cursor: sqlite3.Cursor, results: List[tuple], progress: Optional[Dict[int, int]]):
+        """write_results_batch's statements, in the caller's transaction."""
+        values = [self._result_values(run_id, url_id, result) for run_id, url_id, result in results]
+        self._store_blobs(cursor, [blob for _, blob in values])
+        cursor.executemany('''
+            INSERT INTO validation_results 
+            (run_id, url_id, status, schema_hash, errors, warnings, score, validated_at, response_time, has_warnings)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [row for row, _ in values])
+        
+        cursor.executemany(
+            'UPDATE validation_runs SET processed_urls = MAX(processed_urls, ?) WHERE id = ?',
+            [(processed, run_id) for run_id, processed in (progress or {}).items()]
+        )
+    
     def delete_validation_run(self, run_id: int):
         """Delete a validation run and all its results."""
         conn = self.get_connection()
@@ -437,16 +1928,20 @@ class Database:
         
         conn.commit()
         conn.close()
+        
+        self.prune_schema_blobs()
     
     def get_validation_results(self, run_id: int) -> List[Dict]:
         """Get validation results for a run."""
         conn = self.get_connection()
         cursor = conn.cursor()
+        schema = self._attach_runs(cursor, [run_id])[run_id]
         
-        cursor.execute('''
-            SELECT vr.*, u.url, u.project_id
-            FROM validation_results vr
+        cursor.execute(f'''
+            SELECT vr.*, u.url, u.project_id, sb.data AS schema_blob
+            FROM {schema}validation_results vr
             JOIN urls u ON vr.url_id = u.id
+            LEFT JOIN {schema}schema_blobs sb ON sb.hash = vr.schema_hash
             WHERE vr.run_id = ?
             ORDER BY vr.validated_at DESC
         ''', (run_id,))
@@ -454,31 +1949,33 @@ class Database:
         rows = cursor.fetchall()
         conn.close()
         
-        results = []
-        for row in rows:
-            result_dict = dict(row)
-            # Parse JSON fields
-            if result_dict.get('schema_data'):
-                result_dict['schema_data'] = json.loads(result_dict['schema_data'])
-            
+        return [self._decode_result(dict(row)) for row in rows]
+    
+    def _decode_result(self, result_dict: Dict) -> Dict:
+        """Decode the JSON columns present in a validation_results row."""
+        # Parse JSON fields; schema data lives in the blob store unless it predates it
+        blob = result_dict.pop('schema_blob', None)
+        if blob is not None:
+            result_dict['schema_data'] = blob
+        if result_dict.get('schema_data'):
+            result_dict['schema_data'] = self._decode_schema(result_dict['schema_data'])
+        
+        if 'errors' in result_dict or 'warnings' in result_dict:
             # Handle errors and warnings
             errors = []
             warnings = []
             
             if result_dict.get('errors'):
                 try:
-                    errors = json.loads(result_dict['errors'])
-                except (json.JSONDecodeError, TypeError):
+                    error_data = json.loads(result_dict['errors'])
                     # Handle old format where errors was a dict with errors and warnings
-                    try:
-                        error_data = json.loads(result_dict['errors'])
-                        if isinstance(error_data, dict):
-                            errors = error_data.get('errors', [])
-                            warnings = error_data.get('warnings', [])
-                        else:
-                            errors = error_data
-                    except (json.JSONDecodeError, TypeError):
-                        errors = []
+                    if isinstance(error_data, dict):
+                        errors = error_data.get('errors', [])
+                        warnings = error_data.get('warnings', [])
+                    else:
+                        errors = error_data
+                except (json.JSONDecodeError, TypeError):
+                    errors = []
             
             if result_dict.get('warnings'):
                 try:
@@ -491,11 +1988,824 @@ class Database:
                 'warnings': warnings,
                 'score': result_dict.get('score', 0.0)
             }
+        
+        # Ensure has_warnings is a boolean
+        if 'has_warnings' in result_dict:
+            result_dict['has_warnings'] = bool(result_dict['has_warnings'])
+        
+        return result_dict
+    
+    # Paginated queries
+    URL_SORTS = {'added_date': 'u.added_date', 'url': 'u.url', 'status': 'u.status',
+                 'last_score': 'COALESCE(lr.score, -1)', 'last_validated_at': "COALESCE(lr.validated_at, '')"}
+    RESULT_SORTS = {
+        'validated_at': 'vr.validated_at',
+        'score': 'vr.score',
+        'response_time': 'vr.response_time',
+        'status': 'vr.status',
+    }
+    # Result columns a row can hold NULL in (written by older versions, or with the value missing)
+    NULLABLE_RESULT_SORTS = {'vr.score', 'vr.response_time'}
+    RESULT_FIELDS = {
+        'id': 'vr.id', 'run_id': 'vr.run_id', 'url_id': 'vr.url_id', 'url': 'u.url',
+        'project_id': 'u.project_id', 'status': 'vr.status', 'score': 'vr.score',
+        'validated_at': 'vr.validated_at', 'response_time': 'vr.response_time',
+        'has_warnings': 'vr.has_warnings', 'errors': 'vr.errors', 'warnings': 'vr.warnings',
+        'schema_data': 'COALESCE(sb.data, vr.schema_data)',
+    }
+    DEFAULT_RESULT_FIELDS = [name for name in RESULT_FIELDS if name != 'schema_data']
+    
+    # Status groups used by the results filter
+    ERROR_STATUS_SQL = ("({0} LIKE '%error%' OR {0} IN ('Blocked', 'No Schema') "
+                        "OR {0} LIKE 'HTTP %')")
+    WARNING_STATUS_SQL = "{0} LIKE '%warning%'"
+    
+    @staticmethod
+    def encode_cursor(sort_value, row_id: int) -> str:
+        """Opaque keyset cursor for the row after which the next page starts."""
+        return base64.urlsafe_b64encode(json.dumps([sort_value, row_id]).encode()).decode()
+    
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple:
+        """Decode a keyset cursor into (sort_value, row_id)."""
+        try:
+            sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return sort_value, int(row_id)
+        except (ValueError, TypeError):
+            raise ValueError('Invalid cursor')
+    
+    def _page(self, cursor: sqlite3.Cursor, select: str, conditions: List[str], values: List,
+              sort_column: str, id_column: str, order: str, page_cursor: Optional[str],
+              limit: int, nullable: bool = False) -> Dict:
+        """
+        Run a keyset-paginated query ordered by (sort_column, id_column).
+        The total match count is only computed for the first page. If
+        `nullable`, rows whose sort value is NULL come last in either order
+        (a row comparison with NULL would drop or repeat them across pages).
+        """
+        direction = 'ASC' if order == 'asc' else 'DESC'
+        comparison = '>' if direction == 'ASC' else '<'
+        
+        conditions = list(conditions)
+        values = list(values)
+        
+        total = None
+        if not page_cursor:
+            # Count matches once, on the first page only
+            from_clause = select[select.index(' FROM '):]
+            where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+            cursor.execute(f'SELECT COUNT(*){from_clause}{where}', values)
+            total = cursor.fetchone()[0]
+        
+        if page_cursor:
+            sort_value, row_id = self.decode_cursor(page_cursor)
+            if sort_value is None and nullable:
+                # Into the NULLs, which follow every other value
+                conditions.append(f'({sort_column} IS NULL AND {id_column} {comparison} ?)')
+                values.append(row_id)
+            elif nullable:
+                conditions.append(f'({sort_column} IS NULL OR ({sort_column}, {id_column}) {comparison} (?, ?))')
+                values.extend([sort_value, row_id])
+            else:
+                conditions.append(f'({sort_column}, {id_column}) {comparison} (?, ?)')
+                values.extend([sort_value, row_id])
+        
+        query = select
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        nulls_last = f'{sort_column} IS NULL, ' if nullable else ''
+        query += f' ORDER BY {nulls_last}{sort_column} {direction}, {id_column} {direction} LIMIT ?'
+        values.append(limit + 1)
+        
+        cursor.execute(query, values)
+        rows = [dict(row) for row in cursor.fetchall()]
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = self.encode_cursor(last['_sort'], last['_id'])
+        
+        for row in rows:
+            row.pop('_sort', None)
+            row.pop('_id', None)
+        
+        return {'items': rows, 'next_cursor': next_cursor, 'total': total}
+    
+    def query_urls(self, project_id: int = None, status: str = None, search: str = None,
+                   tag: str = None, health: str = None, sort: str = 'added_date', order: str = 'desc',
+                   cursor: str = None, limit: int = 100) -> Dict:
+        """
+        Get one page of URLs with server-side filtering and sorting.
+        Each URL carries its latest result (last_status, last_score, ...);
+        `health` filters on it: 'success', 'warning', 'error' or 'never'.
+        """
+        sort_column = self.URL_SORTS.get(sort, self.URL_SORTS['added_date'])
+        conditions, values = self._url_filter(project_id, status, search, tag, health)
+        
+        conn = self.get_connection()
+        try:
+            return self._page(
+                conn.cursor(),
+                f'''SELECT u.*, lr.status AS last_status, lr.score AS last_score,
+                           lr.validated_at AS last_validated_at, lr.result_id AS last_result_id,
+                           {sort_column} AS _sort, u.id AS _id
+                    FROM urls u LEFT JOIN url_latest_result lr ON lr.url_id = u.id''',
+                conditions, values, sort_column, 'u.id', order, cursor, limit
+            )
+        finally:
+            conn.close()
+    
+    URL_FILTERS = ('project_id', 'status', 'search', 'tag', 'health', 'q')
+    
+    def _url_filter(self, project_id: int = None, status: str = None, search: str = None,
+                    tag: str = None, health: str = None, q: str = None) -> tuple:
+        """
+        SQL conditions and values on urls (u) joined to url_latest_result (lr).
+        `q` is a full-text query (see parse_search), matched but not ranked.
+        """
+        conditions = []
+        values = []
+        
+        if project_id is not None:
+            conditions.append('u.project_id = ?')
+            values.append(project_id)
+        if status:
+            conditions.append('u.status = ?')
+            values.append(status)
+        if search:
+            conditions.append("u.url LIKE ? ESCAPE '\\'")
+            values.append(f'%{self._escape_like(search)}%')
+        if tag:
+            conditions.append(self._tag_condition([tag]))
+            values.append(tag.strip())
+        if health:
+            conditions.append(self._health_condition(health))
+        if q:
+            terms = self.parse_search(q)
+            if not any(terms.values()):
+                raise ValueError('Search query has no words to match')
+            self._search_conditions(terms, 'u.id', 'lr.result_id', conditions, values)
+        
+        return conditions, values
+    
+    @staticmethod
+    def _tag_condition(tags: List[str]) -> str:
+        """SQL condition on urls (aliased u) matching any of the tags, driven by idx_url_tags_tag."""
+        placeholders = ','.join('?' * len(tags))
+        return f'''u.id IN (SELECT ut.url_id FROM tags t JOIN url_tags ut ON ut.tag_id = t.id
+                                WHERE t.name IN ({placeholders}))'''
+    
+    def get_tag_facets(self, project_id: int = None, status: str = None, limit: int = 100) -> List[Dict]:
+        """Tags with the number of URLs carrying each, most used first."""
+        conditions = []
+        values = []
+        if project_id is not None:
+            conditions.append('u.project_id = ?')
+            values.append(project_id)
+        if status:
+            conditions.append('u.status = ?')
+            values.append(status)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            SELECT t.name AS tag, COUNT(*) AS count
+            FROM url_tags ut
+            JOIN tags t ON t.id = ut.tag_id
+            JOIN urls u ON u.id = ut.url_id
+            {where}
+            GROUP BY t.id
+            ORDER BY count DESC, t.name
+            LIMIT ?
+        ''', values + [limit])
+        
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    
+    def _health_condition(self, health: str) -> str:
+        """SQL condition on url_latest_result (aliased lr) for a health group."""
+        if health == 'never':
+            return 'lr.url_id IS NULL'
+        if health == 'blocked':
+            return "lr.status = 'Blocked'"
+        if health == 'error':
+            return self.ERROR_STATUS_SQL.format('lr.status')
+        if health == 'warning':
+            return self.WARNING_STATUS_SQL.format('lr.status')
+        if health == 'success':
+            return "lr.status = 'success'"
+        raise ValueError(f'Invalid health filter: {health}')
+    
+    def get_project_health(self, project_id: int) -> Dict[str, int]:
+        """Count a project's URLs by the status of their latest result."""
+        warning = self._health_condition('warning')
+        error = self._health_condition('error')
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            SELECT COUNT(*) AS total,
+                   SUM(CASE WHEN lr.url_id IS NULL THEN 1 ELSE 0 END) AS never,
+                   SUM(CASE WHEN lr.status = 'success' THEN 1 ELSE 0 END) AS success,
+                   SUM(CASE WHEN {warning} THEN 1 ELSE 0 END) AS warning,
+                   SUM(CASE WHEN {error} THEN 1 ELSE 0 END) AS error
+            FROM urls u LEFT JOIN url_latest_result lr ON lr.url_id = u.id
+            WHERE u.project_id = ?
+        ''', (project_id,))
+        health = {key: value or 0 for key, value in dict(cursor.fetchone()).items()}
+        conn.close()
+        return health
+    
+    def get_failed_urls(self, project_id: int) -> List[Dict]:
+        """Active URLs whose latest result is an error, blocked or unreachable."""
+        return self.get_scoped_urls(project_id, {'last_status': ['error']})
+    
+    # Case-sensitive glob match ('*', '?', '[...]') of a column against a parameter
+    GLOB_SQL = '{0} GLOB ?'
+    
+    @staticmethod
+    def _glob_pattern(pattern: str) -> str:
+        """The parameter GLOB_SQL takes for a glob pattern."""
+        return pattern
+    
+    def get_scoped_urls(self, project_id: int, scope: Dict) -> List[Dict]:
+        """
+        Active URLs of a project matching a run scope (see normalize_run_scope).
+        Latest-result criteria are answered from url_latest_result, not from the
+        results history.
+        """
+        scope = self.normalize_run_scope(scope)
+        conditions = ['u.project_id = ?', "u.status = 'active'"]
+        values = [project_id]
+        joins = ['LEFT JOIN url_latest_result lr ON lr.url_id = u.id']
+        
+        if scope.get('last_status'):
+            groups = [self._health_condition(status) for status in scope['last_status']]
+            conditions.append('(' + ' OR '.join(groups) + ')')
+        if scope.get('finding'):
+            # Warnings aren't kept on the latest row; read them from its result
+            joins.append('LEFT JOIN validation_results vr ON vr.id = lr.result_id')
+            conditions.append("(lr.errors LIKE ? ESCAPE '\\' OR vr.warnings LIKE ? ESCAPE '\\')")
+            pattern = f"%{self._escape_like(scope['finding'])}%"
+            values.extend([pattern, pattern])
+        if scope.get('tags'):
+            conditions.append(self._tag_condition(scope['tags']))
+            values.extend(scope['tags'])
+        if 'stale_days' in scope:
+            cutoff = (datetime.now() - timedelta(days=scope['stale_days'])).isoformat()
+            conditions.append('(lr.validated_at IS NULL OR lr.validated_at < ?)')
+            values.append(cutoff)
+        if scope.get('url_pattern'):
+            conditions.append(self.GLOB_SQL.format('u.url'))
+            values.append(self._glob_pattern(scope['url_pattern']))
+        if scope.get('changed'):
+            conditions.append('(lr.validated_at IS NULL OR (u.lastmod IS NOT NULL AND u.lastmod > lr.validated_at))')
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            SELECT u.* FROM urls u
+            {' '.join(joins)}
+            WHERE {' AND '.join(conditions)}
+            ORDER BY u.added_date DESC
+        ''', values)
+        
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    
+    def query_validation_results(self, run_id: int, status: str = None, has_warnings: bool = None,
+                                 min_score: float = None, max_score: float = None,
+                                 search: str = None, tag: str = None, sort: str = 'validated_at',
+                                 order: str = 'desc', cursor: str = None, limit: int = 100,
+                                 fields: Optional[List[str]] = None) -> Dict:
+        """
+        Get one page of a run's results with server-side filtering and sorting.
+        
+        `fields` projects the returned columns; schema_data is only read and
+        decoded when it is explicitly requested.
+        """
+        sort_column = self.RESULT_SORTS.get(sort, self.RESULT_SORTS['validated_at'])
+        fields = [name for name in (fields or self.DEFAULT_RESULT_FIELDS) if name in self.RESULT_FIELDS]
+        if 'id' not in fields:
+            fields.insert(0, 'id')
+        
+        conditions, values = self._result_filter(run_id, status, has_warnings, min_score, max_score,
+                                                 search, tag)
+        
+        columns = ', '.join(f'{self.RESULT_FIELDS[name]} AS {name}' for name in fields)
+        conn = self.get_connection()
+        try:
+            schema = self._attach_runs(conn.cursor(), [run_id])[run_id]
+            page = self._page(
+                conn.cursor(),
+                f'''SELECT {columns}, {sort_column} AS _sort, vr.id AS _id
+                    FROM {schema}validation_results vr JOIN urls u ON vr.url_id = u.id
+                    LEFT JOIN {schema}schema_blobs sb ON sb.hash = vr.schema_hash''',
+                conditions, values, sort_column, 'vr.id', order, cursor, limit,
+                nullable=sort_column in self.NULLABLE_RESULT_SORTS
+            )
+        finally:
+            conn.close()
+        
+        page['items'] = [self._decode_result(item) for item in page['items']]
+        return page
+    
+    def _result_filter(self, run_id: int, status: str = None, has_warnings: bool = None,
+                       min_score: float = None, max_score: float = None, search: str = None,
+                       tag: str = None) -> tuple:
+        """SQL conditions and values on a run's validation_results (vr) joined to urls (u)."""
+        conditions = ['vr.run_id = ?']
+        values = [run_id]
+        
+        if status == 'error':
+            conditions.append(self.ERROR_STATUS_SQL.format('vr.status'))
+        elif status == 'warning':
+            conditions.append(self.WARNING_STATUS_SQL.format('vr.status'))
+        elif status:
+            conditions.append('vr.status = ?')
+            values.append(status)
+        if has_warnings is not None:
+            conditions.append('vr.has_warnings = ?')
+            values.append(bool(has_warnings))
+        if min_score is not None:
+            conditions.append('vr.score >= ?')
+            values.append(min_score)
+        if max_score is not None:
+            conditions.append('vr.score <= ?')
+            values.append(max_score)
+        if search:
+            conditions.append("u.url LIKE ? ESCAPE '\\'")
+            values.append(f'%{self._escape_like(search)}%')
+        if tag:
+            conditions.append(self._tag_condition([tag]))
+            values.append(tag.strip())
+        
+        return conditions, values
+    
+    # Full-text search
+    def search_urls(self, q: str, project_id: int = None, status: str = None, tag: str = None,
+                    health: str = None, cursor: str = None, limit: int = 100) -> Dict:
+        """
+        Get one page of URLs matching a full-text query (see parse_search), best
+        matches first. Bare terms match the URL, its tags and notes; `errors:`,
+        `warnings:` and `findings:` terms match its latest result's findings.
+        Items are those of query_urls plus their `rank` (lower is better).
+        """
+        terms = self.parse_search(q)
+        if not any(terms.values()):
+            return {'items': [], 'next_cursor': None, 'total': 0}
+        
+        conditions, values = self._url_filter(project_id, status, None, tag, health)
+        if terms['url']:
+            # Rank by the URL's own text; findings terms only filter
+            source, source_values = self._search_source('url', terms['url'])
+            joins = f'''{source} s CROSS JOIN urls u
+                        LEFT JOIN url_latest_result lr ON lr.url_id = u.id'''
+            conditions.insert(0, 'u.id = s.id')
+            self._search_conditions({'findings': terms['findings']}, 'u.id', 'lr.result_id',
+                                    conditions, values)
+        else:
+            # Matching findings of any run, kept when they're their URL's latest result;
+            # every join is a primary key lookup from the match
+            source, source_values = self._search_source('findings', terms['findings'])
+            joins = f'''{source} s CROSS JOIN validation_results vr
+                        JOIN url_latest_result lr ON lr.url_id = vr.url_id AND lr.result_id = vr.id
+                        JOIN urls u ON u.id = lr.url_id'''
+            conditions.insert(0, 'vr.id = s.id')
+        
+        conn = self.get_connection()
+        try:
+            return self._page(
+                conn.cursor(),
+                f'''SELECT u.*, lr.status AS last_status, lr.score AS last_score,
+                           lr.validated_at AS last_validated_at, lr.result_id AS last_result_id,
+                           s.rank AS rank, s.rank AS _sort, u.id AS _id
+                    FROM {joins}''',
+                conditions, source_values + values, 's.rank', 'u.id', 'asc', cursor, limit
+            )
+        finally:
+            conn.close()
+    
+    def search_results(self, run_id: int, q: str, status: str = None, has_warnings: bool = None,
+                       min_score: float = None, max_score: float = None, tag: str = None,
+                       cursor: str = None, limit: int = 100, fields: Optional[List[str]] = None) -> Dict:
+        """
+        Get one page of a run's results matching a full-text query (see
+        parse_search), best matches first. Bare terms match the findings
+        (errors and warnings); `url:`, `tags:` and `notes:` terms match the
+        result's URL. Items are those of query_validation_results plus `rank`.
+        """
+        terms = self.parse_search(q, default='findings')
+        if not any(terms.values()):
+            return {'items': [], 'next_cursor': None, 'total': 0}
+        
+        fields = [name for name in (fields or self.DEFAULT_RESULT_FIELDS) if name in self.RESULT_FIELDS]
+        if 'id' not in fields:
+            fields.insert(0, 'id')
+        
+        conditions, values = self._result_filter(run_id, status, has_warnings, min_score, max_score,
+                                                 None, tag)
+        columns = ', '.join(f'{self.RESULT_FIELDS[name]} AS {name}' for name in fields)
+        conn = self.get_connection()
+        try:
+            schema = self._attach_runs(conn.cursor(), [run_id])[run_id]
+            if terms['findings']:
+                source, source_values = self._search_source('findings', terms['findings'], run_id, schema)
+                conditions.insert(0, 'vr.id = s.id')
+                self._search_conditions({'url': terms['url']}, 'u.id', 'vr.id', conditions, values)
+            else:
+                source, source_values = self._search_source('url', terms['url'])
+                conditions.insert(0, 'vr.url_id = s.id')
+            
+            page = self._page(
+                conn.cursor(),
+                f'''SELECT {columns}, s.rank AS rank, s.rank AS _sort, vr.id AS _id
+                    FROM {source} s CROSS JOIN {schema}validation_results vr JOIN urls u ON vr.url_id = u.id
+                    LEFT JOIN {schema}schema_blobs sb ON sb.hash = vr.schema_hash''',
+                conditions, source_values + values, 's.rank', 'vr.id', 'asc', cursor, limit
+            )
+        finally:
+            conn.close()
+        
+        page['items'] = [self._decode_result(item) for item in page['items']]
+        return page
+    
+    def _search_conditions(self, terms: Dict[str, List[tuple]], url_id: str, result_id: str,
+                           conditions: List[str], values: List):
+        """Append unranked match conditions for parsed terms on a URL id and a result id column."""
+        for index, column in (('url', url_id), ('findings', result_id)):
+            if terms.get(index):
+                source, source_values = self._search_source(index, terms[index])
+                conditions.append(f'{column} IN (SELECT id FROM {source} s)')
+                values.extend(source_values)
+    
+    SEARCH_INDEXES = {'url': 'urls_fts', 'findings': 'findings_fts'}
+    
+    def _search_source(self, index: str, terms: List[tuple], run_id: int = None, schema: str = '') -> tuple:
+        """
+        A subquery of (id, rank) rows matching parsed terms in one search index,
+        lower rank first, and its values. Ids are urls.id or validation_results.id;
+        `schema` prefixes the index of a run whose results live outside main.
+        
+        Searches select FROM it CROSS JOIN the table it keys into, with the join
+        condition in WHERE: that keeps SQLite walking the matches and looking rows
+        up, instead of probing the full-text index once per row of a filtered scan.
+        """
+        table = self.SEARCH_INDEXES[index]
+        expressions = []
+        for field, words, prefix in terms:
+            phrase = '"' + ' '.join(words) + '"' + ('*' if prefix else '')
+            if field:
+                phrase = f'{field} : {phrase}'
+            elif index == 'findings':
+                phrase = '{errors warnings} : ' + phrase
+            expressions.append(phrase)
+        if run_id is not None:
+            expressions.append(f'run_id : "{int(run_id)}"')
+        
+        return f'(SELECT rowid AS id, rank FROM {schema}{table} WHERE {table} MATCH ?)', [' AND '.join(expressions)]
+    
+    def get_validation_result(self, result_id: int) -> Optional[Dict]:
+        """Get a single validation result with all its columns decoded."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        schema = self._result_schema(cursor, result_id)
+        if schema is None:
+            conn.close()
+            return None
+        
+        cursor.execute(f'''
+            SELECT vr.*, u.url, u.project_id, sb.data AS schema_blob
+            FROM {schema}validation_results vr
+            JOIN urls u ON vr.url_id = u.id
+            LEFT JOIN {schema}schema_blobs sb ON sb.hash = vr.schema_hash
+            WHERE vr.id = ?
+        ''', (result_id,))
+        
+        row = cursor.fetchone()
+        conn.close()
+        
+        return self._decode_result(dict(row)) if row else None
+    
+    def get_results_summary(self, run_id: int) -> Dict:
+        """Status counts (from the counters table) and error/warning breakdown for a run."""
+        summary = self._compacted_summary(run_id)
+        if summary:
+            return summary
+        
+        summary = self.get_run_stats(run_id)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        schema = self._attach_runs(cursor, [run_id])[run_id]
+        
+        # Error/warning breakdown; only the light columns are read, never schema_data
+        error_counts = Counter()
+        warning_counts = Counter()
+        cursor.execute(f'''
+            SELECT status, errors, warnings FROM {schema}validation_results
+            WHERE run_id = ? AND (status = 'Blocked' OR status LIKE '%error%' OR status LIKE '%warning%')
+        ''', (run_id,))
+        for row in cursor:
+            result = self._decode_result(dict(row))
+            status = result['status']
+            validation = result['validation']
             
-            # Ensure has_warnings is a boolean
-            result_dict['has_warnings'] = bool(result_dict.get('has_warnings', False))
+            if status == 'Blocked':
+                error_counts['Blocked/Crawler Timeout'] += 1
+            elif 'error' in status.lower():
+                if status.startswith('HTTP '):
+                    error_counts[status] += 1
+                else:
+                    error_counts.update(validation['errors'] or ['Validation Error'])
             
-            results.append(result_dict)
+            if 'warning' in status.lower():
+                warning_counts.update(validation['warnings'] or ['Validation Warning'])
         
-        return results
-
+        def breakdown(counts):
+            return [{
+                'type': name,
+                'count': count,
+                'percentage': round(count / summary['total'] * 100, 1) if summary['total'] else 0.0
+            } for name, count in counts.most_common()]
+        
+        summary['error_details'] = breakdown(error_counts)
+        summary['warning_details'] = breakdown(warning_counts)
+        
+        conn.close()
+        return summary
+    
+    # Run-to-run diffs
+    DIFF_CHANGES = ('new_url', 'missing', 'unreachable', 'recovered', 'regressed', 'improved',
+                    'status_changed', 'unchanged')
+    DIFF_SORTS = {'url_id': 'd.url_id', 'score_delta': 'd.score_delta', 'url': 'd.url'}
+    UNREACHABLE_SQL = "({0} = 'Blocked' OR {0} = 'error' OR {0} LIKE 'HTTP %')"
+    ERROR_LIST_SQL = ("CASE WHEN json_valid({0}) THEN "
+                      "CASE WHEN json_type({0}) = 'array' THEN {0} ELSE '[]' END ELSE '[]' END")
+    
+    def _run_diff_sql(self, base_run_id: int, run_id: int, schemas: Optional[Dict[int, str]] = None) -> tuple:
+        """
+        SQL for a per-URL diff of two runs, one row per URL in either run.
+        Each run contributes its latest result per URL, or its score history
+        for URLs whose results were compacted away (a compaction in progress
+        has both); rows are paired on url_id via idx_results_run_url.
+        `schemas` comes from _attach_runs for both runs.
+        """
+        schemas = schemas or {}
+        
+        def run_rows(alias, run):
+            schema = schemas.get(run, '')
+            return f'''{alias} AS (
+                SELECT url_id, status, score, errors FROM {schema}validation_results
+                WHERE id IN (SELECT MAX(id) FROM {schema}validation_results WHERE run_id = ? GROUP BY url_id)
+                UNION ALL
+                SELECT url_id, status, score, NULL FROM url_score_history h WHERE run_id = ? AND NOT EXISTS (
+                    SELECT 1 FROM {schema}validation_results r WHERE r.run_id = h.run_id AND r.url_id = h.url_id
+                )
+            )'''
+        
+        errors_a = self.ERROR_LIST_SQL.format('p.errors_a')
+        errors_b = self.ERROR_LIST_SQL.format('p.errors_b')
+        unreachable_a = self.UNREACHABLE_SQL.format('p.status_a')
+        unreachable_b = self.UNREACHABLE_SQL.format('p.status_b')
+        
+        sql = f'''
+            WITH {run_rows('a', base_run_id)}, {run_rows('b', run_id)},
+            pairs AS (
+                SELECT b.url_id, a.status AS status_a, b.status AS status_b, a.score AS score_a,
+                       b.score AS score_b, a.errors AS errors_a, b.errors AS errors_b,
+                       a.url_id IS NOT NULL AS in_a, 1 AS in_b
+                FROM b LEFT JOIN a ON a.url_id = b.url_id
+                UNION ALL
+                SELECT a.url_id, a.status, NULL, a.score, NULL, a.errors, NULL, 1, 0
+                FROM a WHERE NOT EXISTS (SELECT 1 FROM b WHERE b.url_id = a.url_id)
+            ),
+            compared AS (
+                SELECT p.*,
+                       CASE WHEN p.errors_a IS NULL OR p.errors_b IS NULL OR p.errors_a = p.errors_b THEN '[]' ELSE (
+                           SELECT json_group_array(value) FROM json_each({errors_b})
+                           WHERE value NOT IN (SELECT value FROM json_each({errors_a}))
+                       ) END AS new_errors,
+                       CASE WHEN p.errors_a IS NULL OR p.errors_b IS NULL OR p.errors_a = p.errors_b THEN '[]' ELSE (
+                           SELECT json_group_array(value) FROM json_each({errors_a})
+                           WHERE value NOT IN (SELECT value FROM json_each({errors_b}))
+                       ) END AS resolved_errors
+                FROM pairs p
+            )
+            SELECT p.url_id, u.url, p.status_a, p.status_b, p.score_a, p.score_b,
+                   ROUND(COALESCE(p.score_b, 0) - COALESCE(p.score_a, 0), 1) AS score_delta,
+                   p.new_errors, p.resolved_errors,
+                   CASE
+                       WHEN NOT p.in_a THEN 'new_url'
+                       WHEN NOT p.in_b THEN 'missing'
+                       WHEN {unreachable_b} AND NOT {unreachable_a} THEN 'unreachable'
+                       WHEN {unreachable_a} AND NOT {unreachable_b} THEN 'recovered'
+                       WHEN json_array_length(p.new_errors) > 0 OR p.score_b < p.score_a THEN 'regressed'
+                       WHEN json_array_length(p.resolved_errors) > 0 OR p.score_b > p.score_a THEN 'improved'
+                       WHEN p.status_a IS NOT p.status_b THEN 'status_changed'
+                       ELSE 'unchanged'
+                   END AS change
+            FROM compared p JOIN urls u ON u.id = p.url_id
+        '''
+        return sql, [base_run_id, base_run_id, run_id, run_id]
+    
+    def diff_validation_runs(self, base_run_id: int, run_id: int, changes: Optional[List[str]] = None,
+                             sort: str = 'url_id', order: str = 'asc', cursor: str = None,
+                             limit: int = 100) -> Dict:
+        """
+        Compare `run_id` against `base_run_id` in a single SQL pass.
+        
+        Each row carries both statuses and scores, the score delta, errors new
+        in `run_id`, errors it resolved, and a `change` category (see
+        DIFF_CHANGES). `changes` filters categories; by default unchanged URLs
+        are left out. Keyset-paginated like query_validation_results.
+        """
+        sort_column = self.DIFF_SORTS.get(sort, self.DIFF_SORTS['url_id'])
+        changes = [change for change in (changes or []) if change in self.DIFF_CHANGES]
+        
+        conn = self.get_connection()
+        try:
+            schemas = self._attach_runs(conn.cursor(), [base_run_id, run_id])
+            diff_sql, values = self._run_diff_sql(base_run_id, run_id, schemas)
+            if changes:
+                conditions = [f"d.change IN ({','.join('?' * len(changes))})"]
+                values = values + changes
+            else:
+                conditions = ["d.change != 'unchanged'"]
+            
+            page = self._page(
+                conn.cursor(),
+                f'SELECT d.*, {sort_column} AS _sort, d.url_id AS _id FROM ({diff_sql}) d',
+                conditions, values, sort_column, 'd.url_id', order, cursor, limit
+            )
+        finally:
+            conn.close()
+        
+        for item in page['items']:
+            item['new_errors'] = json.loads(item['new_errors'] or '[]')
+            item['resolved_errors'] = json.loads(item['resolved_errors'] or '[]')
+        return page
+    
+    def get_run_diff_summary(self, base_run_id: int, run_id: int) -> Dict[str, int]:
+        """Number of URLs in each change category between two runs."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        diff_sql, values = self._run_diff_sql(base_run_id, run_id, self._attach_runs(cursor, [base_run_id, run_id]))
+        cursor.execute(f'SELECT d.change, COUNT(*) AS count FROM ({diff_sql}) d GROUP BY d.change', values)
+        counts = {row['change']: row['count'] for row in cursor.fetchall()}
+        conn.close()
+        
+        return {change: counts.get(change, 0) for change in self.DIFF_CHANGES}
+    
+    @staticmethod
+    def _escape_like(text: str) -> str:
+        """Escape LIKE wildcards in user input."""
+        return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    
+    # Retention and compaction
+    def get_retention_policies(self) -> Dict[int, int]:
+        """Projects with a retention policy, as {project_id: full runs to keep}."""
+        policies = {}
+        for project in self.get_projects():
+            try:
+                keep_runs = int(json.loads(project.get('settings_json') or '{}').get('retention_runs') or 0)
+            except (ValueError, TypeError):
+                continue
+            if keep_runs > 0:
+                policies[project['id']] = keep_runs
+        return policies
+    
+    def get_runs_to_compact(self, project_id: int, keep_runs: int) -> List[int]:
+        """Finished runs older than the project's newest `keep_runs` that still hold full results."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT id FROM validation_runs
+            WHERE project_id = ? AND compacted_at IS NULL
+              AND status NOT IN ('running', 'paused', 'pending')
+              AND id NOT IN (
+                  SELECT id FROM validation_runs WHERE project_id = ?
+                  ORDER BY start_time DESC, id DESC LIMIT ?
+              )
+            ORDER BY id
+        ''', (project_id, project_id, keep_runs))
+        
+        run_ids = [row['id'] for row in cursor.fetchall()]
+        conn.close()
+        return run_ids
+    
+    def compact_validation_run(self, run_id: int, batch_size: int = 5000) -> int:
+        """
+        Replace a run's results with a summary row and per-URL score history.
+        
+        The summary and history are written first, in one transaction, then
+        results are deleted in batches so writers are never blocked for long.
+        Interrupted compactions resume where they stopped. Returns the number
+        of results removed.
+        """
+        self._write_compacted_summary(run_id)
+        
+        removed = 0
+        while True:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute('''
+                DELETE FROM validation_results WHERE id IN (
+                    SELECT id FROM validation_results WHERE run_id = ? LIMIT ?
+                )
+            ''', (run_id, batch_size))
+            deleted = cursor.rowcount
+            if deleted == 0:
+                cursor.execute('UPDATE validation_runs SET compacted_at = ? WHERE id = ?',
+                               (datetime.now().isoformat(), run_id))
+            conn.commit()
+            conn.close()
+            
+            if deleted == 0:
+                return removed
+            removed += deleted
+    
+    def _write_compacted_summary(self, run_id: int):
+        """Store a run's summary and per-URL score history, unless an earlier compaction already did."""
+        if self._compacted_summary(run_id) is not None:
+            return
+        summary = self.get_results_summary(run_id)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        schema = self._attach_runs(cursor, [run_id])[run_id]
+        cursor.execute(f'''
+            INSERT INTO url_score_history (url_id, run_id, status, score, response_time, validated_at)
+            SELECT url_id, run_id, status, score, response_time, validated_at
+            FROM {schema}validation_results
+            WHERE id IN (SELECT MAX(id) FROM {schema}validation_results WHERE run_id = ? GROUP BY url_id)
+              AND url_id IN (SELECT id FROM urls)
+            ON CONFLICT (url_id, run_id) DO UPDATE SET
+                status = excluded.status, score = excluded.score,
+                response_time = excluded.response_time, validated_at = excluded.validated_at
+        ''', (run_id,))
+        cursor.execute('UPDATE validation_runs SET summary_json = ? WHERE id = ?',
+                       (json.dumps(summary), run_id))
+        conn.commit()
+        conn.close()
+    
+    def _compacted_summary(self, run_id: int) -> Optional[Dict]:
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT summary_json FROM validation_runs WHERE id = ?', (run_id,))
+        row = cursor.fetchone()
+        conn.close()
+        
+        if row and row['summary_json']:
+            return json.loads(row['summary_json'])
+        return None
+    
+    def get_url_score_history(self, url_id: int, limit: int = 100) -> List[Dict]:
+        """Score history for a URL across full and compacted runs, newest first."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT run_id, status, score, response_time, validated_at FROM validation_results WHERE url_id = ?
+            UNION ALL
+            SELECT run_id, status, score, response_time, validated_at FROM url_score_history h
+            WHERE url_id = ? AND NOT EXISTS (
+                SELECT 1 FROM validation_results r WHERE r.run_id = h.run_id AND r.url_id = h.url_id
+            )
+            ORDER BY validated_at DESC LIMIT ?
+        ''', (url_id, url_id, limit))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    
+    def incremental_vacuum(self, pages: int = 2000) -> int:
+        """
+        Return up to `pages` free pages to the filesystem.
+        Only effective once the database uses auto_vacuum=INCREMENTAL (see vacuum()).
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('PRAGMA freelist_count')
+        before = cursor.fetchone()[0]
+        # executescript steps the pragma to completion; execute() frees a single page
+        conn.executescript(f'PRAGMA incremental_vacuum({int(pages)});')
+        cursor.execute('PRAGMA freelist_count')
+        after = cursor.fetchone()[0]
+        conn.close()
+        return before - after
+    
+    def vacuum(self):
+        """Rebuild the database file, switching it to incremental auto-vacuum."""
+        conn = self.get_connection()
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+        conn.close()
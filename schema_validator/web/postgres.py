@@ -0,0 +1,766 @@
+"""
+PostgreSQL storage for Schema Validator.
+Lets several web and worker nodes share one store; see open_storage().
+"""
+
+import functools
+import json
+import re
+from typing import Dict, List, Optional
+
+import psycopg
+from psycopg.pq import TransactionStatus
+from psycopg_pool import ConnectionPool
+
+from .database import Database, PooledConnection
+
+
+class Row(tuple):
+    """A result row readable by position or by column name, like sqlite3.Row."""
+    
+    def __new__(cls, values, index: Dict[str, int]):
+        row = super().__new__(cls, values)
+        row._index = index
+        return row
+    
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = self._index[key]
+        return tuple.__getitem__(self, key)
+    
+    def keys(self) -> List[str]:
+        return list(self._index)
+
+
+def row_factory(cursor: psycopg.Cursor):
+    if cursor.description is None:
+        return tuple
+    index = {column.name: position for position, column in enumerate(cursor.description)}
+    return lambda values: Row(values, index)
+
+
+INSERT_OR_IGNORE = re.compile(r'^(\s*)INSERT OR IGNORE INTO', re.IGNORECASE)
+LIKE = re.compile(r'\bLIKE\b')
+
+
+@functools.lru_cache(maxsize=1024)
+def translate(sql: str, placeholders: bool) -> str:
+    """
+    Rewrite a statement from the SQL the shared queries are written in:
+    qmark placeholders, INSERT OR IGNORE, and LIKE (case-insensitive in SQLite).
+    """
+    if placeholders:
+        sql = sql.replace('%', '%%').replace('?', '%s')
+    if INSERT_OR_IGNORE.match(sql):
+        sql = INSERT_OR_IGNORE.sub(r'\1INSERT INTO', sql, count=1).rstrip() + ' ON CONFLICT DO NOTHING'
+    return LIKE.sub('ILIKE', sql)
+
+
+class QmarkCursor(psycopg.Cursor):
+    """A cursor accepting the qmark-style SQL Database's queries use."""
+    
+    def execute(self, query, params=None, **kwargs):
+        return super().execute(translate(query, params is not None), params, **kwargs)
+    
+    def executemany(self, query, params_seq, **kwargs):
+        return super().executemany(translate(query, True), params_seq, **kwargs)
+
+
+class PostgresPool:
+    """psycopg_pool behind the acquire/release interface PooledConnection expects."""
+    
+    def __init__(self, conninfo: str, min_size: int = 2, max_size: int = 16, timeout: float = 30.0):
+        self._pool = ConnectionPool(
+            conninfo, min_size=min(min_size, max_size), max_size=max_size, timeout=timeout,
+            kwargs={'row_factory': row_factory, 'cursor_factory': QmarkCursor},
+            name='schema-validator', open=True
+        )
+    
+    def acquire(self) -> psycopg.Connection:
+        return self._pool.getconn()
+    
+    def release(self, conn: psycopg.Connection):
+        """Return a connection, rolling back anything left uncommitted."""
+        if conn.info.transaction_status != TransactionStatus.IDLE:
+            try:
+                conn.rollback()
+            except psycopg.Error:
+                pass  # putconn discards broken connections
+        self._pool.putconn(conn)
+    
+    def close_all(self):
+        self._pool.close()
+
+
+# Each statement-level trigger sees the rows it touched as transition tables
+NEW_ROWS = 'REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT'
+OLD_ROWS = 'REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT'
+CHANGED_ROWS = 'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT'
+EACH_ROW = 'FOR EACH ROW'
+
+# Key for the advisory lock migrations hold
+SCHEMA_LOCK_ID = 0x5c4e3a
+
+
+class PostgresDatabase(Database):
+    """
+    PostgreSQL database handler for Schema Validator.
+    
+    Runs Database's queries as they are, through QmarkCursor, and overrides
+    the SQLite-specific parts: the schema and its triggers, id generation,
+    JSON functions, trigger pauses and maintenance. Results are ingested with
+    COPY, and the derived-table triggers are statement-level, so each batch
+    updates counters and latest results once rather than once per row.
+    """
+    
+    IntegrityError = psycopg.IntegrityError
+    OperationalError = psycopg.OperationalError
+    
+    def __init__(self, database_url: str, min_connections: int = 2, max_connections: int = 16):
+        self.database_url = database_url
+        self.pool = PostgresPool(database_url, min_connections, max_connections)
+        self.init_database()
+    
+    def get_connection(self) -> psycopg.Connection:
+        """Get a pooled database connection; close() returns it to the pool."""
+        return PooledConnection(self.pool, self.pool.acquire())
+    
+    # Migrations: the same steps as SQLite, versioned in a schema_version table
+    @staticmethod
+    def _schema_version(conn: psycopg.Connection) -> int:
+        if conn.execute("SELECT to_regclass('schema_version')").fetchone()[0] is None:
+            return 0
+        row = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+        return row[0] or 0
+    
+    @staticmethod
+    def _set_schema_version(conn: psycopg.Connection, version: int):
+        conn.execute('DELETE FROM schema_version')
+        conn.execute('INSERT INTO schema_version (version) VALUES (?)', (version,))
+    
+    @staticmethod
+    def _lock_schema(conn: psycopg.Connection):
+        """Start a migration transaction holding the migration lock."""
+        # Released at commit or rollback; nodes starting together wait here
+        conn.execute('SELECT pg_advisory_xact_lock(?)', (SCHEMA_LOCK_ID,))
+        conn.execute('CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)')
+    
+    # PostgreSQL stores are created by this version, so the derived tables
+    # start out empty along with their base tables and need no backfill
+    def _migration_core_tables(self, cursor: psycopg.Cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS projects (
+                id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+                name TEXT NOT NULL,
+                description TEXT,
+                created_date TEXT NOT NULL,
+                settings_json TEXT DEFAULT '{}'
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS urls (
+                id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+                project_id BIGINT,
+                url TEXT NOT NULL,
+                added_date TEXT NOT NULL,
+                status TEXT DEFAULT 'active',
+                tags TEXT DEFAULT '',
+                notes TEXT DEFAULT '',
+                FOREIGN KEY (project_id) REFERENCES projects (id) ON DELETE CASCADE
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS validation_runs (
+                id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+                project_id BIGINT,
+                start_time TEXT NOT NULL,
+                end_time TEXT,
+                status TEXT DEFAULT 'pending',
+                total_urls INTEGER DEFAULT 0,
+                processed_urls INTEGER DEFAULT 0,
+                settings_snapshot TEXT DEFAULT '{}',
+                FOREIGN KEY (project_id) REFERENCES projects (id) ON DELETE CASCADE
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS validation_results (
+                id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+                run_id BIGINT NOT NULL,
+                url_id BIGINT NOT NULL,
+                status TEXT DEFAULT 'pending',
+                schema_data TEXT,
+                errors TEXT,
+                warnings TEXT,
+                score DOUBLE PRECISION DEFAULT 0,
+                validated_at TEXT NOT NULL,
+                response_time DOUBLE PRECISION DEFAULT 0,
+                has_warnings BOOLEAN DEFAULT FALSE,
+                FOREIGN KEY (run_id) REFERENCES validation_runs (id) ON DELETE CASCADE,
+                FOREIGN KEY (url_id) REFERENCES urls (id) ON DELETE CASCADE
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_runs_project ON validation_runs(project_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_results_url ON validation_results(url_id)')
+    
+    def _migration_budgets_and_sitemaps(self, cursor: psycopg.Cursor):
+        cursor.execute('ALTER TABLE validation_runs ADD COLUMN IF NOT EXISTS coverage_json TEXT')
+        cursor.execute('ALTER TABLE urls ADD COLUMN IF NOT EXISTS lastmod TEXT')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS url_skips (
+                url_id BIGINT PRIMARY KEY,
+                run_id BIGINT NOT NULL,
+                skipped_at TEXT NOT NULL,
+                FOREIGN KEY (url_id) REFERENCES urls (id) ON DELETE CASCADE,
+                FOREIGN KEY (run_id) REFERENCES validation_runs (id) ON DELETE CASCADE
+            )
+        ''')
+        # PostgreSQL doesn't index foreign keys itself; cascades from runs need this
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_skips_run ON url_skips(run_id)')
+    
+    def _migration_query_indexes(self, cursor: psycopg.Cursor):
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_urls_project_added ON urls(project_id, added_date)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_urls_project_status ON urls(project_id, status, added_date)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_results_run_validated ON validation_results(run_id, validated_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_results_run_score ON validation_results(run_id, score)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_results_run_status ON validation_results(run_id, status)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_results_run_response ON validation_results(run_id, response_time)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_results_run_url ON validation_results(run_id, url_id)')
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_urls_project_url ON urls(project_id, url)')
+    
+    def _migration_schema_blobs(self, cursor: psycopg.Cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_blobs (
+                hash TEXT PRIMARY KEY,
+                data BYTEA NOT NULL,
+                raw_size INTEGER NOT NULL,
+                stored_size INTEGER NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('ALTER TABLE validation_results ADD COLUMN IF NOT EXISTS schema_hash TEXT')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_results_schema_hash ON validation_results(schema_hash)')
+    
+    def _migration_retention(self, cursor: psycopg.Cursor):
+        cursor.execute('ALTER TABLE validation_runs ADD COLUMN IF NOT EXISTS summary_json TEXT')
+        cursor.execute('ALTER TABLE validation_runs ADD COLUMN IF NOT EXISTS compacted_at TEXT')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS url_score_history (
+                url_id BIGINT NOT NULL,
+                run_id BIGINT NOT NULL,
+                status TEXT,
+                score DOUBLE PRECISION DEFAULT 0,
+                response_time DOUBLE PRECISION DEFAULT 0,
+                validated_at TEXT NOT NULL,
+                PRIMARY KEY (url_id, run_id),
+                FOREIGN KEY (url_id) REFERENCES urls (id) ON DELETE CASCADE,
+                FOREIGN KEY (run_id) REFERENCES validation_runs (id) ON DELETE CASCADE
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_run ON url_score_history(run_id)')
+    
+    def _migration_counters(self, cursor: psycopg.Cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS counters (
+                scope TEXT NOT NULL,
+                scope_id BIGINT NOT NULL,
+                name TEXT NOT NULL,
+                value DOUBLE PRECISION NOT NULL DEFAULT 0,
+                PRIMARY KEY (scope, scope_id, name)
+            )
+        ''')
+        self._create_triggers(cursor, self.COUNTER_TRIGGERS, self._counter_statements())
+    
+    def _migration_latest_results(self, cursor: psycopg.Cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS url_latest_result (
+                url_id BIGINT PRIMARY KEY,
+                result_id BIGINT,
+                run_id BIGINT,
+                status TEXT,
+                score DOUBLE PRECISION,
+                errors TEXT,
+                validated_at TEXT NOT NULL,
+                FOREIGN KEY (url_id) REFERENCES urls (id) ON DELETE CASCADE
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_latest_status ON url_latest_result(status)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_latest_score ON url_latest_result(score)')
+        self._create_triggers(cursor, self.LATEST_RESULT_TRIGGERS, {})
+    
+    def _migration_tags_and_bulk_operations(self, cursor: psycopg.Cursor):
+        # Tag names compare case-insensitively, like SQLite's COLLATE NOCASE,
+        # given a server built with ICU (as the official packages are)
+        try:
+            with cursor.connection.transaction():
+                cursor.execute('''
+                    CREATE COLLATION IF NOT EXISTS nocase (
+                        provider = icu, locale = 'und-u-ks-level2', deterministic = false
+                    )
+                ''')
+            collation = 'nocase'
+        except psycopg.errors.FeatureNotSupported:
+            print("PostgreSQL was built without ICU; tag names will be case-sensitive")
+            collation = '"default"'
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS tags (
+                id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+                name TEXT COLLATE {collation} NOT NULL UNIQUE
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS url_tags (
+                url_id BIGINT NOT NULL,
+                tag_id BIGINT NOT NULL,
+                PRIMARY KEY (url_id, tag_id),
+                FOREIGN KEY (url_id) REFERENCES urls (id) ON DELETE CASCADE,
+                FOREIGN KEY (tag_id) REFERENCES tags (id) ON DELETE CASCADE
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_url_tags_tag ON url_tags(tag_id, url_id)')
+        self._create_triggers(cursor, self.TAG_TRIGGERS, {
+            'tag': self.TAG_NAME_SQL.format('raw.name'),
+            'paused_url_tags': self.PAUSED_SQL.format('url_tags'),
+            # URLs whose tags string changed, as (id, tags)
+            'retagged': ('(SELECT n.id, n.tags FROM old_rows o JOIN new_rows n ON n.id = o.id '
+                         'WHERE o.tags IS DISTINCT FROM n.tags)'),
+        })
+    
+    def _migration_search(self, cursor: psycopg.Cursor):
+        # GIN indexes on the same tsvector expressions _search_source matches,
+        # so the text needs no copy and no triggers to keep it in step
+        for index, (table, _) in self.SEARCH_DOCUMENTS.items():
+            cursor.execute(f'''
+                CREATE INDEX IF NOT EXISTS idx_{table}_search ON {table}
+                USING GIN (({self._search_vector(index)}))
+            ''')
+    
+    @staticmethod
+    def _create_triggers(cursor: psycopg.Cursor, triggers: Dict[str, tuple], statements: Dict[str, str]):
+        """Create or replace each trigger and the plpgsql function it runs."""
+        for name, (event, level, body) in triggers.items():
+            table = event.split()[-1]
+            cursor.execute(f'''
+                CREATE OR REPLACE FUNCTION {name}() RETURNS trigger LANGUAGE plpgsql AS $$
+                BEGIN{body.format(**statements)}
+                    RETURN NULL;
+                END
+                $$''')
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name} ON {table}')
+            cursor.execute(f'CREATE TRIGGER {name} {event} {level} EXECUTE FUNCTION {name}()')
+    
+    # Bulk operations set these transaction-local settings instead of inserting
+    # into trigger_pauses; the pausable triggers return early while they're on
+    PAUSED_SQL = "IF current_setting('schema_validator.pause_{0}', true) = 'on' THEN RETURN NULL; END IF;"
+    
+    @staticmethod
+    def _pause_triggers(cursor: psycopg.Cursor, *names: str):
+        """Pause the named triggers until the end of the current transaction."""
+        for name in names:
+            cursor.execute("SELECT set_config(?, 'on', true)", (f'schema_validator.pause_{name}',))
+    
+    @staticmethod
+    def _resume_triggers(cursor: psycopg.Cursor):
+        cursor.execute('''
+            SELECT set_config('schema_validator.pause_url_counters', 'off', true),
+                   set_config('schema_validator.pause_url_tags', 'off', true)
+        ''')
+    
+    # Counters, as in Database: triggers turn the touched rows into (scope,
+    # scope_id, name, value) deltas and apply them with one statement each
+    COUNTER_TRIGGERS = {
+        'counters_urls_insert': ('AFTER INSERT ON urls', NEW_ROWS, '''
+                    {bump_url_new}'''),
+        'counters_urls_delete': ('AFTER DELETE ON urls', OLD_ROWS, '''
+                    {paused_url_counters}
+                    {drop_url_old}'''),
+        'counters_urls_update': ('AFTER UPDATE ON urls', CHANGED_ROWS, '''
+                    {paused_url_counters}
+                    {move_url}'''),
+        'counters_results_insert': ('AFTER INSERT ON validation_results', NEW_ROWS, '''
+                    {bump_result_new}'''),
+        'counters_results_delete': ('AFTER DELETE ON validation_results', OLD_ROWS, '''
+                    {drop_result_old}'''),
+        'counters_results_update': ('AFTER UPDATE ON validation_results', CHANGED_ROWS, '''
+                    {move_result}'''),
+        'counters_runs_insert': ('AFTER INSERT ON validation_runs', EACH_ROW, '''
+                    INSERT INTO counters (scope, scope_id, name, value)
+                    VALUES ('project', COALESCE(NEW.project_id, 0), 'runs', 1)
+                    ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = counters.value + 1;'''),
+        'counters_runs_delete': ('AFTER DELETE ON validation_runs', EACH_ROW, '''
+                    UPDATE counters SET value = value - 1
+                    WHERE scope = 'project' AND scope_id = COALESCE(OLD.project_id, 0) AND name = 'runs';
+                    DELETE FROM counters WHERE scope = 'run' AND scope_id = OLD.id;'''),
+        'counters_projects_delete': ('AFTER DELETE ON projects', EACH_ROW, '''
+                    DELETE FROM counters WHERE scope = 'project' AND scope_id = OLD.id;'''),
+    }
+    
+    # Counter rows are locked in key order, so concurrent writers can't deadlock.
+    # Decrements only ever UPDATE (see Database.COUNTER_STATEMENTS).
+    APPLY_COUNTERS_SQL = '''
+                    WITH d AS ({deltas}),
+                    locked AS (
+                        SELECT c.scope, c.scope_id, c.name FROM counters c
+                        JOIN d ON d.scope = c.scope AND d.scope_id = c.scope_id AND d.name = c.name
+                        ORDER BY 1, 2, 3 FOR UPDATE OF c
+                    ),
+                    updated AS (
+                        UPDATE counters c SET value = c.value + d.value
+                        FROM d JOIN locked l ON l.scope = d.scope AND l.scope_id = d.scope_id AND l.name = d.name
+                        WHERE c.scope = d.scope AND c.scope_id = d.scope_id AND c.name = d.name
+                        RETURNING c.scope, c.scope_id, c.name
+                    )
+                    INSERT INTO counters (scope, scope_id, name, value)
+                    SELECT d.scope, d.scope_id, d.name, d.value FROM d
+                    WHERE d.value > 0 AND NOT EXISTS (
+                        SELECT 1 FROM updated u WHERE u.scope = d.scope AND u.scope_id = d.scope_id AND u.name = d.name
+                    )
+                    ORDER BY 1, 2, 3
+                    ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = counters.value + excluded.value;'''
+    
+    URL_DELTAS_SQL = '''
+                        SELECT 'project' AS scope, COALESCE(r.project_id, 0) AS scope_id, n.name, SUM(r.sign) AS value
+                        FROM ({rows}) r (project_id, status, sign)
+                        CROSS JOIN LATERAL (VALUES ('urls'), ('urls:' || COALESCE(r.status, ''))) n (name)
+                        GROUP BY 2, 3'''
+    
+    RESULT_DELTAS_SQL = '''
+                        SELECT 'run' AS scope, r.run_id AS scope_id, n.name, SUM(r.sign * n.value) AS value
+                        FROM ({rows}) r (run_id, status, score, schema_found, sign)
+                        CROSS JOIN LATERAL (VALUES
+                            ('results', 1), ('results:' || COALESCE(r.status, ''), 1),
+                            ('score_sum', COALESCE(r.score, 0)), ('schema_found', r.schema_found)
+                        ) n (name, value)
+                        GROUP BY 2, 3'''
+    
+    # A result found schema if it references a blob or holds legacy inline schema_data
+    RESULT_SCHEMA_FOUND_SQL = ("CASE WHEN {0}.schema_hash IS NOT NULL "
+                        "OR COALESCE({0}.schema_data, 'null') NOT IN ('null', '{{}}') THEN 1 ELSE 0 END")
+    
+    def _counter_statements(self) -> Dict[str, str]:
+        def apply(deltas, *rows):
+            return self.APPLY_COUNTERS_SQL.format(deltas=deltas.format(rows=' UNION ALL '.join(rows)))
+        
+        url_changed = ('FROM old_rows o JOIN new_rows n ON n.id = o.id '
+                       'WHERE (o.project_id, o.status) IS DISTINCT FROM (n.project_id, n.status)')
+        result_changed = ('FROM old_rows o JOIN new_rows n ON n.id = o.id WHERE '
+                          '(o.run_id, o.status, o.score, o.schema_hash, o.schema_data) IS DISTINCT FROM '
+                          '(n.run_id, n.status, n.score, n.schema_hash, n.schema_data)')
+        found_old = self.RESULT_SCHEMA_FOUND_SQL.format('o')
+        found_new = self.RESULT_SCHEMA_FOUND_SQL.format('n')
+        
+        return {
+            'paused_url_counters': self.PAUSED_SQL.format('url_counters'),
+            'bump_url_new': apply(self.URL_DELTAS_SQL, 'SELECT project_id, status, 1 FROM new_rows'),
+            'drop_url_old': apply(self.URL_DELTAS_SQL, 'SELECT project_id, status, -1 FROM old_rows'),
+            'move_url': apply(self.URL_DELTAS_SQL,
+                              f'SELECT o.project_id, o.status, -1 {url_changed}',
+                              f'SELECT n.project_id, n.status, 1 {url_changed}'),
+            'bump_result_new': apply(self.RESULT_DELTAS_SQL,
+                                     f'SELECT n.run_id, n.status, n.score, {found_new}, 1 FROM new_rows n'),
+            'drop_result_old': apply(self.RESULT_DELTAS_SQL,
+                                     f'SELECT o.run_id, o.status, o.score, {found_old}, -1 FROM old_rows o'),
+            'move_result': apply(self.RESULT_DELTAS_SQL,
+                                 f'SELECT o.run_id, o.status, o.score, {found_old}, -1 {result_changed}',
+                                 f'SELECT n.run_id, n.status, n.score, {found_new}, 1 {result_changed}'),
+        }
+    
+    LATEST_RESULT_TRIGGERS = {
+        'latest_result_insert': ('AFTER INSERT ON validation_results', NEW_ROWS, '''
+                    INSERT INTO url_latest_result (url_id, result_id, run_id, status, score, errors, validated_at)
+                    SELECT DISTINCT ON (url_id) url_id, id, run_id, status, score, errors, validated_at
+                    FROM new_rows ORDER BY url_id, validated_at DESC, id DESC
+                    ON CONFLICT (url_id) DO UPDATE SET
+                        result_id = excluded.result_id, run_id = excluded.run_id, status = excluded.status,
+                        score = excluded.score, errors = excluded.errors, validated_at = excluded.validated_at
+                    WHERE excluded.validated_at >= url_latest_result.validated_at;'''),
+        # URLs whose latest result was deleted fall back to their newest remaining
+        # result or compacted history; those with neither lose their row
+        'latest_result_delete': ('AFTER DELETE ON validation_results', OLD_ROWS, '''
+                    UPDATE url_latest_result lr SET
+                        result_id = f.result_id, run_id = f.run_id, status = f.status,
+                        score = f.score, errors = f.errors, validated_at = f.validated_at
+                    FROM (
+                        SELECT DISTINCT ON (c.url_id) c.* FROM (
+                            SELECT url_id, id AS result_id, run_id, status, score, errors, validated_at
+                            FROM validation_results WHERE url_id IN (SELECT url_id FROM old_rows)
+                            UNION ALL
+                            SELECT url_id, NULL, run_id, status, score, NULL, validated_at
+                            FROM url_score_history WHERE url_id IN (SELECT url_id FROM old_rows)
+                        ) c ORDER BY c.url_id, c.validated_at DESC, c.result_id DESC NULLS LAST
+                    ) f
+                    WHERE lr.url_id = f.url_id AND lr.result_id IN (SELECT id FROM old_rows);
+                    DELETE FROM url_latest_result lr USING old_rows o
+                    WHERE lr.url_id = o.url_id AND lr.result_id = o.id;'''),
+    }
+    
+    # One comma-separated entry of urls.tags as a tag name
+    TAG_NAME_SQL = "TRIM(translate({0}, chr(9) || chr(10) || chr(13), '   '))"
+    
+    TAG_TRIGGERS = {
+        'url_tags_insert': ('AFTER INSERT ON urls', NEW_ROWS, '''
+                    INSERT INTO tags (name)
+                    SELECT DISTINCT {tag} FROM new_rows n, unnest(string_to_array(n.tags, ',')) raw (name)
+                    WHERE {tag} <> ''
+                    ON CONFLICT DO NOTHING;
+                    INSERT INTO url_tags (url_id, tag_id)
+                    SELECT DISTINCT n.id, t.id FROM new_rows n, unnest(string_to_array(n.tags, ',')) raw (name)
+                    JOIN tags t ON t.name = {tag}
+                    ON CONFLICT DO NOTHING;'''),
+        'url_tags_update': ('AFTER UPDATE ON urls', CHANGED_ROWS, '''
+                    {paused_url_tags}
+                    INSERT INTO tags (name)
+                    SELECT DISTINCT {tag} FROM {retagged} r, unnest(string_to_array(r.tags, ',')) raw (name)
+                    WHERE {tag} <> ''
+                    ON CONFLICT DO NOTHING;
+                    DELETE FROM url_tags ut USING {retagged} r
+                    WHERE ut.url_id = r.id AND ut.tag_id NOT IN (
+                        SELECT t.id FROM unnest(string_to_array(r.tags, ',')) raw (name) JOIN tags t ON t.name = {tag}
+                    );
+                    INSERT INTO url_tags (url_id, tag_id)
+                    SELECT DISTINCT r.id, t.id FROM {retagged} r, unnest(string_to_array(r.tags, ',')) raw (name)
+                    JOIN tags t ON t.name = {tag}
+                    ON CONFLICT DO NOTHING;'''),
+    }
+    
+    # Statements with a PostgreSQL spelling
+    @staticmethod
+    def _insert(cursor: psycopg.Cursor, sql: str, values) -> int:
+        cursor.execute(sql.rstrip() + ' RETURNING id', values)
+        return cursor.fetchone()[0]
+    
+    ID_LIST_SQL = 'SELECT CAST(value AS BIGINT) FROM json_array_elements_text(CAST(? AS JSON)) AS ids (value)'
+    TEXT_LIST_SQL = 'SELECT value FROM json_array_elements_text(CAST(? AS JSON)) AS items (value)'
+    TAG_LIST_SQL = "string_agg(t.name, ', ' ORDER BY t.id)"
+    GLOB_SQL = '{0} ~ ?'
+    
+    @staticmethod
+    def _glob_pattern(pattern: str) -> str:
+        """Translate a glob into the anchored regular expression GLOB_SQL matches."""
+        parts = []
+        i = 0
+        while i < len(pattern):
+            char = pattern[i]
+            end = pattern.find(']', i + 2) if char == '[' else -1
+            if char == '*':
+                parts.append('.*')
+            elif char == '?':
+                parts.append('.')
+            elif end != -1:
+                parts.append('[' + pattern[i + 1:end].replace('\\', '\\\\') + ']')
+                i = end
+            else:
+                parts.append(re.escape(char))
+            i += 1
+        return '^' + ''.join(parts) + '$'
+    
+    # Full-text search: each index is a weighted tsvector over its table's columns.
+    # Punctuation is turned into spaces first, so words split as in SQLite's FTS5
+    # tokenizer (and as parse_search splits queries) rather than into URL and
+    # host tokens. The weights rank like Database.SEARCH_RANKS.
+    SEARCH_DOCUMENTS = {
+        'url': ('urls', {'url': 'A', 'tags': 'B', 'notes': 'C'}),
+        'findings': ('validation_results', {'errors': 'A', 'warnings': 'B'}),
+    }
+    
+    @classmethod
+    def _search_vector(cls, index: str) -> str:
+        _, weights = cls.SEARCH_DOCUMENTS[index]
+        return ' || '.join(
+            f"setweight(to_tsvector('simple', regexp_replace(COALESCE({column}, ''), "
+            f"'[[:punct:][:space:]]+', ' ', 'g')), '{weight}')"
+            for column, weight in weights.items()
+        )
+    
+    def _search_source(self, index: str, terms: List[tuple], run_id: int = None, schema: str = '') -> tuple:
+        """Database._search_source as a tsquery against the index's tsvector expression."""
+        table, weights = self.SEARCH_DOCUMENTS[index]
+        vector = self._search_vector(index)
+        
+        expressions = []
+        for field, words, prefix in terms:
+            weight = weights[field] if field else ''
+            lexemes = [f"'{word}':{weight}" if weight else f"'{word}'" for word in words]
+            if prefix:
+                lexemes[-1] = f"'{words[-1]}':*{weight}"
+            expressions.append('(' + ' <-> '.join(lexemes) + ')')
+        
+        # ts_rank is higher-is-better; negated so every backend sorts rank ascending, and
+        # widened from real so the value in a page cursor compares equal to itself
+        source = (f"SELECT id, -CAST(ts_rank({vector}, query) AS DOUBLE PRECISION) AS rank "
+                  f"FROM {table}, to_tsquery('simple', ?) AS query WHERE {vector} @@ query")
+        values = [' & '.join(expressions)]
+        if run_id is not None:
+            source += ' AND run_id = ?'
+            values.append(run_id)
+        return f'({source})', values
+    
+    def _select_urls(self, cursor: psycopg.Cursor, url_ids: Optional[List[int]] = None,
+                     filters: Optional[Dict] = None) -> int:
+        """
+        Select a bulk operation's URLs as Database does, then lock them in id
+        order, so bulk operations on overlapping URLs from other nodes queue up
+        instead of working from each other's uncommitted statuses and tags.
+        """
+        count = super()._select_urls(cursor, url_ids, filters)
+        cursor.execute('SELECT id FROM urls WHERE id IN (SELECT id FROM selected_urls) ORDER BY id FOR NO KEY UPDATE')
+        return count
+    
+    def delete_project(self, project_id: int):
+        """Delete project and all associated data, in one transaction."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            self._delete_project_rows(cursor, project_id)
+            conn.commit()
+        finally:
+            conn.close()
+        
+        self.prune_schema_blobs()
+    
+    def bulk_delete_urls(self, url_ids: Optional[List[int]] = None, filters: Optional[Dict] = None) -> int:
+        """
+        Delete many URLs, chosen by id list or filter, in one transaction.
+        Dependent rows are deleted table by table, set-based, before the URLs
+        themselves, so the cascades find nothing left to do. Returns the number deleted.
+        """
+        if url_ids is not None and not url_ids:
+            return 0
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            deleted = self._delete_selected_urls(cursor, url_ids, filters)
+            conn.commit()
+        finally:
+            conn.close()
+        
+        return deleted
+    
+    @staticmethod
+    def _foreign_keys(cursor: psycopg.Cursor) -> List[tuple]:
+        """(table, column, parent, parent_column, without_rowid) for every foreign key in the schema."""
+        cursor.execute('''
+            SELECT child.relname, a.attname, parent.relname, pa.attname, TRUE
+            FROM pg_constraint c
+            JOIN pg_class child ON child.oid = c.conrelid
+            JOIN pg_class parent ON parent.oid = c.confrelid
+            JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+            JOIN pg_attribute pa ON pa.attrelid = c.confrelid AND pa.attnum = c.confkey[1]
+            WHERE c.contype = 'f' AND c.connamespace = CAST(current_schema() AS regnamespace)
+            ORDER BY 1, 2
+        ''')
+        return [tuple(row) for row in cursor.fetchall()]
+    
+    def _orphan_checks(self, cursor: psycopg.Cursor) -> List[tuple]:
+        """Foreign keys have been enforced from the start, so there are no dangling rows to find."""
+        return []
+    
+    def write_results_batch(self, results: List[tuple], progress: Dict[int, int] = None):
+        """
+        Insert many (run_id, url_id, result) tuples with COPY and apply
+        processed_urls updates for their runs in a single transaction.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            values = [self._result_values(run_id, url_id, result) for run_id, url_id, result in results]
+            self._store_blobs(cursor, [blob for _, blob in values])
+            if values:
+                # In URL order, so concurrent batches' foreign key checks lock
+                # urls rows in the same order
+                values.sort(key=lambda value: value[0][1])
+                with cursor.copy('''
+                    COPY validation_results
+                    (run_id, url_id, status, schema_hash, errors, warnings, score, validated_at, response_time, has_warnings)
+                    FROM STDIN
+                ''') as copy:
+                    for row, _ in values:
+                        copy.write_row(row)
+            
+            cursor.executemany(
+                'UPDATE validation_runs SET processed_urls = GREATEST(processed_urls, ?) WHERE id = ?',
+                [(processed, run_id) for run_id, processed in sorted((progress or {}).items())]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    
+    # Run-to-run diffs with jsonb in place of SQLite's JSON1 functions
+    ERROR_LIST_SQL = "CASE WHEN jsonb_typeof(CAST({0} AS JSONB)) = 'array' THEN CAST({0} AS JSONB) ELSE '[]' END"
+    
+    def _run_diff_sql(self, base_run_id: int, run_id: int, schemas: Optional[Dict[int, str]] = None) -> tuple:
+        def run_rows(alias):
+            return f'''{alias} AS (
+                SELECT url_id, status, score, errors FROM validation_results
+                WHERE id IN (SELECT MAX(id) FROM validation_results WHERE run_id = ? GROUP BY url_id)
+                UNION ALL
+                SELECT url_id, status, score, NULL FROM url_score_history h WHERE run_id = ? AND NOT EXISTS (
+                    SELECT 1 FROM validation_results r WHERE r.run_id = h.run_id AND r.url_id = h.url_id
+                )
+            )'''
+        
+        def difference(left, right):
+            return f'''(
+                           SELECT CAST(COALESCE(jsonb_agg(e.value ORDER BY e.position), '[]') AS TEXT)
+                           FROM jsonb_array_elements({left}) WITH ORDINALITY e (value, position)
+                           WHERE e.value NOT IN (SELECT value FROM jsonb_array_elements({right}))
+                       )'''
+        
+        errors_a = self.ERROR_LIST_SQL.format('p.errors_a')
+        errors_b = self.ERROR_LIST_SQL.format('p.errors_b')
+        unreachable_a = self.UNREACHABLE_SQL.format('p.status_a')
+        unreachable_b = self.UNREACHABLE_SQL.format('p.status_b')
+        
+        sql = f'''
+            WITH {run_rows('a')}, {run_rows('b')},
+            pairs AS (
+                SELECT b.url_id, a.status AS status_a, b.status AS status_b, a.score AS score_a,
+                       b.score AS score_b, a.errors AS errors_a, b.errors AS errors_b,
+                       a.url_id IS NOT NULL AS in_a, TRUE AS in_b
+                FROM b LEFT JOIN a ON a.url_id = b.url_id
+                UNION ALL
+                SELECT a.url_id, a.status, NULL, a.score, NULL, a.errors, NULL, TRUE, FALSE
+                FROM a WHERE NOT EXISTS (SELECT 1 FROM b WHERE b.url_id = a.url_id)
+            ),
+            compared AS (
+                SELECT p.*,
+                       CASE WHEN p.errors_a IS NULL OR p.errors_b IS NULL OR p.errors_a = p.errors_b THEN '[]'
+                       ELSE {difference(errors_b, errors_a)} END AS new_errors,
+                       CASE WHEN p.errors_a IS NULL OR p.errors_b IS NULL OR p.errors_a = p.errors_b THEN '[]'
+                       ELSE {difference(errors_a, errors_b)} END AS resolved_errors
+                FROM pairs p
+            )
+            SELECT p.url_id, u.url, p.status_a, p.status_b, p.score_a, p.score_b,
+                   CAST(ROUND(CAST(COALESCE(p.score_b, 0) - COALESCE(p.score_a, 0) AS NUMERIC), 1)
+                        AS DOUBLE PRECISION) AS score_delta,
+                   p.new_errors, p.resolved_errors,
+                   CASE
+                       WHEN NOT p.in_a THEN 'new_url'
+                       WHEN NOT p.in_b THEN 'missing'
+                       WHEN {unreachable_b} AND NOT {unreachable_a} THEN 'unreachable'
+                       WHEN {unreachable_a} AND NOT {unreachable_b} THEN 'recovered'
+                       WHEN p.new_errors <> '[]' OR p.score_b < p.score_a THEN 'regressed'
+                       WHEN p.resolved_errors <> '[]' OR p.score_b > p.score_a THEN 'improved'
+                       WHEN p.status_a IS DISTINCT FROM p.status_b THEN 'status_changed'
+                       ELSE 'unchanged'
+                   END AS change
+            FROM compared p JOIN urls u ON u.id = p.url_id
+        '''
+        return sql, [base_run_id, base_run_id, run_id, run_id]
+    
+    # Maintenance
+    def incremental_vacuum(self, pages: int = 2000) -> int:
+        """Autovacuum reclaims space on PostgreSQL; nothing to do here."""
+        return 0
+    
+    def vacuum(self):
+        """Vacuum and analyze every table."""
+        conn = self.pool.acquire()
+        try:
+            # VACUUM can't run inside a transaction block
+            conn.autocommit = True
+            conn.execute('VACUUM (ANALYZE)')
+        finally:
+            conn.autocommit = False
+            self.pool.release(conn)
@@ -0,0 +1,146 @@
+"""
+Coalesced validation progress broadcasting over Socket.IO.
+Per-URL updates are folded into one compact delta per run at a fixed cadence
+and emitted only to clients that joined the run's room.
+"""
+
+import threading
+from collections import Counter
+from typing import Dict, Optional
+
+
+def run_room(run_id: int) -> str:
+    """Socket.IO room of clients following a run."""
+    return f'run_{run_id}'
+
+
+def compact_result(url: str, url_id: Optional[int], result: Optional[Dict]) -> Dict:
+    """A result without its schema body; the full result is at /api/validation/result/<id>."""
+    result = result or {'status': 'error', 'error': 'Failed to validate URL'}
+    validation = result.get('validation')
+    if not isinstance(validation, dict):
+        validation = {}
+    
+    return {
+        'url_id': url_id,
+        'url': url,
+        'status': result.get('status', 'error'),
+        'score': validation.get('score', result.get('score', 0.0)),
+        'errors': len(validation.get('errors') or []) + (1 if result.get('error') else 0),
+        'warnings': len(validation.get('warnings') or []),
+        'response_time': result.get('response_time')
+    }
+
+
+class ProgressBroadcaster:
+    """
+    Buffers per-URL progress and emits one `validation_progress` message per
+    run every `interval` seconds, to that run's room only. A message carries
+    the latest counters, cumulative counts by status and the compact results
+    since the previous one (at most `max_results`, the newest kept).
+    """
+    
+    def __init__(self, socketio, interval: float = 0.5, max_results: int = 100):
+        self.socketio = socketio
+        self.interval = interval
+        self.max_results = max_results
+        
+        self._runs = {}  # run_id -> latest counters, status counts and pending results
+        self._lock = threading.Lock()
+        self._started = False
+        self._closing = threading.Event()
+        
+        self.updates_received = 0
+        self.messages_emitted = 0
+        self.results_dropped = 0
+    
+    def start(self):
+        """Start the emitter task if it isn't running."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            self._closing.clear()
+        # A Socket.IO background task, so it cooperates with eventlet/gevent workers
+        self.socketio.start_background_task(self._run)
+    
+    def submit(self, run_id: int, url: str, url_id: Optional[int], result: Optional[Dict],
+               processed: int, total: int, progress: float):
+        """Record one URL's progress for the next delta."""
+        self.start()
+        item = compact_result(url, url_id, result)
+        with self._lock:
+            self.updates_received += 1
+            state = self._runs.setdefault(run_id, {'statuses': Counter(), 'results': [], 'dirty': False})
+            state.update(processed=processed, total=total, progress=progress, url=url, dirty=True)
+            state['statuses'][item['status']] += 1
+            state['results'].append(item)
+            if len(state['results']) > self.max_results:
+                del state['results'][0]
+                self.results_dropped += 1
+    
+    def snapshot(self, run_id: int) -> Optional[Dict]:
+        """The run's latest counters without pending results, for clients that just joined."""
+        with self._lock:
+            state = self._runs.get(run_id)
+            return self._message(run_id, state, results=[]) if state else None
+    
+    def finish(self, run_id: int):
+        """Emit the run's pending delta now and forget it, before its completion is announced."""
+        with self._lock:
+            state = self._runs.pop(run_id, None)
+            message = self._message(run_id, state) if state and state['dirty'] else None
+        if message:
+            self._emit(run_id, message)
+    
+    def close(self):
+        """Emit what is pending and stop the emitter task."""
+        self._closing.set()
+        self._emit_pending()
+    
+    def stats(self) -> Dict:
+        """Broadcaster statistics for monitoring."""
+        with self._lock:
+            return {
+                'active_runs': len(self._runs),
+                'updates_received': self.updates_received,
+                'messages_emitted': self.messages_emitted,
+                'results_dropped': self.results_dropped,
+                'interval': self.interval
+            }
+    
+    def _message(self, run_id: int, state: Dict, results=None) -> Dict:
+        return {
+            'run_id': run_id,
+            'processed': state.get('processed', 0),
+            'total': state.get('total', 0),
+            'progress': state.get('progress', 0),
+            'url': state.get('url'),
+            'counts': dict(state['statuses']),
+            'results': state['results'] if results is None else results
+        }
+    
+    def _emit(self, run_id: int, message: Dict):
+        try:
+            self.socketio.emit('validation_progress', message, to=run_room(run_id))
+            self.messages_emitted += 1
+        except Exception as e:
+            print(f"Error emitting validation progress: {e}")
+    
+    def _emit_pending(self):
+        with self._lock:
+            messages = []
+            for run_id, state in self._runs.items():
+                if state['dirty']:
+                    messages.append((run_id, self._message(run_id, state)))
+                    state['results'] = []
+                    state['dirty'] = False
+        for run_id, message in messages:
+            self._emit(run_id, message)
+    
+    def _run(self):
+        while not self._closing.is_set():
+            self.socketio.sleep(self.interval)
+            self._emit_pending()
+        with self._lock:
+            self._started = False
@@ -0,0 +1,209 @@
+"""
+Background writer that batches validation results into the store.
+Decouples the validation progress path from disk commits.
+"""
+
+import queue
+import threading
+import time
+from typing import Dict, Optional
+
+from .storage import Storage
+
+
+class ResultWriter:
+    """
+    Buffers validation results and run progress and flushes them with
+    one bulk insert in one transaction every `batch_size` rows or
+    `flush_interval` seconds, whichever comes first.
+    
+    A batch that fails on a lock or connection problem (the store's
+    OperationalError) is retried `max_retries` times with exponential backoff
+    from `retry_delay` seconds; if it still fails, its rows are given up on.
+    A batch the store rejects for any other reason, such as a result for a URL
+    deleted mid-run, is written again row by row, so that only the rows that
+    fail are given up on. The error is kept for each run whose rows were
+    given up on, for take_write_error.
+    """
+    
+    def __init__(self, db: Storage, batch_size: int = 200, flush_interval: float = 0.25,
+                 max_retries: int = 4, retry_delay: float = 0.5):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        
+        self._queue = queue.Queue()
+        self._thread = None
+        self._closing = threading.Event()
+        self._lock = threading.Lock()
+        self._errors = {}  # run_id -> why its writes were given up on
+        
+        self.rows_written = 0
+        self.batches_written = 0
+        self.write_errors = 0
+        self.write_retries = 0
+        self.rows_dropped = 0
+        self.last_error = None
+        self.last_flush_ms = 0.0
+    
+    def start(self):
+        """Start the writer thread if it isn't running."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._closing.clear()
+            self._thread = threading.Thread(target=self._run, name='result-writer', daemon=True)
+            self._thread.start()
+    
+    def submit_result(self, run_id: int, url_id: int, result: Dict):
+        """Queue a validation result for writing."""
+        self.start()
+        self._queue.put(('result', run_id, url_id, result))
+    
+    def submit_progress(self, run_id: int, processed: int):
+        """Queue a processed_urls update; only the latest per run is written."""
+        self.start()
+        self._queue.put(('progress', run_id, processed, None))
+    
+    def flush(self, timeout: Optional[float] = None, run_id: Optional[int] = None) -> bool:
+        """
+        Block until everything submitted so far has been written or given up on.
+        Returns False on timeout, or if writes of `run_id` (of any run, without
+        one) were given up on and not yet taken with take_write_error.
+        """
+        if self._thread and self._thread.is_alive():
+            deadline = time.monotonic() + timeout if timeout is not None else None
+            with self._queue.all_tasks_done:
+                while self._queue.unfinished_tasks:
+                    remaining = deadline - time.monotonic() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._queue.all_tasks_done.wait(remaining)
+        elif self._queue.unfinished_tasks:
+            return False
+        
+        with self._lock:
+            return run_id not in self._errors if run_id is not None else not self._errors
+    
+    def take_write_error(self, run_id: int) -> Optional[str]:
+        """Why writes of a run were given up on, or None; forgets it."""
+        with self._lock:
+            return self._errors.pop(run_id, None)
+    
+    def close(self, timeout: float = 10.0):
+        """Drain the queue and stop the writer thread."""
+        self._closing.set()
+        if self._thread:
+            self._thread.join(timeout)
+    
+    @property
+    def queue_depth(self) -> int:
+        """Number of submitted items not yet written."""
+        return self._queue.unfinished_tasks
+    
+    def stats(self) -> Dict:
+        """Writer statistics for monitoring."""
+        return {
+            'queue_depth': self.queue_depth,
+            'rows_written': self.rows_written,
+            'batches_written': self.batches_written,
+            'write_errors': self.write_errors,
+            'write_retries': self.write_retries,
+            'rows_dropped': self.rows_dropped,
+            'last_error': self.last_error,
+            'last_flush_ms': self.last_flush_ms,
+            'running': bool(self._thread and self._thread.is_alive())
+        }
+    
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._closing.is_set():
+                    return
+                continue
+            
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            self._write(batch)
+    
+    def _write(self, batch):
+        results = []
+        progress = {}
+        for kind, run_id, value, result in batch:
+            if kind == 'result':
+                results.append((run_id, value, result))
+            else:
+                progress[run_id] = max(progress.get(run_id, 0), value)
+        
+        try:
+            error = self._attempt(results, progress)
+            if error is None:
+                self.rows_written += len(results)
+                self.batches_written += 1
+            elif self._is_transient(error) or len(results) + len(progress) <= 1:
+                self._give_up(results, progress, error)
+            else:
+                # One bad row fails its whole batch: write the rows one at a time
+                pieces = [([row], {}) for row in results] + [([], {run_id: processed})
+                                                             for run_id, processed in progress.items()]
+                for piece_results, piece_progress in pieces:
+                    error = self._attempt(piece_results, piece_progress)
+                    if error is None:
+                        self.rows_written += len(piece_results)
+                    else:
+                        self._give_up(piece_results, piece_progress, error)
+                self.batches_written += 1
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+    
+    def _attempt(self, results, progress) -> Optional[Exception]:
+        """
+        Write rows, retrying lock and connection errors. Returns the error it
+        gave up on, if any, with `results` and `progress` cut down to what
+        wasn't written.
+        """
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                self.db.write_results_batch(results, progress)
+                return None
+            except Exception as e:
+                self.last_error = f'{type(e).__name__}: {e}'
+                # Runs a store wrote before failing (see ShardedDatabase) aren't written again
+                committed = getattr(e, 'committed_runs', None)
+                if committed:
+                    self.rows_written += sum(run_id in committed for run_id, _, _ in results)
+                    results[:] = [row for row in results if row[0] not in committed]
+                    for run_id in committed:
+                        progress.pop(run_id, None)
+                if not self._is_transient(e) or attempt == self.max_retries:
+                    return e
+                self.write_retries += 1
+                time.sleep(self.retry_delay * 2 ** attempt)
+            finally:
+                self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+    
+    def _is_transient(self, error: Exception) -> bool:
+        return isinstance(error, self.db.OperationalError)
+    
+    def _give_up(self, results, progress, error: Exception):
+        """Record rows that couldn't be written against the runs they belong to."""
+        self.write_errors += 1
+        self.rows_dropped += len(results)
+        with self._lock:
+            for run_id in {run_id for run_id, _, _ in results} | set(progress):
+                self._errors.setdefault(run_id, f'{type(error).__name__}: {error}')
@@ -0,0 +1,123 @@
+"""
+Background compaction of historical validation runs.
+Applies each project's retention policy, garbage-collects orphaned rows and
+returns freed pages to the OS.
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Dict
+
+from .storage import Storage
+
+
+class RetentionCompactor:
+    """
+    Periodically compacts runs beyond each project's `retention_runs` setting
+    into summary rows and per-URL score history, then runs an incremental
+    vacuum. Runs every `interval` seconds, or sooner when woken. Every
+    `gc_interval` seconds (and on the first pass) it also removes orphaned rows.
+    """
+    
+    def __init__(self, db: Storage, interval: float = 3600.0, batch_size: int = 5000,
+                 vacuum_pages: int = 2000, gc_interval: float = 86400.0):
+        self.db = db
+        self.interval = interval
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+        self.gc_interval = gc_interval
+        self._last_gc = None
+        
+        self._thread = None
+        self._wake = threading.Event()
+        self._closing = threading.Event()
+        self._lock = threading.Lock()
+        
+        self.passes = 0
+        self.runs_compacted = 0
+        self.results_removed = 0
+        self.pages_freed = 0
+        self.orphans_removed = 0
+        self.errors = 0
+        self.last_run_at = None
+        self.last_duration_ms = 0.0
+    
+    def start(self):
+        """Start the compaction thread if it isn't running."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._closing.clear()
+            self._thread = threading.Thread(target=self._run, name='retention-compactor', daemon=True)
+            self._thread.start()
+    
+    def wake(self):
+        """Run a compaction pass now instead of waiting for the next interval."""
+        self._wake.set()
+    
+    def close(self, timeout: float = 10.0):
+        """Stop the compaction thread after its current batch."""
+        self._closing.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+    
+    def run_once(self, collect_orphans: bool = None) -> Dict:
+        """Apply every project's retention policy once, collecting orphans when due."""
+        started = time.perf_counter()
+        report = {'runs_compacted': 0, 'results_removed': 0, 'blobs_pruned': 0, 'orphans_removed': 0,
+                  'pages_freed': 0}
+        
+        for project_id, keep_runs in self.db.get_retention_policies().items():
+            for run_id in self.db.get_runs_to_compact(project_id, keep_runs):
+                if self._closing.is_set():
+                    break
+                report['results_removed'] += self.db.compact_validation_run(run_id, self.batch_size)
+                report['runs_compacted'] += 1
+        
+        if report['runs_compacted']:
+            report['blobs_pruned'] = self.db.prune_schema_blobs()
+        
+        if collect_orphans is None:
+            collect_orphans = self._last_gc is None or time.monotonic() - self._last_gc >= self.gc_interval
+        if collect_orphans:
+            orphans = self.db.collect_orphans(self.batch_size, should_stop=self._closing.is_set)
+            report['orphans_removed'] = sum(orphans.values())
+            self._last_gc = time.monotonic()
+        
+        report['pages_freed'] = self.db.incremental_vacuum(self.vacuum_pages)
+        
+        self.passes += 1
+        self.runs_compacted += report['runs_compacted']
+        self.results_removed += report['results_removed']
+        self.pages_freed += report['pages_freed']
+        self.orphans_removed += report['orphans_removed']
+        self.last_run_at = datetime.now().isoformat()
+        self.last_duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        return report
+    
+    def stats(self) -> Dict:
+        """Compactor statistics for monitoring."""
+        return {
+            'passes': self.passes,
+            'runs_compacted': self.runs_compacted,
+            'results_removed': self.results_removed,
+            'pages_freed': self.pages_freed,
+            'orphans_removed': self.orphans_removed,
+            'errors': self.errors,
+            'last_run_at': self.last_run_at,
+            'last_duration_ms': self.last_duration_ms,
+            'running': bool(self._thread and self._thread.is_alive())
+        }
+    
+    def _run(self):
+        while not self._closing.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                self.errors += 1
+                print(f"Error compacting validation runs: {e}")
+            
+            self._wake.wait(self.interval)
+            self._wake.clear()
@@ -5,18 +5,41 @@ Web routes for Schema Validator application.
 import json
 import asyncio
 from datetime import datetime
-from flask import Blueprint, render_template, request, jsonify, send_file, redirect, url_for
+import csv
+import io
+from flask import (Blueprint, Response, render_template, request, jsonify, send_file, redirect,
+                   stream_with_context, url_for)
 from werkzeug.utils import secure_filename
 
-from .app import get_db, socketio
-from .socketio_events import start_validation_task
+from .app import (get_db, get_read_cache, get_result_writer, get_retention_compactor, get_progress_broadcaster,
+                  get_run_manager)
+from .socketio_events import control_run, start_validation
 from ..core.validator import SchemaValidator
 from ..core.report import ReportGenerator
 from ..core.validation_help import VALIDATION_HELP
+from ..core.sitemap import iter_sitemap, matches_patterns, resolve_sitemap_location
 from ..config import Config
 
 bp = Blueprint('main', __name__)
 
+URL_PAGE_SIZE = 100
+RESULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def _page_limit(default: int) -> int:
+    """Page size from the `limit` query argument, clamped to MAX_PAGE_SIZE."""
+    limit = request.args.get('limit', default, type=int)
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _bool_arg(name: str):
+    """Parse an optional true/false query argument."""
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    return value.lower() in ('1', 'true', 'yes')
+
 
 @bp.route('/')
 def index():
@@ -48,16 +71,11 @@ def project_dashboard(project_id):
         return render_template('404.html'), 404
     
     # Get project statistics
-    urls = db.get_urls(project_id=project_id)
-    active_urls = db.get_urls(project_id=project_id, status='active')
     validation_runs = db.get_validation_runs(project_id=project_id, limit=5)
     
-    stats = {
-        'total_urls': len(urls),
-        'active_urls': len(active_urls),
-        'total_runs': len(validation_runs),
-        'last_run_date': validation_runs[0]['start_time'][:10] if validation_runs else None
-    }
+    stats = db.get_project_stats(project_id)
+    stats['last_run_date'] = validation_runs[0]['start_time'][:10] if validation_runs else None
+    stats['health'] = db.get_project_health(project_id)
     
     return render_template('project_dashboard.html',
                          project=project,
@@ -72,9 +90,9 @@ def projects():
     all_projects = db.get_projects()
     
     # Get URL count per project
+    url_counts = db.get_url_counts()
     for project in all_projects:
-        urls = db.get_urls(project_id=project['id'])
-        project['url_count'] = len(urls)
+        project['url_count'] = url_counts.get(project['id'], 0)
     
     return render_template('projects.html', projects=all_projects)
 
@@ -84,14 +102,22 @@ def urls():
     """URLs management page."""
     db = get_db()
     project_id = request.args.get('project_id', type=int)
+    health = request.args.get('health')
     
     projects = db.get_projects()
-    urls_list = db.get_urls(project_id=project_id)
+    try:
+        page = db.query_urls(project_id=project_id, health=health, limit=URL_PAGE_SIZE)
+    except ValueError:
+        health = None
+        page = db.query_urls(project_id=project_id, limit=URL_PAGE_SIZE)
     
     return render_template('urls.html', 
-                         urls=urls_list,
+                         urls=page['items'],
+                         next_cursor=page['next_cursor'],
+                         total_urls=page['total'],
                          projects=projects,
-                         selected_project_id=project_id)
+                         selected_project_id=project_id,
+                         selected_health=health)
 
 
 @bp.route('/results')
@@ -102,17 +128,23 @@ def results():
     
     runs = db.get_validation_runs(limit=20)
     
-    results_data = None
+    page = None
+    summary = None
     selected_run = None
     
     if run_id:
         selected_run = db.get_validation_run(run_id)
-        results_data = db.get_validation_results(run_id)
+        if selected_run:
+            selected_run['scope'] = json.loads(selected_run.get('settings_snapshot') or '{}').get('scope')
+        page = db.query_validation_results(run_id, limit=RESULT_PAGE_SIZE)
+        summary = db.get_results_summary(run_id)
     
     return render_template('results.html',
                          runs=runs,
                          selected_run=selected_run,
-                         results=results_data)
+                         results=page['items'] if page else None,
+                         next_cursor=page['next_cursor'] if page else None,
+                         summary=summary)
 
 
 @bp.route('/settings')
@@ -170,7 +202,10 @@ def api_get_project_settings(project_id):
         'user_agent': settings.get('user_agent', 'chrome'),
         'custom_user_agent': settings.get('custom_user_agent', ''),
         'stealth_mode': settings.get('stealth_mode', True),
-        'block_resources': settings.get('block_resources', True)
+        'block_resources': settings.get('block_resources', True),
+        'retention_runs': settings.get('retention_runs', 0),
+        'share_weight': settings.get('share_weight', 1),
+        'browser_quota': settings.get('browser_quota', 0)
     })
 
 
@@ -200,13 +235,78 @@ def api_delete_project(project_id):
 
 @bp.route('/api/urls', methods=['GET'])
 def api_get_urls():
-    """Get all URLs."""
+    """Get a page of URLs, filtered and sorted server-side."""
     db = get_db()
-    project_id = request.args.get('project_id', type=int)
-    status = request.args.get('status')
     
-    urls = db.get_urls(project_id=project_id, status=status)
-    return jsonify(urls)
+    try:
+        page = db.query_urls(
+            project_id=request.args.get('project_id', type=int),
+            status=request.args.get('status'),
+            search=request.args.get('search'),
+            tag=request.args.get('tag'),
+            health=request.args.get('health'),
+            sort=request.args.get('sort', 'added_date'),
+            order=request.args.get('order', 'desc'),
+            cursor=request.args.get('cursor'),
+            limit=_page_limit(URL_PAGE_SIZE)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'urls': page['items'], 'next_cursor': page['next_cursor'], 'total': page['total']})
+
+
+@bp.route('/api/search/urls', methods=['GET'])
+def api_search_urls():
+    """Full-text search over URLs, their tags and notes, and their latest findings; best matches first."""
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'error': 'Missing search query'}), 400
+    
+    db = get_db()
+    try:
+        page = db.search_urls(
+            q,
+            project_id=request.args.get('project_id', type=int),
+            status=request.args.get('status'),
+            tag=request.args.get('tag'),
+            health=request.args.get('health'),
+            cursor=request.args.get('cursor'),
+            limit=_page_limit(URL_PAGE_SIZE)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'urls': page['items'], 'next_cursor': page['next_cursor'], 'total': page['total']})
+
+
+@bp.route('/api/tags', methods=['GET'])
+def api_get_tags():
+    """Get tag facets (tag and URL count), optionally for one project."""
+    db = get_db()
+    facets = db.get_tag_facets(
+        project_id=request.args.get('project_id', type=int),
+        status=request.args.get('status'),
+        limit=min(request.args.get('limit', 100, type=int), MAX_PAGE_SIZE)
+    )
+    return jsonify(facets)
+
+
+@bp.route('/api/urls/tags', methods=['POST'])
+def api_update_url_tags():
+    """Add and/or remove tags on many URLs at once."""
+    data = request.json
+    url_ids = data.get('url_ids', [])
+    
+    if not url_ids:
+        return jsonify({'error': 'No URLs selected'}), 400
+    if not (data.get('add') or data.get('remove')):
+        return jsonify({'error': 'No tags to add or remove'}), 400
+    
+    db = get_db()
+    count = db.update_url_tags(url_ids, add=data.get('add'), remove=data.get('remove'))
+    
+    return jsonify({'count': count, 'message': f'Tags updated on {count} URLs'})
 
 
 @bp.route('/api/urls', methods=['POST'])
@@ -219,16 +319,18 @@ def api_add_url():
     project_id = data.get('project_id')
     
     # Check for duplicate URLs in the same project
-    existing_urls = db.get_urls(project_id=project_id)
-    if any(existing_url['url'] == url for existing_url in existing_urls):
+    if db.find_url(url, project_id=project_id):
         return jsonify({'error': 'This URL already exists in this project'}), 400
     
-    url_id = db.add_url(
-        url=url,
-        project_id=project_id,
-        tags=data.get('tags', ''),
-        notes=data.get('notes', '')
-    )
+    try:
+        url_id = db.add_url(
+            url=url,
+            project_id=project_id,
+            tags=data.get('tags', ''),
+            notes=data.get('notes', '')
+        )
+    except db.IntegrityError:
+        return jsonify({'error': 'This URL already exists in this project'}), 400
     
     return jsonify({'id': url_id, 'message': 'URL added successfully'})
 
@@ -239,47 +341,75 @@ def api_add_urls_bulk():
     data = request.json
     db = get_db()
     
-    urls = data.get('urls', [])
+    urls = [url.strip() for url in data.get('urls', []) if url.strip()]
+    
+    # Duplicates (in the project or within the batch) are skipped by the unique index
+    response_data = db.add_urls_bulk(
+        urls,
+        project_id=data.get('project_id'),
+        status=data.get('status', 'active'),
+        tags=data.get('tags', '')
+    )
+    
+    response_data['message'] = f"{response_data['added_count']} URLs added successfully"
+    if response_data['duplicate_count']:
+        response_data['message'] += f", {response_data['duplicate_count']} duplicates skipped"
+    
+    return jsonify(response_data)
+
+
+@bp.route('/api/urls/sitemap', methods=['POST'])
+def api_import_sitemap():
+    """Import URLs from a sitemap or sitemap index (a URL, or a file in SITEMAP_IMPORT_DIR)."""
+    data = request.json
+    db = get_db()
+    
+    location = (data.get('sitemap') or '').strip()
     project_id = data.get('project_id')
+    include = data.get('include') or []
+    exclude = data.get('exclude') or []
     
-    # Get existing URLs for duplicate checking
-    existing_urls = db.get_urls(project_id=project_id)
-    existing_url_set = {existing_url['url'] for existing_url in existing_urls}
+    if not location or not project_id:
+        return jsonify({'error': 'Sitemap location and project are required'}), 400
     
-    url_ids = []
-    duplicates = []
-    added_count = 0
+    # Never read arbitrary files off the server's disk
+    try:
+        location = resolve_sitemap_location(location, Config.SITEMAP_IMPORT_DIR)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    status = data.get('status', 'active')
-    tags = data.get('tags', '')
+    filtered = 0
     
-    for url in urls:
-        if url.strip():
-            url_clean = url.strip()
-            if url_clean in existing_url_set:
-                duplicates.append(url_clean)
+    def entries():
+        nonlocal filtered
+        for entry in iter_sitemap(location, max_depth=data.get('max_depth', 3), local_dir=Config.SITEMAP_IMPORT_DIR):
+            if matches_patterns(entry.loc, include, exclude):
+                yield entry.loc, entry.lastmod
             else:
-                url_id = db.add_url(
-                    url=url_clean, 
-                    project_id=project_id,
-                    status=status,
-                    tags=tags
-                )
-                url_ids.append(url_id)
-                existing_url_set.add(url_clean)  # Add to set to prevent duplicates within the same batch
-                added_count += 1
-    
-    response_data = {
-        'added_count': added_count,
-        'duplicate_count': len(duplicates),
-        'message': f'{added_count} URLs added successfully'
-    }
+                filtered += 1
     
-    if duplicates:
-        response_data['duplicates'] = duplicates
-        response_data['message'] += f', {len(duplicates)} duplicates skipped'
+    try:
+        stats = db.ingest_urls(
+            project_id,
+            entries(),
+            status=data.get('status', 'active'),
+            tags=data.get('tags', '')
+        )
+    except Exception as e:
+        # Batches committed before the error stay imported; say how many
+        partial = getattr(e, 'ingested', None)
+        if not partial or not (partial['added'] or partial['lastmod_updated']):
+            return jsonify({'error': f'Error reading sitemap: {e}'}), 400
+        return jsonify({
+            **partial,
+            'filtered': filtered,
+            'error': f'Error reading sitemap: {e}',
+            'message': f"Import stopped by an error after {partial['added']} URLs were added"
+        }), 400
     
-    return jsonify(response_data)
+    stats['filtered'] = filtered
+    stats['message'] = f"{stats['added']} URLs added, {stats['duplicates']} duplicates skipped"
+    return jsonify(stats)
 
 
 @bp.route('/api/urls/<int:url_id>', methods=['PUT'])
@@ -288,17 +418,28 @@ def api_update_url(url_id):
     data = request.json
     db = get_db()
     
-    db.update_url(
-        url_id=url_id,
-        url=data.get('url'),
-        status=data.get('status'),
-        tags=data.get('tags'),
-        notes=data.get('notes')
-    )
+    try:
+        db.update_url(
+            url_id=url_id,
+            url=data.get('url'),
+            status=data.get('status'),
+            tags=data.get('tags'),
+            notes=data.get('notes')
+        )
+    except db.IntegrityError:
+        return jsonify({'error': 'This URL already exists in this project'}), 400
     
     return jsonify({'message': 'URL updated successfully'})
 
 
+@bp.route('/api/urls/<int:url_id>/history', methods=['GET'])
+def api_get_url_history(url_id):
+    """Get a URL's score history across full and compacted runs."""
+    db = get_db()
+    limit = request.args.get('limit', 100, type=int)
+    return jsonify(db.get_url_score_history(url_id, limit=max(1, min(limit, MAX_PAGE_SIZE))))
+
+
 @bp.route('/api/urls/<int:url_id>', methods=['DELETE'])
 def api_delete_url(url_id):
     """Delete a URL."""
@@ -309,43 +450,46 @@ def api_delete_url(url_id):
 
 @bp.route('/api/urls/bulk-delete', methods=['POST'])
 def api_bulk_delete_urls():
-    """Delete multiple URLs."""
+    """Delete multiple URLs, by `url_ids` or by `filter` (project_id, status, search, tag, health, q)."""
     data = request.json
-    url_ids = data.get('url_ids', [])
+    url_ids = data.get('url_ids')
+    filters = data.get('filter')
+    
+    if not url_ids and not filters:
+        return jsonify({'error': 'No URLs selected'}), 400
     
     db = get_db()
-    db.bulk_delete_urls(url_ids)
+    try:
+        count = db.bulk_delete_urls(url_ids=url_ids or None, filters=filters)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify({'count': len(url_ids), 'message': f'{len(url_ids)} URLs deleted'})
+    return jsonify({'count': count, 'message': f'{count} URLs deleted'})
 
 
 @bp.route('/api/urls/bulk-update', methods=['POST'])
 def api_bulk_update_urls():
-    """Update multiple URLs."""
+    """Update multiple URLs, by `url_ids` or by `filter` (project_id, status, search, tag, health, q)."""
     data = request.json
-    url_ids = data.get('url_ids', [])
-    status = data.get('status')
-    tags = data.get('tags')
-    notes = data.get('notes')
+    url_ids = data.get('url_ids')
+    filters = data.get('filter')
     
-    if not url_ids:
+    if not url_ids and not filters:
         return jsonify({'error': 'No URLs selected'}), 400
     
     db = get_db()
-    updated_count = 0
-    
-    for url_id in url_ids:
-        update_data = {}
-        if status is not None:
-            update_data['status'] = status
-        if tags is not None:
-            update_data['tags'] = tags
-        if notes is not None:
-            update_data['notes'] = notes
-        
-        if update_data:
-            db.update_url(url_id, **update_data)
-            updated_count += 1
+    try:
+        updated_count = db.bulk_update_urls(
+            url_ids=url_ids or None,
+            filters=filters,
+            status=data.get('status'),
+            tags=data.get('tags'),
+            notes=data.get('notes'),
+            add_tags=data.get('add_tags'),
+            remove_tags=data.get('remove_tags')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     return jsonify({'count': updated_count, 'message': f'{updated_count} URLs updated successfully'})
 
@@ -359,11 +503,28 @@ def api_start_validation():
     
     db = get_db()
     
-    # Get active URLs for the project
-    urls = db.get_urls(project_id=project_id, status='active')
+    # Scope the run to part of the project (failures, tags, stale or changed
+    # URLs, a URL pattern); the resolved scope is kept in the settings snapshot
+    scope = dict(settings.get('scope') or {})
+    if settings.get('failed_only'):
+        scope.setdefault('last_status', ['error'])
+    if settings.get('changed_only'):
+        scope['changed'] = True
+    
+    try:
+        scope = db.normalize_run_scope(scope)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if scope:
+        urls = db.get_scoped_urls(project_id, scope)
+        settings['scope'] = scope
+    else:
+        urls = db.get_urls(project_id=project_id, status='active')
     
     if not urls:
-        return jsonify({'error': 'No active URLs found for validation'}), 400
+        message = 'No active URLs match the run scope' if scope else 'No active URLs found for validation'
+        return jsonify({'error': message}), 400
     
     # Create validation run
     run_id = db.create_validation_run(
@@ -373,7 +534,7 @@ def api_start_validation():
     )
     
     # Start validation in background
-    socketio.start_background_task(start_validation_task, run_id, urls, settings)
+    start_validation(run_id, urls, settings)
     
     return jsonify({'run_id': run_id, 'message': 'Validation started', 'total_urls': len(urls)})
 
@@ -389,6 +550,21 @@ def api_get_validation_runs():
     return jsonify(runs)
 
 
+@bp.route('/api/validation/active', methods=['GET'])
+def api_get_active_runs():
+    """Get every active validation run with its state and browser share."""
+    return jsonify({'runs': get_run_manager().active_runs(), **get_run_manager().stats()})
+
+
+@bp.route('/api/validation/runs/<int:run_id>/<any(pause, resume, stop):action>', methods=['POST'])
+def api_control_validation_run(run_id, action):
+    """Pause, resume or stop an active validation run."""
+    if not control_run(run_id, action):
+        return jsonify({'error': 'Validation run is not active'}), 404
+    
+    return jsonify({'message': f'Validation {action} requested', 'run_id': run_id})
+
+
 @bp.route('/api/validation/runs/<int:run_id>', methods=['DELETE'])
 def api_delete_validation_run(run_id):
     """Delete a validation run."""
@@ -400,6 +576,19 @@ def api_delete_validation_run(run_id):
     return jsonify({'message': 'Validation run deleted successfully'})
 
 
+@bp.route('/api/validation/runs/<int:run_id>/archive', methods=['POST'])
+def api_archive_validation_run(run_id):
+    """Compact a finished run, moving its full results to an archive file."""
+    db = get_db()
+    
+    try:
+        archive_path = db.archive_validation_run(run_id)
+    except (ValueError, NotImplementedError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'message': 'Validation run archived', 'archive_path': archive_path})
+
+
 @bp.route('/api/validation/runs/<int:run_id>', methods=['GET'])
 def api_get_validation_run(run_id):
     """Get a specific validation run."""
@@ -420,22 +609,167 @@ def api_update_validation_run_status(run_id):
         
         if not status:
             return jsonify({'error': 'Status is required'}), 400
-            
+        
         db = get_db()
         db.update_validation_run(run_id, status=status)
         
         return jsonify({'message': 'Status updated successfully'}), 200
-        
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+DIFF_CSV_FIELDS = ['url_id', 'url', 'change', 'status_a', 'status_b', 'score_a', 'score_b',
+                   'score_delta', 'new_errors', 'resolved_errors']
+
+
+@bp.route('/api/validation/runs/<int:base_run_id>/diff/<int:run_id>', methods=['GET'])
+def api_diff_validation_runs(base_run_id, run_id):
+    """
+    Compare a run against a base run: new and resolved errors, score deltas,
+    status changes and newly unreachable URLs.
+    
+    ?format=json (default, paginated), csv or ndjson (streamed, all pages).
+    ?change=regressed,unreachable limits the change categories.
+    """
+    db = get_db()
+    
+    if not db.get_validation_run(base_run_id) or not db.get_validation_run(run_id):
+        return jsonify({'error': 'Validation run not found'}), 404
+    
+    output_format = request.args.get('format', 'json')
+    change = request.args.get('change')
+    query = {
+        'changes': change.split(',') if change else None,
+        'sort': request.args.get('sort', 'url_id'),
+        'order': request.args.get('order', 'asc')
+    }
+    
+    if output_format == 'json':
+        try:
+            page = db.diff_validation_runs(base_run_id, run_id, cursor=request.args.get('cursor'),
+                                           limit=_page_limit(RESULT_PAGE_SIZE), **query)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        response = {'changes': page['items'], 'next_cursor': page['next_cursor'], 'total': page['total']}
+        if not request.args.get('cursor'):
+            response['summary'] = db.get_run_diff_summary(base_run_id, run_id)
+        return jsonify(response)
+    
+    if output_format not in ('csv', 'ndjson'):
+        return jsonify({'error': 'Invalid format. Use json, csv or ndjson'}), 400
+    
+    def iter_rows():
+        cursor = None
+        while True:
+            page = db.diff_validation_runs(base_run_id, run_id, cursor=cursor, limit=MAX_PAGE_SIZE, **query)
+            yield from page['items']
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+    
+    def generate_ndjson():
+        for row in iter_rows():
+            yield json.dumps(row) + '\n'
+    
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=DIFF_CSV_FIELDS)
+        writer.writeheader()
+        for row in iter_rows():
+            row['new_errors'] = '; '.join(row['new_errors'])
+            row['resolved_errors'] = '; '.join(row['resolved_errors'])
+            writer.writerow(row)
+            if buffer.tell() > 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    
+    filename = f'diff_run_{base_run_id}_vs_{run_id}.{output_format}'
+    if output_format == 'csv':
+        body, mimetype = generate_csv(), 'text/csv'
+    else:
+        body, mimetype = generate_ndjson(), 'application/x-ndjson'
+    
+    return Response(stream_with_context(body), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+
 @bp.route('/api/validation/results/<int:run_id>', methods=['GET'])
 def api_get_validation_results(run_id):
-    """Get results for a validation run."""
+    """Get a page of results for a validation run, filtered and sorted server-side."""
     db = get_db()
-    results = db.get_validation_results(run_id)
-    return jsonify(results)
+    fields = request.args.get('fields')
+    
+    try:
+        page = db.query_validation_results(
+            run_id,
+            status=request.args.get('status'),
+            has_warnings=_bool_arg('has_warnings'),
+            min_score=request.args.get('min_score', type=float),
+            max_score=request.args.get('max_score', type=float),
+            search=request.args.get('search'),
+            tag=request.args.get('tag'),
+            sort=request.args.get('sort', 'validated_at'),
+            order=request.args.get('order', 'desc'),
+            cursor=request.args.get('cursor'),
+            limit=_page_limit(RESULT_PAGE_SIZE),
+            fields=fields.split(',') if fields else None
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'results': page['items'], 'next_cursor': page['next_cursor'], 'total': page['total']})
+
+
+@bp.route('/api/search/results/<int:run_id>', methods=['GET'])
+def api_search_results(run_id):
+    """Full-text search over a run's findings and URLs; best matches first."""
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'error': 'Missing search query'}), 400
+    
+    db = get_db()
+    fields = request.args.get('fields')
+    
+    try:
+        page = db.search_results(
+            run_id,
+            q,
+            status=request.args.get('status'),
+            has_warnings=_bool_arg('has_warnings'),
+            min_score=request.args.get('min_score', type=float),
+            max_score=request.args.get('max_score', type=float),
+            tag=request.args.get('tag'),
+            cursor=request.args.get('cursor'),
+            limit=_page_limit(RESULT_PAGE_SIZE),
+            fields=fields.split(',') if fields else None
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'results': page['items'], 'next_cursor': page['next_cursor'], 'total': page['total']})
+
+
+@bp.route('/api/validation/results/<int:run_id>/summary', methods=['GET'])
+def api_get_results_summary(run_id):
+    """Get status counts and error/warning breakdown for a validation run."""
+    db = get_db()
+    return jsonify(db.get_results_summary(run_id))
+
+
+@bp.route('/api/validation/result/<int:result_id>', methods=['GET'])
+def api_get_validation_result(result_id):
+    """Get a single validation result including its schema data."""
+    db = get_db()
+    result = db.get_validation_result(result_id)
+    
+    if not result:
+        return jsonify({'error': 'Result not found'}), 404
+    
+    return jsonify(result)
 
 
 @bp.route('/api/validation/results/<int:run_id>/download/<format>', methods=['GET'])
@@ -447,7 +781,7 @@ def api_download_results(run_id, format):
     if not results:
         return jsonify({'error': 'No results found'}), 404
     
-    generator = ReportGenerator(results)
+    generator = ReportGenerator(results, summary=db.get_run_stats(run_id))
     
     if format == 'csv':
         output_path = Config.RESULTS_DIR / f'validation_run_{run_id}.csv'
@@ -476,31 +810,64 @@ def api_get_settings():
     })
 
 
+@bp.route('/api/stats', methods=['GET'])
+def api_get_stats():
+    """Get runtime statistics for background services."""
+    return jsonify({
+        'result_writer': get_result_writer().stats(),
+        'retention': get_retention_compactor().stats(),
+        'read_cache': get_read_cache().stats(),
+        'progress': get_progress_broadcaster().stats(),
+        'runs': get_run_manager().stats()
+    })
+
+
+@bp.route('/api/retention/compact', methods=['POST'])
+def api_compact_runs():
+    """Apply retention policies now instead of at the next scheduled pass."""
+    get_retention_compactor().wake()
+    return jsonify({'message': 'Compaction scheduled'}), 202
+
+
+@bp.route('/api/stats/storage', methods=['GET'])
+def api_get_storage_stats():
+    """Get schema blob store usage and the space it saves."""
+    db = get_db()
+    return jsonify(db.get_schema_storage_stats())
+
+
+def _find_help(error_or_warning):
+    """Help content for an error or warning: an exact match, a partial one, or a generic response."""
+    # Look for exact match first
+    if error_or_warning in VALIDATION_HELP:
+        return VALIDATION_HELP[error_or_warning]
+    
+    # Try to find partial matches
+    for key, content in VALIDATION_HELP.items():
+        if error_or_warning.lower() in key.lower() or key.lower() in error_or_warning.lower():
+            return content
+    
+    # If no match found, return a generic help response
+    return {
+        'title': 'Help Information',
+        'description': f'This validation issue was detected: {error_or_warning}',
+        'fix': 'Please review your schema markup and ensure it follows the schema.org Product specification.',
+        'example': 'Refer to the schema.org Product documentation for proper implementation guidelines.',
+        'resources': [
+            'https://schema.org/Product',
+            'https://developers.google.com/search/docs/appearance/structured-data/product'
+        ]
+    }
+
+
 @bp.route('/api/help/<path:error_or_warning>')
 def get_help_content(error_or_warning):
     """Get help content for a specific error or warning type."""
     try:
-        # Look for exact match first
-        if error_or_warning in VALIDATION_HELP:
-            return jsonify(VALIDATION_HELP[error_or_warning])
-        
-        # Try to find partial matches
-        for key, content in VALIDATION_HELP.items():
-            if error_or_warning.lower() in key.lower() or key.lower() in error_or_warning.lower():
-                return jsonify(content)
-        
-        # If no match found, return a generic help response
-        return jsonify({
-            'title': 'Help Information',
-            'description': f'This validation issue was detected: {error_or_warning}',
-            'fix': 'Please review your schema markup and ensure it follows the schema.org Product specification.',
-            'example': 'Refer to the schema.org Product documentation for proper implementation guidelines.',
-            'resources': [
-                'https://schema.org/Product',
-                'https://developers.google.com/search/docs/appearance/structured-data/product'
-            ]
-        })
-        
+        # The partial-match scan runs once per distinct finding
+        return jsonify(get_read_cache().get_or_load('help', error_or_warning,
+                                                    lambda: _find_help(error_or_warning)))
+    
     except Exception as e:
         return jsonify({
             'title': 'Error',
@@ -0,0 +1,244 @@
+"""
+Registry of active validation runs.
+Tracks every running engine by run_id and splits a global browser budget
+between them with fair-share scheduling across projects.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from ..core.validator import SchemaValidator
+
+
+class FairShareScheduler:
+    """
+    Splits `capacity` browser slots between runs, weighted round-robin by project.
+    
+    Slots are handed out one at a time, each to the project that would have
+    the fewest slots per unit of weight after taking it (the project with the
+    oldest run wins ties), skipping projects at their quota and runs that
+    have all the workers they asked for. Within a project the slot goes the
+    same way by each run's boost. A run is
+    boosted while it is small (at most `small_run_urls` URLs) or interactive,
+    which multiplies its project's weight by `boost`, so a short run someone
+    is waiting on isn't starved by a long crawl.
+    """
+    
+    def __init__(self, capacity: int, small_run_urls: int = 1000, boost: float = 4.0):
+        self.capacity = capacity
+        self.small_run_urls = small_run_urls
+        self.boost = boost
+    
+    def boosted(self, run: Dict) -> bool:
+        """Whether a run gets the priority boost."""
+        return bool(run.get('interactive')) or run.get('total_urls', 0) <= self.small_run_urls
+    
+    def allocate(self, runs: List[Dict]) -> Dict[int, int]:
+        """
+        Slots per run_id. `runs` is oldest first, each with run_id, project_id,
+        requested (workers), total_urls, interactive, and the project's weight
+        and quota (0 for none).
+        """
+        shares = {run['run_id']: 0 for run in runs}
+        projects = {}
+        for order, run in enumerate(runs):
+            project = projects.setdefault(run['project_id'], {
+                'runs': [], 'order': order, 'slots': 0,
+                'weight': max(float(run.get('weight') or 1.0), 0.01), 'quota': int(run.get('quota') or 0)
+            })
+            project['runs'].append(run)
+        
+        def run_weight(run):
+            return self.boost if self.boosted(run) else 1.0
+        
+        def wanting(project):
+            if project['quota'] and project['slots'] >= project['quota']:
+                return []
+            return [run for run in project['runs'] if shares[run['run_id']] < run['requested']]
+        
+        for _ in range(self.capacity):
+            candidates = []
+            for project in projects.values():
+                project_runs = wanting(project)
+                if project_runs:
+                    candidates.append((project, project_runs))
+            if not candidates:
+                break
+            
+            # Whoever's next slot brings them least far past their weighted share
+            project, project_runs = min(candidates, key=lambda item: (
+                (item[0]['slots'] + 1) / (item[0]['weight'] * max(run_weight(run) for run in item[1])),
+                item[0]['order']
+            ))
+            run = min(project_runs, key=lambda run: (shares[run['run_id']] + 1) / run_weight(run))
+            shares[run['run_id']] += 1
+            project['slots'] += 1
+        
+        return shares
+
+
+class RunManager:
+    """
+    Active validation runs by run_id, each with its own engine and state.
+    
+    At most `max_browsers` browsers are open across all runs, split by a
+    FairShareScheduler whenever a run starts or finishes. A run whose share
+    is 0 waits until a slot frees. Per-project throughput and time spent
+    waiting for a browser are kept for monitoring.
+    """
+    
+    # Seconds of progress the throughput figures cover
+    THROUGHPUT_WINDOW = 60.0
+    
+    def __init__(self, max_browsers: int = 8, small_run_urls: int = 1000, boost: float = 4.0):
+        self.max_browsers = max_browsers
+        self.scheduler = FairShareScheduler(max_browsers, small_run_urls, boost)
+        self._runs = {}  # run_id -> run details, engine and when it started waiting, oldest first
+        self._projects = {}  # project_id -> throughput and queue wait totals
+        self._lock = threading.Lock()
+    
+    def register(self, run_id: int, project_id: int, validator: SchemaValidator, total_urls: int = 0,
+                 interactive: bool = False, weight: float = 1.0, quota: int = 0):
+        """
+        Track a run's engine and give it a share of the browser budget.
+        `weight` and `quota` are its project's share weight and browser limit.
+        """
+        with self._lock:
+            self._runs[run_id] = {
+                'run_id': run_id,
+                'project_id': project_id,
+                'validator': validator,
+                'requested': validator.concurrent_limit,
+                'total_urls': total_urls,
+                'interactive': interactive,
+                'weight': weight,
+                'quota': quota,
+                'started_at': time.time(),
+                'waiting_since': None
+            }
+            self._project(project_id)['runs'] += 1
+            self._rebalance()
+    
+    def unregister(self, run_id: int):
+        """Forget a finished run and hand its share to the others."""
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+            if run:
+                self._end_wait(run, time.time())
+                self._rebalance()
+    
+    def record_progress(self, run_id: int):
+        """Count one processed URL towards the run's project throughput."""
+        now = time.time()
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run:
+                project = self._project(run['project_id'])
+                project['processed'] += 1
+                project['recent'].append(now)
+                self._trim(project, now)
+    
+    def get(self, run_id: int) -> Optional[SchemaValidator]:
+        """Engine of an active run, or None."""
+        with self._lock:
+            run = self._runs.get(run_id)
+            return run['validator'] if run else None
+    
+    def pause(self, run_id: int) -> bool:
+        """Pause a run. Returns False if it isn't active."""
+        validator = self.get(run_id)
+        if validator:
+            validator.pause()
+        return validator is not None
+    
+    def resume(self, run_id: int) -> bool:
+        """Resume a run. Returns False if it isn't active."""
+        validator = self.get(run_id)
+        if validator:
+            validator.resume()
+        return validator is not None
+    
+    def stop(self, run_id: int) -> bool:
+        """Stop a run. Returns False if it isn't active."""
+        validator = self.get(run_id)
+        if validator:
+            validator.stop()
+        return validator is not None
+    
+    def active_runs(self) -> List[Dict]:
+        """State of every active run, oldest first."""
+        now = time.time()
+        with self._lock:
+            runs = [dict(run) for run in self._runs.values()]
+        return [
+            {
+                'run_id': run['run_id'],
+                'project_id': run['project_id'],
+                'started_at': run['started_at'],
+                'total_urls': run['total_urls'],
+                'requested_workers': run['requested'],
+                'boosted': self.scheduler.boosted(run),
+                'waiting_seconds': round(now - run['waiting_since'], 1) if run['waiting_since'] else 0.0,
+                **run['validator'].get_state()
+            }
+            for run in runs
+        ]
+    
+    def stats(self) -> Dict:
+        """Budget usage, and throughput and queue wait per project, for monitoring."""
+        now = time.time()
+        with self._lock:
+            browsers = {}
+            waiting = {}
+            for run in self._runs.values():
+                browsers[run['project_id']] = browsers.get(run['project_id'], 0) + run['validator'].worker_limit
+                if run['waiting_since']:
+                    waiting[run['project_id']] = waiting.get(run['project_id'], 0.0) + now - run['waiting_since']
+            
+            projects = {}
+            for project_id, project in self._projects.items():
+                self._trim(project, now)
+                queue_wait = project['queue_wait'] + waiting.get(project_id, 0.0)
+                projects[project_id] = {
+                    'active_runs': sum(1 for run in self._runs.values() if run['project_id'] == project_id),
+                    'browsers': browsers.get(project_id, 0),
+                    'processed': project['processed'],
+                    'urls_per_minute': round(len(project['recent']) * 60.0 / self.THROUGHPUT_WINDOW, 1),
+                    'queue_wait_seconds': round(queue_wait, 1),
+                    'avg_queue_wait_seconds': round(queue_wait / project['runs'], 1) if project['runs'] else 0.0
+                }
+            
+            return {
+                'active_runs': len(self._runs),
+                'waiting_runs': sum(1 for run in self._runs.values() if run['waiting_since']),
+                'max_browsers': self.max_browsers,
+                'allocated_browsers': sum(browsers.values()),
+                'projects': projects
+            }
+    
+    def _project(self, project_id: int) -> Dict:
+        return self._projects.setdefault(project_id, {'runs': 0, 'processed': 0, 'recent': deque(), 'queue_wait': 0.0})
+    
+    def _trim(self, project: Dict, now: float):
+        recent = project['recent']
+        while recent and recent[0] < now - self.THROUGHPUT_WINDOW:
+            recent.popleft()
+    
+    def _end_wait(self, run: Dict, now: float):
+        if run['waiting_since']:
+            self._project(run['project_id'])['queue_wait'] += now - run['waiting_since']
+            run['waiting_since'] = None
+    
+    def _rebalance(self):
+        """Reallocate the budget across runs; caller holds the lock."""
+        now = time.time()
+        shares = self.scheduler.allocate(list(self._runs.values()))
+        for run_id, share in shares.items():
+            run = self._runs[run_id]
+            run['validator'].set_worker_limit(share)
+            if share:
+                self._end_wait(run, now)
+            elif not run['waiting_since']:
+                run['waiting_since'] = now
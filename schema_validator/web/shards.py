@@ -0,0 +1,571 @@
+"""
+Per-run shard files for the SQLite store.
+Each run's results live in a database file of their own, so deleting or
+archiving a run is a file operation instead of a large DELETE.
+"""
+
+import os
+import shutil
+import sqlite3
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .database import Database
+
+
+class ShardedDatabase(Database):
+    """
+    SQLite store that writes each new run's results to runs/run_<id>.db next
+    to the main database.
+    
+    The main database keeps projects, URLs, runs, counters, url_latest_result
+    and compacted score history. A shard holds one run's validation_results,
+    their schema_blobs and their findings_fts index, and is ATTACHed as
+    `run_<id>` by whichever connection reads it. Result ids in a shard start
+    at run_id << 32, so a result id alone names its shard. Runs created before
+    sharding was switched on keep their results in the main database and are
+    read from there.
+    
+    Cross-run queries read the TEMP VIEW run_results, a UNION ALL of the main
+    results, the score history and the attached shards (see _union_rows).
+    """
+    
+    # SQLite attaches at most 10 databases to a connection
+    MAX_ATTACHED = 8
+    RESULT_ID_BITS = 32
+    
+    SHARD_INDEXES = {
+        'idx_results_url': 'url_id',
+        'idx_results_run_url': 'run_id, url_id',
+        'idx_results_run_validated': 'run_id, validated_at',
+        'idx_results_run_score': 'run_id, score',
+        'idx_results_run_status': 'run_id, status',
+        'idx_results_run_response': 'run_id, response_time',
+    }
+    
+    def __init__(self, db_path: Optional[Path] = None):
+        super().__init__(db_path)
+        self.shard_dir = Path(self.db_path).resolve().parent / 'runs'
+        self.archive_dir = Path(self.db_path).resolve().parent / 'archive'
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+    
+    def shard_path(self, run_id: int) -> Path:
+        """Path of a run's shard file, whether or not it exists."""
+        return self.shard_dir / f'run_{int(run_id)}.db'
+    
+    def _create_shard(self, run_id: int):
+        """Create an empty shard for a run. It appears under its final name only once complete."""
+        path = self.shard_path(run_id)
+        building = path.with_name(path.name + '.tmp')
+        building.unlink(missing_ok=True)
+        
+        conn = sqlite3.connect(building)
+        try:
+            conn.execute('PRAGMA journal_mode = WAL')
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TABLE validation_results (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_id INTEGER NOT NULL,
+                    url_id INTEGER NOT NULL,
+                    status TEXT DEFAULT 'pending',
+                    schema_data TEXT,
+                    errors TEXT,
+                    warnings TEXT,
+                    score REAL DEFAULT 0.0,
+                    validated_at TEXT NOT NULL,
+                    response_time REAL DEFAULT 0.0,
+                    has_warnings BOOLEAN DEFAULT 0,
+                    schema_hash TEXT
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE schema_blobs (
+                    hash TEXT PRIMARY KEY,
+                    data BLOB NOT NULL,
+                    raw_size INTEGER NOT NULL,
+                    stored_size INTEGER NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+            ''')
+            for name, columns in self.SHARD_INDEXES.items():
+                cursor.execute(f'CREATE INDEX {name} ON validation_results({columns})')
+            cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('validation_results', ?)",
+                           (int(run_id) << self.RESULT_ID_BITS,))
+            self._create_search(cursor, ['findings_fts'])
+            conn.commit()
+        finally:
+            conn.close()
+        
+        os.replace(building, path)
+    
+    def _remove_shard(self, path: Path, archive_to: Optional[Path] = None):
+        """Delete a shard file, or move it to `archive_to`, with its WAL files."""
+        # Idle pooled connections may still have it attached
+        self.pool.close_all()
+        
+        if archive_to:
+            conn = sqlite3.connect(path)
+            try:
+                conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                conn.execute('PRAGMA journal_mode = DELETE')
+            except sqlite3.OperationalError:
+                # Still attached elsewhere; its WAL moves along with it
+                pass
+            finally:
+                conn.close()
+            shutil.move(str(path), str(archive_to))
+            wal = Path(f'{path}-wal')
+            if wal.exists() and wal.stat().st_size:
+                shutil.move(str(wal), f'{archive_to}-wal')
+        
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            Path(f'{path}{suffix}').unlink(missing_ok=True)
+    
+    def _attach_runs(self, cursor: sqlite3.Cursor, run_ids: Iterable[int]) -> Dict[int, str]:
+        """
+        Attach the shards of the given runs, detaching shards that were deleted
+        since, and others as needed to stay within MAX_ATTACHED. Runs without a
+        shard map to '' (the main database). Must be called outside a transaction.
+        """
+        run_ids = list(dict.fromkeys(run_ids))
+        wanted = {f'run_{int(run_id)}': run_id for run_id in run_ids if self.shard_path(run_id).exists()}
+        if len(wanted) > self.MAX_ATTACHED:
+            raise ValueError(f'Cannot attach more than {self.MAX_ATTACHED} run shards at once')
+        
+        cursor.execute('PRAGMA database_list')
+        attached = {row[1]: row[2] for row in cursor.fetchall() if row[1].startswith('run_')}
+        missing = [name for name in wanted if name not in attached]
+        
+        for name, file in list(attached.items()):
+            if name in wanted:
+                continue
+            if not os.path.exists(file) or len(attached) + len(missing) > self.MAX_ATTACHED:
+                cursor.execute(f'DETACH DATABASE {name}')
+                del attached[name]
+        
+        schemas = {run_id: '' for run_id in run_ids}
+        for name, run_id in wanted.items():
+            if name not in attached:
+                try:
+                    # mode=rw: a shard deleted since the check above fails instead of being recreated empty
+                    cursor.execute(f'ATTACH DATABASE ? AS {name}', (self.shard_path(run_id).as_uri() + '?mode=rw',))
+                except sqlite3.OperationalError:
+                    if self.shard_path(run_id).exists():
+                        raise
+                    continue
+                # synchronous is per database; match the main one's
+                cursor.execute(f'PRAGMA {name}.synchronous = NORMAL')
+            schemas[run_id] = f'{name}.'
+        return schemas
+    
+    def _result_schema(self, cursor: sqlite3.Cursor, result_id: int) -> Optional[str]:
+        run_id = int(result_id) >> self.RESULT_ID_BITS
+        if not run_id:
+            return ''
+        return self._attach_runs(cursor, [run_id])[run_id] or None
+    
+    def _shard_runs(self, cursor: sqlite3.Cursor, project_id: Optional[int] = None,
+                    by_project: bool = False) -> List[int]:
+        """Ids of runs with a shard file, newest first, optionally only a project's."""
+        if by_project:
+            cursor.execute('SELECT id FROM validation_runs WHERE project_id IS ? ORDER BY id DESC', (project_id,))
+        else:
+            cursor.execute('SELECT id FROM validation_runs ORDER BY id DESC')
+        return [row[0] for row in cursor.fetchall() if self.shard_path(row[0]).exists()]
+    
+    def _union_rows(self, cursor: sqlite3.Cursor, run_ids: List[int], sql: str, values) -> List[sqlite3.Row]:
+        """
+        Run `sql` against the TEMP VIEW run_results (url_id, run_id, status,
+        score, response_time, validated_at): every full result, in the main
+        database or a shard, and the compacted score history of runs whose
+        results are gone (a shard outlives the history written from it until
+        it is retired; a main-database compaction deletes results gradually).
+        
+        Shards are attached MAX_ATTACHED at a time and the query runs once per
+        batch, so aggregates must be merged by the caller; the first batch also
+        covers the main database's tables.
+        """
+        columns = 'url_id, run_id, status, score, response_time, validated_at'
+        sharded = ', '.join(str(int(run_id)) for run_id in run_ids)
+        rows = []
+        try:
+            for start in range(0, max(len(run_ids), 1), self.MAX_ATTACHED):
+                schemas = self._attach_runs(cursor, run_ids[start:start + self.MAX_ATTACHED])
+                selects = [f'SELECT {columns} FROM {schema}validation_results'
+                           for schema in schemas.values() if schema]
+                if start == 0:
+                    selects += [f'SELECT {columns} FROM main.validation_results',
+                                f'''SELECT {columns} FROM main.url_score_history h
+                                    WHERE run_id NOT IN ({sharded})
+                                      AND NOT EXISTS (SELECT 1 FROM main.validation_results r
+                                                      WHERE r.run_id = h.run_id AND r.url_id = h.url_id)''']
+                elif not selects:
+                    continue
+                cursor.execute('DROP VIEW IF EXISTS temp.run_results')
+                cursor.execute('CREATE TEMP VIEW run_results AS ' + ' UNION ALL '.join(selects))
+                cursor.execute(sql, values)
+                rows.extend(cursor.fetchall())
+        finally:
+            cursor.execute('DROP VIEW IF EXISTS temp.run_results')
+        return rows
+    
+    # Runs
+    def create_validation_run(self, project_id: int = None, total_urls: int = 0, settings: Dict = None) -> int:
+        """Create a new validation run and its shard file."""
+        run_id = super().create_validation_run(project_id, total_urls, settings)
+        self._create_shard(run_id)
+        return run_id
+    
+    def delete_validation_run(self, run_id: int):
+        """Delete a validation run by deleting its shard file."""
+        path = self.shard_path(run_id)
+        if not path.exists():
+            return super().delete_validation_run(run_id)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            run_ids = [other for other in self._shard_runs(cursor) if other != run_id]
+            batches = [run_ids[start:start + self.MAX_ATTACHED] for start in range(0, len(run_ids), self.MAX_ATTACHED)]
+            schemas = self._attach_runs(cursor, batches[0] if batches else [])
+            cursor.execute('DROP TABLE IF EXISTS temp.restore_urls')
+            cursor.execute('CREATE TEMP TABLE restore_urls (url_id INTEGER PRIMARY KEY)')
+            
+            # URLs whose latest result was in this run fall back to their newest remaining
+            # one, as latest_result_delete does for the main database: the main tables and
+            # the newest shards in the same transaction as the delete, older shards after
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('INSERT INTO temp.restore_urls SELECT url_id FROM url_latest_result WHERE run_id = ?',
+                           (run_id,))
+            # The run's counters go with it (counters_runs_delete)
+            cursor.execute('DELETE FROM validation_runs WHERE id = ?', (run_id,))
+            cursor.execute('DELETE FROM url_latest_result WHERE run_id = ?', (run_id,))
+            cursor.execute(f'''
+                INSERT INTO url_latest_result (url_id, result_id, run_id, status, score, errors, validated_at)
+                SELECT url_id, result_id, run_id, status, score, errors, validated_at FROM (
+                    SELECT *, ROW_NUMBER() OVER (
+                        PARTITION BY url_id ORDER BY validated_at DESC, result_id DESC
+                    ) AS position FROM (
+                        SELECT url_id, id AS result_id, run_id, status, score, errors, validated_at
+                        FROM main.validation_results WHERE url_id IN (SELECT url_id FROM temp.restore_urls)
+                        UNION ALL
+                        SELECT url_id, NULL, run_id, status, score, NULL, validated_at
+                        FROM url_score_history WHERE url_id IN (SELECT url_id FROM temp.restore_urls)
+                    )
+                ) WHERE position = 1 AND url_id IN (SELECT id FROM urls)
+                {self.LATEST_UPSERT_SQL}
+            ''')
+            self._restore_latest_results(cursor, schemas)
+            conn.commit()
+            
+            for batch in batches[1:]:
+                cursor.execute('SELECT 1 FROM temp.restore_urls LIMIT 1')
+                if cursor.fetchone() is None:
+                    break
+                schemas = self._attach_runs(cursor, batch)
+                cursor.execute('BEGIN IMMEDIATE')
+                self._restore_latest_results(cursor, schemas)
+                conn.commit()
+            cursor.execute('DROP TABLE temp.restore_urls')
+        finally:
+            conn.close()
+        
+        self._remove_shard(path)
+    
+    # Keeps whichever of the stored and offered latest results is newer
+    LATEST_UPSERT_SQL = '''ON CONFLICT (url_id) DO UPDATE SET
+                    result_id = excluded.result_id, run_id = excluded.run_id, status = excluded.status,
+                    score = excluded.score, errors = excluded.errors, validated_at = excluded.validated_at
+                WHERE excluded.validated_at >= url_latest_result.validated_at'''
+    
+    def _restore_latest_results(self, cursor: sqlite3.Cursor, schemas: Dict[int, str]):
+        """
+        Offer each URL in temp.restore_urls its newest result in the given shards,
+        newest run first; a URL's search ends at the first shard holding a result for it.
+        """
+        for run_id, schema in sorted(schemas.items(), reverse=True):
+            if not schema:
+                continue
+            # Bare columns come from the row holding MAX(validated_at)
+            cursor.execute(f'''
+                INSERT INTO url_latest_result (url_id, result_id, run_id, status, score, errors, validated_at)
+                SELECT url_id, id, run_id, status, score, errors, MAX(validated_at)
+                FROM {schema}validation_results
+                WHERE url_id IN (SELECT url_id FROM temp.restore_urls) AND url_id IN (SELECT id FROM urls)
+                GROUP BY url_id
+                {self.LATEST_UPSERT_SQL}
+            ''')
+            cursor.execute(f'''
+                DELETE FROM temp.restore_urls WHERE url_id IN (SELECT url_id FROM {schema}validation_results)
+            ''')
+    
+    def delete_project(self, project_id: int):
+        """Delete a project, its URLs and its runs' shard files."""
+        conn = self.get_connection()
+        run_ids = self._shard_runs(conn.cursor(), project_id, by_project=True)
+        conn.close()
+        
+        super().delete_project(project_id)
+        for run_id in run_ids:
+            self._remove_shard(self.shard_path(run_id))
+    
+    # Results
+    def add_validation_result(self, run_id: int, url_id: int, result: Dict) -> int:
+        """Add a validation result."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            schema = self._attach_runs(cursor, [run_id])[run_id]
+            if not schema:
+                return super().add_validation_result(run_id, url_id, result)
+            cursor.execute('BEGIN IMMEDIATE')
+            last_id = self._write_shard(cursor, run_id, schema, [(url_id, result)])
+            conn.commit()
+            return last_id + 1
+        finally:
+            conn.close()
+    
+    def write_results_batch(self, results: List[tuple], progress: Dict[int, int] = None):
+        """
+        Insert many (run_id, url_id, result) tuples and apply processed_urls
+        updates for their runs in a single transaction over the main database
+        and the runs' shards, so a batch that fails can be written again whole.
+        
+        A batch spanning more sharded runs than can be attached at once is
+        written in groups of runs, one transaction each. If a later group
+        fails, the error's `committed_runs` names the runs already written,
+        for a retry to leave out.
+        """
+        by_run = {}
+        for run_id, url_id, result in results:
+            by_run.setdefault(run_id, []).append((url_id, result))
+        progress = progress or {}
+        
+        sharded = [run_id for run_id in by_run if self.shard_path(run_id).exists()]
+        groups = [sharded[start:start + self.MAX_ATTACHED]
+                  for start in range(0, len(sharded), self.MAX_ATTACHED)] or [[]]
+        # The main database's rows and progress go with the first group
+        unsharded = {run_id for run_id in list(by_run) + list(progress) if run_id not in sharded}
+        committed = set()
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            for number, group in enumerate(groups):
+                runs = set(group) | (unsharded if number == 0 else set())
+                rows = [(run_id, url_id, result) for run_id in runs - set(group)
+                        for url_id, result in by_run.get(run_id, [])]
+                schemas = self._attach_runs(cursor, group)
+                try:
+                    cursor.execute('BEGIN IMMEDIATE')
+                    for run_id in group:
+                        if schemas[run_id]:
+                            self._write_shard(cursor, run_id, schemas[run_id], by_run[run_id])
+                        else:
+                            # Its shard was retired since the check above
+                            rows.extend((run_id, url_id, result) for url_id, result in by_run[run_id])
+                    self._write_results(cursor, rows, {run_id: progress[run_id] for run_id in runs if run_id in progress})
+                    conn.commit()
+                except Exception as e:
+                    if committed:
+                        e.committed_runs = committed
+                    raise
+                committed |= runs
+        finally:
+            conn.close()
+    
+    def _write_shard(self, cursor: sqlite3.Cursor, run_id: int, schema: str, items: List[tuple]) -> int:
+        """
+        Insert (url_id, result) pairs into an attached shard and do the work the
+        main database's result triggers would: run counters and url_latest_result.
+        Runs in the caller's transaction. Returns the last id before the batch.
+        """
+        values = [self._result_values(run_id, url_id, result) for url_id, result in items]
+        
+        deltas = Counter()
+        for row, blob in values:
+            deltas['results'] += 1
+            deltas['results:' + (row[2] or '')] += 1
+            deltas['score_sum'] += row[6] or 0
+            deltas['schema_found'] += blob is not None
+        
+        cursor.execute(f"SELECT seq FROM {schema}sqlite_sequence WHERE name = 'validation_results'")
+        last_id = cursor.fetchone()[0]
+        
+        self._store_blobs(cursor, [blob for _, blob in values], schema)
+        cursor.executemany(f'''
+            INSERT INTO {schema}validation_results
+            (run_id, url_id, status, schema_hash, errors, warnings, score, validated_at, response_time, has_warnings)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [row for row, _ in values])
+        
+        # In name order, so concurrent writers lock counter rows in the same order
+        cursor.executemany('''
+            INSERT INTO counters (scope, scope_id, name, value) VALUES ('run', ?, ?, ?)
+            ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = value + excluded.value
+        ''', [(run_id, name, value) for name, value in sorted(deltas.items())])
+        
+        # In id order, so a URL validated twice in the batch ends on its later result
+        cursor.execute(f'''
+            INSERT INTO url_latest_result (url_id, result_id, run_id, status, score, errors, validated_at)
+            SELECT url_id, id, run_id, status, score, errors, validated_at FROM {schema}validation_results
+            WHERE id > ? AND url_id IN (SELECT id FROM urls) ORDER BY id
+            {self.LATEST_UPSERT_SQL}
+        ''', (last_id,))
+        return last_id
+    
+    def _search_source(self, index: str, terms: List[tuple], run_id: int = None, schema: str = '') -> tuple:
+        # Each shard has its own findings index; there is none spanning runs to search
+        if index == 'findings' and run_id is None:
+            raise ValueError('Findings can only be searched within a run when runs are kept in shard files')
+        return super()._search_source(index, terms, run_id, schema)
+    
+    # Cross-run history
+    def get_url_history(self, project_id: int) -> Dict[int, Dict]:
+        """Get average response time and last validation time per URL in a project."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            rows = self._union_rows(cursor, self._shard_runs(cursor, project_id, by_project=True), '''
+                SELECT r.url_id,
+                       SUM(CASE WHEN r.response_time > 0 THEN r.response_time END) AS response_time_sum,
+                       COUNT(CASE WHEN r.response_time > 0 THEN 1 END) AS response_count,
+                       MAX(r.validated_at) AS last_validated_at
+                FROM run_results r JOIN urls u ON r.url_id = u.id
+                WHERE u.project_id = ?
+                GROUP BY r.url_id
+            ''', (project_id,))
+        finally:
+            conn.close()
+        
+        totals = {}
+        for row in rows:
+            total = totals.setdefault(row['url_id'], [0.0, 0, None])
+            total[0] += row['response_time_sum'] or 0.0
+            total[1] += row['response_count']
+            if total[2] is None or (row['last_validated_at'] or '') > total[2]:
+                total[2] = row['last_validated_at']
+        
+        return {url_id: {'url_id': url_id, 'avg_response_time': time_sum / count if count else None,
+                         'last_validated_at': last_validated_at}
+                for url_id, (time_sum, count, last_validated_at) in totals.items()}
+    
+    def get_url_score_history(self, url_id: int, limit: int = 100) -> List[Dict]:
+        """Score history for a URL across full and compacted runs, newest first."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('SELECT project_id FROM urls WHERE id = ?', (url_id,))
+            row = cursor.fetchone()
+            run_ids = self._shard_runs(cursor, row['project_id'], by_project=True) if row else []
+            rows = self._union_rows(cursor, run_ids, '''
+                SELECT run_id, status, score, response_time, validated_at FROM run_results
+                WHERE url_id = ? ORDER BY validated_at DESC LIMIT ?
+            ''', (url_id, limit))
+        finally:
+            conn.close()
+        
+        rows = sorted((dict(row) for row in rows), key=lambda row: row['validated_at'], reverse=True)
+        return rows[:limit]
+    
+    # Retention and archival
+    def compact_validation_run(self, run_id: int, batch_size: int = 5000) -> int:
+        """
+        Replace a run's results with a summary row and per-URL score history.
+        A sharded run's results go in one step, by deleting its shard file.
+        """
+        if not self.shard_path(run_id).exists():
+            return super().compact_validation_run(run_id, batch_size)
+        return self._retire_shard(run_id)
+    
+    def archive_validation_run(self, run_id: int) -> str:
+        """Compact a run like compact_validation_run, moving its shard file to archive/."""
+        run = self.get_validation_run(run_id)
+        if not run:
+            raise ValueError(f'Validation run {run_id} not found')
+        if run['status'] in ('running', 'paused', 'pending'):
+            raise ValueError('Only finished runs can be archived')
+        if not self.shard_path(run_id).exists():
+            raise ValueError(f'Validation run {run_id} has no shard file to archive')
+        
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        archive_path = self.archive_dir / self.shard_path(run_id).name
+        self._retire_shard(run_id, archive_path)
+        return str(archive_path)
+    
+    def _retire_shard(self, run_id: int, archive_to: Optional[Path] = None) -> int:
+        """Compact a sharded run, then delete or archive its shard. Returns the number of results it held."""
+        self._write_compacted_summary(run_id)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        schema = self._attach_runs(cursor, [run_id])[run_id]
+        cursor.execute(f'SELECT COUNT(*) FROM {schema}validation_results WHERE run_id = ?', (run_id,))
+        removed = cursor.fetchone()[0]
+        # Latest results in the shard fall back to the score history rows just written,
+        # as the latest_result_delete trigger does for compacted results in the main database
+        cursor.execute('UPDATE url_latest_result SET result_id = NULL, errors = NULL WHERE run_id = ?', (run_id,))
+        cursor.execute('UPDATE validation_runs SET compacted_at = ? WHERE id = ?',
+                       (datetime.now().isoformat(), run_id))
+        conn.commit()
+        conn.close()
+        
+        self._remove_shard(self.shard_path(run_id), archive_to)
+        return removed
+    
+    def rebuild_counters(self):
+        """Recompute the aggregate counters from scratch (repair tool), including sharded runs'."""
+        super().rebuild_counters()
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            run_ids = self._shard_runs(cursor)
+            for start in range(0, len(run_ids), self.MAX_ATTACHED):
+                for run_id, schema in self._attach_runs(cursor, run_ids[start:start + self.MAX_ATTACHED]).items():
+                    if not schema:
+                        continue
+                    cursor.execute(f'''
+                        INSERT INTO counters (scope, scope_id, name, value)
+                        SELECT 'run', run_id, 'results', COUNT(*) FROM {schema}validation_results GROUP BY 2
+                        UNION ALL
+                        SELECT 'run', run_id, 'results:' || COALESCE(status, ''), COUNT(*)
+                        FROM {schema}validation_results GROUP BY 2, 3
+                        UNION ALL
+                        SELECT 'run', run_id, 'score_sum', COALESCE(SUM(score), 0)
+                        FROM {schema}validation_results GROUP BY 2
+                        UNION ALL
+                        SELECT 'run', run_id, 'schema_found', SUM(schema_hash IS NOT NULL)
+                        FROM {schema}validation_results GROUP BY 2
+                    ''')
+                conn.commit()
+        finally:
+            conn.close()
+    
+    def collect_orphans(self, batch_size: int = 5000, pause: float = 0.05,
+                        should_stop=None) -> Dict[str, int]:
+        """Database.collect_orphans, plus shard files whose run was deleted or compacted."""
+        removed = super().collect_orphans(batch_size, pause, should_stop)
+        
+        # Listed before reading the runs: a shard only appears after its run row
+        shards = {int(path.stem[len('run_'):]): path for path in self.shard_dir.glob('run_*.db')
+                  if path.stem[len('run_'):].isdigit()}
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT id FROM validation_runs WHERE compacted_at IS NULL')
+        live = {row[0] for row in cursor.fetchall()}
+        conn.close()
+        
+        stale = [path for run_id, path in shards.items() if run_id not in live]
+        for path in stale:
+            self._remove_shard(path)
+        if stale:
+            removed['shard_files'] = len(stale)
+        return removed
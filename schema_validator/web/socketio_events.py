@@ -2,114 +2,74 @@
 SocketIO event handlers for real-time validation updates.
 """
 
-import asyncio
-from datetime import datetime
-from flask_socketio import emit
+from flask_socketio import emit, join_room, leave_room
 
-from .app import socketio, get_db
-from ..core.validator import SchemaValidator
+from .app import (socketio, get_db, get_result_writer, get_retention_compactor, get_progress_broadcaster,
+                  get_run_manager)
+from .progress import run_room
+from .validation import run_validation
+from .worker import ValidationWorker
 
 
-# Global validator instance for state management
-current_validator = None
+def notify_run(event, payload):
+    """Announce a run's completion or failure to its followers."""
+    socketio.emit(event, payload, to=run_room(payload['run_id']))
+    if event == 'validation_complete':
+        # A new run may push an older one past the project's retention limit
+        get_retention_compactor().wake()
 
 
 def start_validation_task(run_id, urls, settings):
     """Background task to run validation with real-time updates."""
-    global current_validator
-    
-    db = get_db()
-    
-    # Extract URLs from url objects
-    url_list = [url_obj['url'] for url_obj in urls]
-    url_id_map = {url_obj['url']: url_obj['id'] for url_obj in urls}
-    
-    # Create validator with progress callback
-    def progress_callback(data):
-        """Emit progress updates via SocketIO."""
-        try:
-            # Update database
-            processed = data['processed']  # Use processed count, not progress percentage
-            db.update_validation_run(run_id, processed_urls=processed)
-            
-            # Save result to database
-            url = data['url']
-            url_id = url_id_map.get(url)
-            if url_id and data['result'] is not None:
-                db.add_validation_result(run_id, url_id, data['result'])
-            elif url_id and data['result'] is None:
-                # Handle failed validation
-                db.add_validation_result(run_id, url_id, {
-                    'status': 'error',
-                    'error': 'Failed to validate URL',
-                    'score': 0.0
-                })
-            
-            # Emit to clients
-            socketio.emit('validation_progress', {
-                'run_id': run_id,
-                'url': url,
-                'result': data['result'],
-                'progress': data['progress'],
-                'processed': processed,
-                'total': data['total']
-            })
-        except Exception as e:
-            print(f"Error in progress callback: {e}")
-            # Emit error to clients
-            socketio.emit('validation_error', {
-                'run_id': run_id,
-                'error': f'Progress callback error: {str(e)}'
-            })
-    
-    # Create original working validator
-    current_validator = SchemaValidator(
-        headless=settings.get('headless', True),
-        timeout=settings.get('timeout', 30000),
-        delay_range=(settings.get('delay_min', 2), settings.get('delay_max', 5)),
-        max_retries=settings.get('max_retries', 1),
-        concurrent_limit=settings.get('concurrent_limit', 3),
-        progress_callback=progress_callback
-    )
-    
-    # Run validation
-    try:
-        # Create event loop for async execution
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        results = loop.run_until_complete(current_validator.validate_urls_async(url_list))
-        
-        # Update run status
-        db.update_validation_run(
-            run_id,
-            status='completed',
-            end_time=datetime.now().isoformat()
-        )
-        
-        # Emit completion
-        socketio.emit('validation_complete', {
-            'run_id': run_id,
-            'total_results': len(results),
-            'message': 'Validation completed successfully'
-        })
-        
-    except Exception as e:
-        # Update run status to failed
-        db.update_validation_run(
-            run_id,
-            status='failed',
-            end_time=datetime.now().isoformat()
-        )
+    run_validation(run_id, urls, settings, get_db(), get_result_writer(), get_run_manager(),
+                   get_progress_broadcaster(), notify_run)
+
+
+def start_validation(run_id, urls, settings):
+    """Start a run in the validation worker process if there is one, otherwise in a background task."""
+    runs = get_run_manager()
+    if isinstance(runs, ValidationWorker):
+        runs.start_run(run_id, urls, settings)
+    else:
+        socketio.start_background_task(start_validation_task, run_id, urls, settings)
+
+
+def control_run(run_id, action):
+    """
+    Pause, resume or stop an active run and record it. Every client following
+    the run is told. Returns False if the run isn't active.
+    """
+    runs = get_run_manager()
+    if action == 'pause':
+        if not runs.pause(run_id):
+            return False
+        get_db().set_validation_run_paused(run_id, True)
+        socketio.emit('validation_paused', {'run_id': run_id, 'message': 'Validation paused'}, to=run_room(run_id))
+    elif action == 'resume':
+        if not runs.resume(run_id):
+            return False
+        get_db().set_validation_run_paused(run_id, False)
+        socketio.emit('validation_resumed', {'run_id': run_id, 'message': 'Validation resumed'}, to=run_room(run_id))
+    elif action == 'stop':
+        # Cancels in-flight navigations; the engine unwinds within its stop timeout
+        if not runs.stop(run_id):
+            return False
         
-        # Emit error
-        socketio.emit('validation_error', {
-            'run_id': run_id,
-            'error': str(e)
-        })
-    
-    finally:
-        current_validator = None
+        # Record the stop now so it survives even if the engine is slow to unwind
+        get_db().finish_validation_run(run_id, 'stopped')
+        socketio.emit('validation_stopped', {'run_id': run_id, 'message': 'Validation stopped'}, to=run_room(run_id))
+    else:
+        raise ValueError(f'Unknown run action: {action}')
+    return True
+
+
+def _control(data, action):
+    """Apply a control event, answering the sender if it names no active run."""
+    run_id = (data or {}).get('run_id')
+    if not isinstance(run_id, int):
+        emit('error', {'message': 'run_id is required'})
+    elif not control_run(run_id, action):
+        emit('error', {'message': f'No active validation to {action}'})
 
 
 @socketio.on('connect')
@@ -125,55 +85,63 @@ def handle_disconnect():
     print('Client disconnected')
 
 
+@socketio.on('join_run')
+def handle_join_run(data):
+    """Follow a run's progress; the client gets its latest counters right away."""
+    run_id = (data or {}).get('run_id')
+    if not isinstance(run_id, int):
+        emit('error', {'message': 'run_id is required'})
+        return
+    
+    join_room(run_room(run_id))
+    snapshot = get_progress_broadcaster().snapshot(run_id)
+    if snapshot:
+        emit('validation_progress', snapshot)
+
+
+@socketio.on('leave_run')
+def handle_leave_run(data):
+    """Stop following a run's progress."""
+    run_id = (data or {}).get('run_id')
+    if isinstance(run_id, int):
+        leave_room(run_room(run_id))
+
+
 @socketio.on('pause_validation')
-def handle_pause_validation():
+def handle_pause_validation(data=None):
     """Handle pause validation request."""
-    global current_validator
-    if current_validator:
-        current_validator.state.pause()
-        emit('validation_paused', {'message': 'Validation paused'})
-    else:
-        emit('error', {'message': 'No active validation to pause'})
+    _control(data, 'pause')
 
 
 @socketio.on('resume_validation')
-def handle_resume_validation():
+def handle_resume_validation(data=None):
     """Handle resume validation request."""
-    global current_validator
-    if current_validator:
-        current_validator.state.resume()
-        emit('validation_resumed', {'message': 'Validation resumed'})
-    else:
-        emit('error', {'message': 'No active validation to resume'})
+    _control(data, 'resume')
 
 
 @socketio.on('stop_validation')
-def handle_stop_validation():
+def handle_stop_validation(data=None):
     """Handle stop validation request."""
-    global current_validator
-    if current_validator:
-        current_validator.stop()
-        
-        # Update run status in database
-        db = get_db()
-        # Note: We'd need to track the current run_id, but for now we'll let the task handle cleanup
-        
-        emit('validation_stopped', {'message': 'Validation stopped'})
-    else:
-        emit('error', {'message': 'No active validation to stop'})
+    _control(data, 'stop')
 
 
 @socketio.on('get_validation_state')
-def handle_get_validation_state():
-    """Get current validation state."""
-    global current_validator
-    if current_validator:
-        state = current_validator.get_state()
+def handle_get_validation_state(data=None):
+    """Get a run's validation state, or every active run's without a run_id."""
+    run_id = (data or {}).get('run_id')
+    runs = get_run_manager()
+    if run_id is None:
+        emit('validation_state', {'runs': runs.active_runs()})
+        return
+    
+    # From active_runs, which the validation worker process reports too
+    state = next((run for run in runs.active_runs() if run['run_id'] == run_id), None)
+    if state:
         emit('validation_state', state)
     else:
         emit('validation_state', {
+            'run_id': run_id,
             'is_running': False,
             'is_paused': False,
             'should_stop': False
         })
-
@@ -0,0 +1,404 @@
+"""
+Storage interface for Schema Validator.
+Routes, socket handlers and background workers depend on Storage; open_storage()
+picks the SQLite or PostgreSQL implementation from the configured database URL.
+"""
+
+import re
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from ..config import Config
+
+
+class Storage(ABC):
+    """
+    Everything the app reads from and writes to its database.
+    
+    Implementations raise their driver's errors; `IntegrityError` and
+    `OperationalError` name the classes to catch for a constraint violation
+    (e.g. a duplicate URL) and for a lock or connection problem.
+    """
+    
+    IntegrityError = Exception
+    OperationalError = Exception
+    
+    HEALTH_GROUPS = ('success', 'warning', 'error', 'blocked', 'never')
+    
+    @staticmethod
+    def split_tags(tags) -> List[str]:
+        """Normalize a comma-separated string or list of tags into unique, trimmed names."""
+        if isinstance(tags, str):
+            tags = tags.split(',')
+        names = {}
+        for tag in tags or []:
+            tag = str(tag).strip()
+            if tag:
+                names.setdefault(tag.lower(), tag)
+        return list(names.values())
+    
+    @classmethod
+    def normalize_run_scope(cls, scope: Optional[Dict]) -> Dict:
+        """
+        Validate a run scope and drop empty criteria.
+        
+        Criteria are combined with AND; list values match any entry:
+          last_status  health groups of the latest result ('error', 'blocked', 'warning', ...)
+          finding      text contained in the latest result's errors or warnings
+          tags         URL tags
+          stale_days   not validated in the last N days (or never)
+          url_pattern  glob matched against the URL, e.g. '*/products/*'
+          changed      sitemap lastmod newer than the last validation
+        """
+        scope = scope or {}
+        normalized = {}
+        
+        statuses = scope.get('last_status') or []
+        if isinstance(statuses, str):
+            statuses = [statuses]
+        for status in statuses:
+            if status not in cls.HEALTH_GROUPS:
+                raise ValueError(f'Invalid last_status: {status}')
+        if statuses:
+            normalized['last_status'] = list(dict.fromkeys(statuses))
+        
+        tags = cls.split_tags(scope.get('tags'))
+        if tags:
+            normalized['tags'] = tags
+        
+        for key in ('finding', 'url_pattern'):
+            value = (scope.get(key) or '').strip()
+            if value:
+                normalized[key] = value
+        
+        if scope.get('stale_days') not in (None, ''):
+            try:
+                stale_days = int(scope['stale_days'])
+            except (TypeError, ValueError):
+                raise ValueError('stale_days must be a whole number of days')
+            if stale_days < 0:
+                raise ValueError('stale_days must not be negative')
+            normalized['stale_days'] = stale_days
+        
+        if scope.get('changed'):
+            normalized['changed'] = True
+        
+        return normalized
+    
+    # Full-text search fields, by index: a URL's own text, and its results' findings
+    SEARCH_FIELDS = {'url': ('url', 'tags', 'notes'), 'findings': ('errors', 'warnings')}
+    SEARCH_TERM = re.compile(r'(?:(\w+):)?(?:"([^"]*)"?|(\S+))')
+    
+    @classmethod
+    def parse_search(cls, query: str, default: str = 'url') -> Dict[str, List[tuple]]:
+        """
+        Split a search box query into terms per index, as {'url': [...],
+        'findings': [...]} lists of (field, words, prefix).
+        
+        Terms are ANDed. A bare term searches the `default` index's fields;
+        `url:`, `tags:`, `notes:`, `errors:` and `warnings:` narrow it to one
+        field, `findings:` to errors and warnings. Words are letters and digits
+        only; the last word of an unquoted term matches as a prefix, a
+        "quoted phrase" matches exactly.
+        """
+        terms = {index: [] for index in cls.SEARCH_FIELDS}
+        for match in cls.SEARCH_TERM.finditer(query or ''):
+            field, phrase, text = match.groups()
+            index = next((name for name, fields in cls.SEARCH_FIELDS.items() if field in fields), None)
+            if field == 'findings':
+                index, field = 'findings', None
+            elif index is None:
+                if field:
+                    # Not a field name, so part of the text (e.g. "https://...")
+                    text = f'{field}:{phrase if phrase is not None else text}'
+                    phrase = None
+                index, field = default, None
+            
+            words = tuple(re.findall(r'[^\W_]+', (phrase if phrase is not None else text).lower()))
+            if words:
+                terms[index].append((field, words, phrase is None))
+        return terms
+    
+    @abstractmethod
+    def close(self):
+        """Release pooled connections."""
+    
+    # Aggregate counters
+    @abstractmethod
+    def rebuild_counters(self):
+        """Recompute the aggregate counters from scratch (repair tool)."""
+    
+    @abstractmethod
+    def get_url_counts(self) -> Dict[int, int]:
+        """Number of URLs per project id."""
+    
+    @abstractmethod
+    def get_project_stats(self, project_id: int) -> Dict:
+        """URL and run counts for a project dashboard."""
+    
+    @abstractmethod
+    def get_run_stats(self, run_id: int) -> Dict:
+        """Result counts by status group and average score for a run."""
+    
+    # Project operations
+    @abstractmethod
+    def create_project(self, name: str, description: str = "", settings: Dict = None) -> int:
+        """Create a new project."""
+    
+    @abstractmethod
+    def get_projects(self) -> List[Dict]:
+        """Get all projects."""
+    
+    @abstractmethod
+    def get_project(self, project_id: int) -> Optional[Dict]:
+        """Get project by ID."""
+    
+    @abstractmethod
+    def update_project(self, project_id: int, name: str = None, description: str = None, settings: Dict = None):
+        """Update project."""
+    
+    @abstractmethod
+    def delete_project(self, project_id: int):
+        """Delete project and all associated data."""
+    
+    # URL operations
+    @abstractmethod
+    def add_url(self, url: str, project_id: int = None, tags: str = "", notes: str = "", status: str = "active") -> int:
+        """Add a new URL."""
+    
+    @abstractmethod
+    def add_urls_bulk(self, urls: Iterable[str], project_id: int = None, status: str = "active",
+                      tags: str = "", notes: str = "") -> Dict:
+        """Insert many URLs, skipping any already in the project. Returns added and duplicate counts."""
+    
+    @abstractmethod
+    def find_url(self, url: str, project_id: int = None) -> Optional[Dict]:
+        """Look up a URL in a project."""
+    
+    @abstractmethod
+    def get_urls(self, project_id: int = None, status: str = None) -> List[Dict]:
+        """Get URLs, optionally filtered by project and status."""
+    
+    @abstractmethod
+    def ingest_urls(self, project_id: int, entries: Iterable, status: str = "active",
+                    tags: str = "", batch_size: int = 1000) -> Dict:
+        """Stream (url, lastmod) entries into a project in bulk batches."""
+    
+    @abstractmethod
+    def get_changed_urls(self, project_id: int) -> List[Dict]:
+        """Get active URLs never validated or whose sitemap lastmod is newer than their last validation."""
+    
+    @abstractmethod
+    def get_url(self, url_id: int) -> Optional[Dict]:
+        """Get URL by ID."""
+    
+    @abstractmethod
+    def update_url(self, url_id: int, url: str = None, status: str = None, tags: str = None, notes: str = None):
+        """Update URL."""
+    
+    @abstractmethod
+    def bulk_update_urls(self, url_ids: Optional[List[int]] = None, filters: Optional[Dict] = None,
+                         status: str = None, tags: str = None, notes: str = None,
+                         add_tags: List[str] = None, remove_tags: List[str] = None) -> int:
+        """Update many URLs, chosen by id list or filter. Returns the number of URLs selected."""
+    
+    @abstractmethod
+    def update_url_tags(self, url_ids: List[int], add: List[str] = None, remove: List[str] = None) -> int:
+        """Add and remove tags on many URLs. Returns the number of URLs selected."""
+    
+    @abstractmethod
+    def delete_url(self, url_id: int):
+        """Delete URL."""
+    
+    @abstractmethod
+    def bulk_delete_urls(self, url_ids: Optional[List[int]] = None, filters: Optional[Dict] = None) -> int:
+        """Delete many URLs, chosen by id list or filter. Returns the number deleted."""
+    
+    @abstractmethod
+    def query_urls(self, project_id: int = None, status: str = None, search: str = None,
+                   tag: str = None, health: str = None, sort: str = 'added_date', order: str = 'desc',
+                   cursor: str = None, limit: int = 100) -> Dict:
+        """Get one keyset-paginated page of URLs, each with its latest result."""
+    
+    @abstractmethod
+    def search_urls(self, q: str, project_id: int = None, status: str = None, tag: str = None,
+                    health: str = None, cursor: str = None, limit: int = 100) -> Dict:
+        """Full-text search over URLs and their latest findings (see parse_search), best matches first."""
+    
+    @abstractmethod
+    def get_tag_facets(self, project_id: int = None, status: str = None, limit: int = 100) -> List[Dict]:
+        """Tags with the number of URLs carrying each, most used first."""
+    
+    @abstractmethod
+    def get_project_health(self, project_id: int) -> Dict[str, int]:
+        """Count a project's URLs by the status of their latest result."""
+    
+    @abstractmethod
+    def get_failed_urls(self, project_id: int) -> List[Dict]:
+        """Active URLs whose latest result is an error, blocked or unreachable."""
+    
+    @abstractmethod
+    def get_scoped_urls(self, project_id: int, scope: Dict) -> List[Dict]:
+        """Active URLs of a project matching a run scope (see normalize_run_scope)."""
+    
+    # Validation run operations
+    @abstractmethod
+    def create_validation_run(self, project_id: int = None, total_urls: int = 0, settings: Dict = None) -> int:
+        """Create a new validation run."""
+    
+    @abstractmethod
+    def get_validation_runs(self, project_id: int = None, limit: int = 50) -> List[Dict]:
+        """Get validation runs."""
+    
+    @abstractmethod
+    def get_validation_run(self, run_id: int) -> Optional[Dict]:
+        """Get validation run by ID."""
+    
+    @abstractmethod
+    def update_validation_run(self, run_id: int, status: str = None, processed_urls: int = None, end_time: str = None):
+        """Update validation run."""
+    
+    @abstractmethod
+    def set_validation_run_paused(self, run_id: int, paused: bool) -> bool:
+        """Pause or resume a run that is still running or paused. Returns False if it has finished."""
+    
+    @abstractmethod
+    def finish_validation_run(self, run_id: int, status: str, processed_urls: int = None) -> bool:
+        """Move a running or paused run to its final state. Returns True if this call won."""
+    
+    @abstractmethod
+    def get_url_history(self, project_id: int) -> Dict[int, Dict]:
+        """Get average response time and last validation time per URL in a project."""
+    
+    @abstractmethod
+    def get_skipped_url_ids(self, project_id: int) -> set:
+        """Get IDs of URLs skipped by the project's budgeted runs and not yet revisited."""
+    
+    @abstractmethod
+    def record_run_coverage(self, run_id: int, coverage: Dict, processed_ids: List[int], skipped_ids: List[int]):
+        """Store a budgeted run's coverage report and carry its skipped URLs forward."""
+    
+    @abstractmethod
+    def delete_validation_run(self, run_id: int):
+        """Delete a validation run and all its results."""
+    
+    # Validation result operations
+    @abstractmethod
+    def add_validation_result(self, run_id: int, url_id: int, result: Dict) -> int:
+        """Add a validation result."""
+    
+    @abstractmethod
+    def write_results_batch(self, results: List[tuple], progress: Dict[int, int] = None):
+        """Insert many (run_id, url_id, result) tuples and apply processed_urls updates in one transaction."""
+    
+    @abstractmethod
+    def get_validation_results(self, run_id: int) -> List[Dict]:
+        """Get validation results for a run."""
+    
+    @abstractmethod
+    def query_validation_results(self, run_id: int, status: str = None, has_warnings: bool = None,
+                                 min_score: float = None, max_score: float = None,
+                                 search: str = None, tag: str = None, sort: str = 'validated_at',
+                                 order: str = 'desc', cursor: str = None, limit: int = 100,
+                                 fields: Optional[List[str]] = None) -> Dict:
+        """Get one keyset-paginated page of a run's results."""
+    
+    @abstractmethod
+    def search_results(self, run_id: int, q: str, status: str = None, has_warnings: bool = None,
+                       min_score: float = None, max_score: float = None, tag: str = None,
+                       cursor: str = None, limit: int = 100, fields: Optional[List[str]] = None) -> Dict:
+        """Full-text search over a run's findings and URLs (see parse_search), best matches first."""
+    
+    @abstractmethod
+    def get_validation_result(self, result_id: int) -> Optional[Dict]:
+        """Get a single validation result with all its columns decoded."""
+    
+    @abstractmethod
+    def get_results_summary(self, run_id: int) -> Dict:
+        """Status counts and error/warning breakdown for a run."""
+    
+    @abstractmethod
+    def diff_validation_runs(self, base_run_id: int, run_id: int, changes: Optional[List[str]] = None,
+                             sort: str = 'url_id', order: str = 'asc', cursor: str = None,
+                             limit: int = 100) -> Dict:
+        """Per-URL comparison of two runs, keyset-paginated."""
+    
+    @abstractmethod
+    def get_run_diff_summary(self, base_run_id: int, run_id: int) -> Dict[str, int]:
+        """Number of URLs in each change category between two runs."""
+    
+    # Schema blobs, retention and maintenance
+    @abstractmethod
+    def migrate_schema_blobs(self, batch_size: int = 1000, vacuum: bool = False) -> Dict:
+        """Move inline schema_data into the blob store."""
+    
+    @abstractmethod
+    def get_schema_storage_stats(self) -> Dict:
+        """Space used by schema data versus what inline storage would take."""
+    
+    @abstractmethod
+    def prune_schema_blobs(self) -> int:
+        """Delete blobs no result references any more. Returns the number removed."""
+    
+    @abstractmethod
+    def collect_orphans(self, batch_size: int = 5000, pause: float = 0.05,
+                        should_stop=None) -> Dict[str, int]:
+        """Delete rows whose parent no longer exists. Returns rows removed per table."""
+    
+    @abstractmethod
+    def get_retention_policies(self) -> Dict[int, int]:
+        """Projects with a retention policy, as {project_id: full runs to keep}."""
+    
+    @abstractmethod
+    def get_runs_to_compact(self, project_id: int, keep_runs: int) -> List[int]:
+        """Finished runs older than the project's newest `keep_runs` that still hold full results."""
+    
+    @abstractmethod
+    def compact_validation_run(self, run_id: int, batch_size: int = 5000) -> int:
+        """Replace a run's results with a summary row and per-URL score history."""
+    
+    def archive_validation_run(self, run_id: int) -> str:
+        """
+        Compact a run like compact_validation_run, keeping its full results in a
+        file outside the store. Returns the archive's path. Only stores that keep
+        each run's results in a file of its own (per-run shards) support it.
+        """
+        raise NotImplementedError('Archiving runs needs per-run shard files (RUN_SHARDS=true)')
+    
+    @abstractmethod
+    def get_url_score_history(self, url_id: int, limit: int = 100) -> List[Dict]:
+        """Score history for a URL across full and compacted runs, newest first."""
+    
+    @abstractmethod
+    def incremental_vacuum(self, pages: int = 2000) -> int:
+        """Return some free space to the OS. Returns the number of pages freed."""
+    
+    @abstractmethod
+    def vacuum(self):
+        """Rebuild storage to reclaim all free space."""
+
+
+def open_storage(database_url: Optional[str] = None) -> Storage:
+    """
+    Open the configured store: PostgreSQL for postgres:// and postgresql://
+    URLs, otherwise SQLite at a sqlite:/// URL or Config.DATABASE_PATH, with
+    per-run shard files when Config.RUN_SHARDS is set.
+    """
+    database_url = database_url or Config.DATABASE_URL
+    
+    if database_url and database_url.startswith(('postgres://', 'postgresql://')):
+        try:
+            from .postgres import PostgresDatabase
+        except ImportError as e:
+            raise RuntimeError('PostgreSQL storage needs psycopg: pip install "psycopg[binary,pool]"') from e
+        return PostgresDatabase(database_url, max_connections=Config.DATABASE_POOL_SIZE)
+    
+    if Config.RUN_SHARDS:
+        from .shards import ShardedDatabase as Database
+    else:
+        from .database import Database
+    if database_url:
+        return Database(Path(database_url[len('sqlite:///'):] if database_url.startswith('sqlite:///')
+                             else database_url))
+    return Database()
@@ -0,0 +1,149 @@
+"""
+A validation run from start to finish.
+Shared by runs in the web process and runs in the validation worker process.
+"""
+
+import asyncio
+import json
+from typing import Callable, Dict, List
+
+from .storage import Storage
+from .result_writer import ResultWriter
+from .runs import RunManager
+from ..core.validator import SchemaValidator
+from ..core.scheduler import RunBudget, domain_costs, prioritize_urls
+
+
+def run_validation(run_id: int, urls: List[Dict], settings: Dict, db: Storage, writer: ResultWriter,
+                   runs: RunManager, progress, notify: Callable):
+    """
+    Validate a run's URLs to the end, in whichever process hosts the engines.
+    
+    Results go to `writer`; per-URL progress goes to `progress` (submit and
+    finish, as on ProgressBroadcaster); `notify(event, payload)` announces
+    validation_complete and validation_error to the run's followers.
+    """
+    # Progress callback for the validator
+    def progress_callback(data):
+        """Queue the result for writing and its progress for the run's room."""
+        try:
+            # Queue database writes; the writer batches them off this thread
+            processed = data['processed']  # Use processed count, not progress percentage
+            writer.submit_progress(run_id, processed)
+            runs.record_progress(run_id)
+            
+            url = data['url']
+            url_id = url_id_map.get(url)
+            if url_id and data['result'] is not None:
+                writer.submit_result(run_id, url_id, data['result'])
+            elif url_id and data['result'] is None:
+                # Handle failed validation
+                writer.submit_result(run_id, url_id, {
+                    'status': 'error',
+                    'error': 'Failed to validate URL',
+                    'score': 0.0
+                })
+            
+            # Coalesced into the next compact delta for the run's room
+            progress.submit(run_id, url, url_id, data['result'], processed, data['total'], data['progress'])
+        except Exception as e:
+            print(f"Error in progress callback: {e}")
+            # Emit error to clients
+            notify('validation_error', {
+                'run_id': run_id,
+                'error': f'Progress callback error: {str(e)}'
+            })
+    
+    # Set up inside the try: a failure here (e.g. the run was deleted) must
+    # still mark the run failed rather than leave it 'running'
+    loop = None
+    try:
+        project_id = db.get_validation_run(run_id)['project_id']
+        
+        # Time-budgeted runs validate the highest-value URLs first
+        budget = None
+        if settings.get('time_budget'):
+            history = db.get_url_history(project_id)
+            urls = prioritize_urls(urls, history, db.get_skipped_url_ids(project_id))
+            budget = RunBudget(
+                float(settings['time_budget']),
+                costs=domain_costs(history, urls),
+                default_cost=settings.get('timeout', 30000) / 1000 / 2,
+                overhead=(settings.get('delay_min', 2) + settings.get('delay_max', 5)) / 2
+            )
+        
+        # Extract URLs from url objects
+        url_list = [url_obj['url'] for url_obj in urls]
+        url_id_map = {url_obj['url']: url_obj['id'] for url_obj in urls}
+        
+        # Create original working validator
+        validator = SchemaValidator(
+            headless=settings.get('headless', True),
+            timeout=settings.get('timeout', 30000),
+            delay_range=(settings.get('delay_min', 2), settings.get('delay_max', 5)),
+            max_retries=settings.get('max_retries', 1),
+            concurrent_limit=settings.get('concurrent_limit', 3),
+            progress_callback=progress_callback,
+            budget=budget
+        )
+        # Controlled by run_id; shares the browser budget fairly with other projects' runs
+        project_settings = json.loads((db.get_project(project_id) or {}).get('settings_json') or '{}')
+        runs.register(
+            run_id, project_id, validator,
+            total_urls=len(url_list),
+            interactive=bool(settings.get('interactive')),
+            weight=float(project_settings.get('share_weight') or 1),
+            quota=int(project_settings.get('browser_quota') or 0)
+        )
+        
+        # Create event loop for async execution
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        
+        # Run validation
+        results = loop.run_until_complete(validator.validate_urls_async(url_list))
+        
+        # Results must be on disk before the run is marked finished
+        if not writer.flush(run_id=run_id):
+            raise RuntimeError(f'Validation results could not be saved: {writer.take_write_error(run_id)}')
+        progress.finish(run_id)
+        
+        coverage = None
+        if budget:
+            processed = [r['url'] for r in results]
+            coverage = budget.coverage_report(url_list, processed, validator.skipped_urls)
+            db.record_run_coverage(
+                run_id,
+                coverage,
+                processed_ids=[url_id_map[url] for url in processed if url in url_id_map],
+                skipped_ids=[url_id_map[url] for url in coverage['skipped'] if url in url_id_map]
+            )
+        
+        # Record completion unless a stop was already recorded
+        if db.finish_validation_run(run_id, 'completed'):
+            notify('validation_complete', {
+                'run_id': run_id,
+                'total_results': len(results),
+                'coverage': coverage,
+                'message': 'Validation completed successfully'
+            })
+    
+    except Exception as e:
+        # Keep whatever was validated before the failure
+        writer.flush()
+        writer.take_write_error(run_id)
+        progress.finish(run_id)
+        
+        # Update run status to failed
+        db.finish_validation_run(run_id, 'failed')
+        
+        # Emit error
+        notify('validation_error', {
+            'run_id': run_id,
+            'error': str(e)
+        })
+    
+    finally:
+        if loop:
+            loop.close()
+        runs.unregister(run_id)
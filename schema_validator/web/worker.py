@@ -0,0 +1,315 @@
+"""
+Validation worker process.
+Runs the engines in a child process, so validation never competes with request
+handling for the web process's interpreter, and relays progress back to it.
+"""
+
+import itertools
+import multiprocessing
+# Imported first so its exit handler, which kills daemon processes, runs after ValidationWorker.close
+import multiprocessing.util
+import queue
+import threading
+from typing import Callable, Dict, List, Optional
+
+from .result_writer import ResultWriter
+from .runs import RunManager
+from .storage import open_storage
+from .validation import run_validation
+from ..config import Config
+
+
+class ValidationWorker:
+    """
+    Runs validations in a child process with its own store connections,
+    ResultWriter and RunManager, and stands in for the RunManager in the web
+    process: start_run, the control methods, active_runs and stats.
+    
+    Progress comes back over a queue and is handed to `progress` (a
+    ProgressBroadcaster); completion and failure go to `notify(event,
+    payload)`; `on_finished(run_id)` is called once a run's engine is done,
+    for the web process to drop what it cached about the run. If the child
+    dies, its active runs are marked failed and a new child is started by
+    the next run.
+    """
+    
+    # Seconds between the child's reports of its runs' state
+    REPORT_INTERVAL = 1.0
+    # Seconds to wait for the child to answer a pause, resume or stop
+    CONTROL_TIMEOUT = 5.0
+    
+    def __init__(self, progress, notify: Callable, on_finished: Optional[Callable] = None, db=None):
+        self.progress = progress
+        self.notify = notify
+        self.on_finished = on_finished
+        self.db = db  # Records runs of a dead child as failed
+        
+        self._context = multiprocessing.get_context('spawn')
+        self._process = None
+        self._commands = None
+        self._events = None
+        self._reader = None
+        self._lock = threading.Lock()
+        
+        self._runs = []  # Latest active_runs() reported by the child
+        self._stats = {}  # Latest stats() reported by the child
+        self._active = set()  # Runs started here whose engine isn't done yet
+        self._replies = {}  # Control request id -> [answered event, result]
+        self._request_ids = itertools.count(1)
+        self.restarts = 0
+    
+    def start(self):
+        """Start the child process if it isn't running."""
+        with self._lock:
+            if self._process and self._process.is_alive():
+                return
+            if self._process:
+                self.restarts += 1
+            self._commands = self._context.Queue()
+            self._events = self._context.Queue()
+            self._process = self._context.Process(
+                target=serve, args=(self._commands, self._events), name='validation-worker', daemon=True
+            )
+            self._process.start()
+            self._reader = threading.Thread(
+                target=self._read, args=(self._process, self._events), name='validation-worker-events', daemon=True
+            )
+            self._reader.start()
+    
+    def start_run(self, run_id: int, urls: List[Dict], settings: Dict):
+        """Hand a run to the child process."""
+        self.start()
+        with self._lock:
+            self._active.add(run_id)
+            self._commands.put(('start', run_id, urls, settings))
+    
+    def pause(self, run_id: int) -> bool:
+        """Pause a run. Returns False if it isn't active."""
+        return self._control('pause', run_id)
+    
+    def resume(self, run_id: int) -> bool:
+        """Resume a run. Returns False if it isn't active."""
+        return self._control('resume', run_id)
+    
+    def stop(self, run_id: int) -> bool:
+        """Stop a run. Returns False if it isn't active."""
+        return self._control('stop', run_id)
+    
+    def active_runs(self) -> List[Dict]:
+        """State of every active run, as last reported by the child."""
+        return list(self._runs)
+    
+    def stats(self) -> Dict:
+        """The child's RunManager statistics, with the process's own."""
+        process = self._process
+        return {
+            **self._stats,
+            'worker': {
+                'pid': process.pid if process else None,
+                'alive': bool(process and process.is_alive()),
+                'restarts': self.restarts
+            }
+        }
+    
+    def close(self, timeout: float = 10.0):
+        """Stop the child's runs, let it flush its writes, and wait for it to exit."""
+        process = self._process
+        if not process or not process.is_alive():
+            return
+        self._commands.put(('close',))
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+    
+    def _control(self, action: str, run_id: int) -> bool:
+        # Forwarded for any run handed to the child and not yet done, including
+        # one whose engine is still starting; the child answers
+        with self._lock:
+            if run_id not in self._active:
+                return False
+            request_id = next(self._request_ids)
+            reply = self._replies[request_id] = [threading.Event(), False]
+            self._commands.put((action, run_id, request_id))
+        
+        try:
+            if not reply[0].wait(self.CONTROL_TIMEOUT):
+                # Still queued for a run the child was given; it applies it when it gets there
+                return True
+            return reply[1]
+        finally:
+            with self._lock:
+                self._replies.pop(request_id, None)
+    
+    def _read(self, process, events):
+        while True:
+            try:
+                event = events.get(timeout=self.REPORT_INTERVAL)
+            except queue.Empty:
+                if not process.is_alive():
+                    self._lost(process)
+                    return
+                continue
+            
+            try:
+                self._dispatch(event)
+            except Exception as e:
+                print(f"Error handling validation worker event {event[0]}: {e}")
+            if event[0] == 'closed':
+                return
+    
+    def _dispatch(self, event):
+        kind = event[0]
+        if kind == 'progress':
+            self.progress.submit(*event[1:])
+        elif kind == 'progress_finish':
+            self.progress.finish(event[1])
+        elif kind == 'notify':
+            self.notify(event[1], event[2])
+        elif kind == 'state':
+            self._runs, self._stats = event[1], event[2]
+        elif kind == 'reply':
+            with self._lock:
+                reply = self._replies.get(event[1])
+            if reply:
+                reply[1] = event[2]
+                reply[0].set()
+        elif kind == 'done':
+            with self._lock:
+                self._active.discard(event[1])
+            if self.on_finished:
+                self.on_finished(event[1])
+    
+    def _lost(self, process):
+        """The child died: fail the runs it took with it."""
+        print(f"Validation worker exited unexpectedly (exit code {process.exitcode})")
+        with self._lock:
+            lost, self._active = self._active, set()
+            unanswered = list(self._replies.values())
+        self._runs = []
+        for reply in unanswered:
+            reply[0].set()
+        for run_id in sorted(lost):
+            if self.db:
+                self.db.finish_validation_run(run_id, 'failed')
+            self.notify('validation_error', {'run_id': run_id, 'error': 'Validation worker exited unexpectedly'})
+            if self.on_finished:
+                self.on_finished(run_id)
+
+
+class _ReportingRunManager(RunManager):
+    """
+    A RunManager that reports its runs to the web process whenever one starts
+    or finishes, and holds the controls sent for a run whose engine hasn't
+    registered yet until it does.
+    """
+    
+    def __init__(self, report: Callable, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.report = report
+        self._starting = {}  # Run id -> controls received before its engine registered
+        self._starting_lock = threading.Lock()
+    
+    def starting(self, run_id: int):
+        """Note a run whose engine is on its way."""
+        with self._starting_lock:
+            self._starting[run_id] = []
+    
+    def forget_start(self, run_id: int):
+        """Forget a run's start once its thread is done, registered or not."""
+        with self._starting_lock:
+            self._starting.pop(run_id, None)
+    
+    def control(self, action: str, run_id: int) -> bool:
+        """Pause, resume or stop a run. Returns False if it isn't active."""
+        with self._starting_lock:
+            if run_id in self._starting:
+                self._starting[run_id].append(action)
+                return True
+        return getattr(self, action)(run_id)
+    
+    def register(self, run_id: int, *args, **kwargs):
+        super().register(run_id, *args, **kwargs)
+        with self._starting_lock:
+            actions = self._starting.pop(run_id, [])
+        for action in actions:
+            getattr(self, action)(run_id)
+        self.report()
+    
+    def unregister(self, run_id: int):
+        super().unregister(run_id)
+        self.report()
+
+
+class _ProgressRelay:
+    """ProgressBroadcaster's submit and finish, forwarded to the web process."""
+    
+    def __init__(self, events):
+        self.events = events
+    
+    def submit(self, run_id: int, url: str, url_id: Optional[int], result: Optional[Dict],
+               processed: int, total: int, progress: float):
+        # The schema body never leaves the worker; progress messages don't carry it
+        if result is not None:
+            result = {key: value for key, value in result.items() if key != 'schema_data'}
+        self.events.put(('progress', run_id, url, url_id, result, processed, total, progress))
+    
+    def finish(self, run_id: int):
+        self.events.put(('progress_finish', run_id))
+
+
+def serve(commands, events):
+    """Child process main loop: run the web process's commands until told to close."""
+    db = open_storage()
+    writer = ResultWriter(db)
+    progress = _ProgressRelay(events)
+    threads = {}
+    
+    def report():
+        events.put(('state', runs.active_runs(), runs.stats()))
+    
+    runs = _ReportingRunManager(report, Config.MAX_BROWSERS, Config.SMALL_RUN_URLS, Config.PRIORITY_BOOST)
+    
+    def notify(event, payload):
+        events.put(('notify', event, payload))
+    
+    def run(run_id, urls, settings):
+        try:
+            run_validation(run_id, urls, settings, db, writer, runs, progress, notify)
+        except Exception as e:
+            # run_validation marks its own failures; this is only reached if that failed too
+            print(f"Validation run {run_id} could not start: {e}")
+            notify('validation_error', {'run_id': run_id, 'error': str(e)})
+        finally:
+            runs.forget_start(run_id)
+            events.put(('done', run_id))
+    
+    while True:
+        try:
+            command = commands.get(timeout=ValidationWorker.REPORT_INTERVAL)
+        except queue.Empty:
+            report()
+            continue
+        
+        kind = command[0]
+        if kind == 'start':
+            thread = threading.Thread(target=run, args=command[1:], name=f'validation-run-{command[1]}', daemon=True)
+            threads[command[1]] = thread
+            runs.starting(command[1])
+            thread.start()
+        elif kind in ('pause', 'resume', 'stop'):
+            events.put(('reply', command[2], runs.control(kind, command[1])))
+        elif kind == 'close':
+            break
+        
+        for run_id in [run_id for run_id, thread in threads.items() if not thread.is_alive()]:
+            del threads[run_id]
+    
+    # Shutting down: stop what's running and keep what it validated
+    for run in runs.active_runs():
+        db.finish_validation_run(run['run_id'], 'stopped')
+        runs.stop(run['run_id'])
+    for thread in threads.values():
+        thread.join(15)
+    writer.close()
+    db.close()
+    events.put(('closed',))
@@ -0,0 +1,16 @@
+"""
+WSGI entry point for production servers.
+Run with: gunicorn -w 1 --threads 64 schema_validator.wsgi:app
+(or python -m schema_validator --production, which does the same).
+"""
+
+import os
+
+from schema_validator.config import Config
+from schema_validator.web.app import create_app
+
+# Validation gets a process of its own unless explicitly turned off
+if 'VALIDATION_WORKER' not in os.environ:
+    Config.VALIDATION_WORKER = True
+
+app = create_app()
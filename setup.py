@@ -32,6 +32,10 @@ setup(
         "tqdm>=4.66.1",
         "openpyxl>=3.1.5",
     ],
+    extras_require={
+        "postgres": ["psycopg[binary,pool]>=3.1"],
+        "production": ["gunicorn>=21.2"],
+    },
     entry_points={
         "console_scripts": [
             "schema-validator=schema_validator.__main__:main",
@@ -0,0 +1,64 @@
+"""
+Shared fixtures for the test suite.
+
+Storage tests run once per backend: SQLite, SQLite with per-run shards, and
+PostgreSQL when DATABASE_URL points at a PostgreSQL server. Each PostgreSQL
+test gets a scratch schema of its own, dropped afterwards.
+"""
+
+import os
+import uuid
+
+import pytest
+
+from schema_validator.web.database import Database
+from schema_validator.web.shards import ShardedDatabase
+
+DATABASE_URL = os.environ.get('DATABASE_URL') or ''
+POSTGRES = DATABASE_URL.startswith(('postgres://', 'postgresql://'))
+
+
+@pytest.fixture(params=['sqlite', 'sqlite-shards', 'postgres'])
+def open_storage(request, tmp_path):
+    """Open (or reopen) the test's store; every store opened is closed afterwards."""
+    opened = []
+    
+    if request.param == 'postgres':
+        if not POSTGRES:
+            pytest.skip('set DATABASE_URL to a PostgreSQL database to run the PostgreSQL storage tests')
+        psycopg = pytest.importorskip('psycopg')
+        from psycopg.conninfo import make_conninfo
+        from schema_validator.web.postgres import PostgresDatabase
+        
+        schema = f'sv_test_{uuid.uuid4().hex[:12]}'
+        with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+            conn.execute(f'CREATE SCHEMA {schema}')
+        # UTF-8 whatever the server's encoding; the name lets teardown end
+        # connections a failed test left checked out
+        conninfo = make_conninfo(DATABASE_URL, options=f'-csearch_path={schema}',
+                                 client_encoding='utf8', application_name=schema)
+        
+        def factory():
+            opened.append(PostgresDatabase(conninfo, 1, 4))
+            return opened[-1]
+    else:
+        backend = ShardedDatabase if request.param == 'sqlite-shards' else Database
+        
+        def factory():
+            opened.append(backend(tmp_path / 'validator.db'))
+            return opened[-1]
+    
+    yield factory
+    
+    for store in opened:
+        store.close()
+    if request.param == 'postgres':
+        with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+            conn.execute('SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE application_name = %s',
+                         (schema,))
+            conn.execute(f'DROP SCHEMA {schema} CASCADE')
+
+
+@pytest.fixture
+def storage(open_storage):
+    return open_storage()
@@ -0,0 +1,131 @@
+"""
+Read cache tests: LRU bounds, scoped invalidation, the generation check
+that keeps a racing read from caching stale data, and CachedStorage
+invalidating what each write changes.
+"""
+
+import pytest
+
+from schema_validator.web.cache import CachedStorage, ReadCache
+from schema_validator.web.database import Database
+
+
+class Loader:
+    """A load function that counts its calls and returns the next value."""
+    
+    def __init__(self, value='v'):
+        self.value = value
+        self.calls = 0
+    
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+def test_values_are_loaded_once_and_copied_out():
+    cache = ReadCache()
+    load = Loader({'items': [{'id': 1}]})
+    
+    first = cache.get_or_load('runs', 1, load)
+    first['items'][0]['note'] = 'annotated'
+    
+    assert cache.get_or_load('runs', 1, load) == {'items': [{'id': 1}]}
+    assert load.calls == 1
+    assert cache.stats()['namespaces']['runs'] == {'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ReadCache(max_entries=2)
+    loads = {key: Loader(key) for key in 'abc'}
+    
+    cache.get_or_load('ns', 'a', loads['a'])
+    cache.get_or_load('ns', 'b', loads['b'])
+    cache.get_or_load('ns', 'a', loads['a'])
+    cache.get_or_load('ns', 'c', loads['c'])
+    cache.get_or_load('ns', 'a', loads['a'])
+    cache.get_or_load('ns', 'b', loads['b'])
+    
+    assert (loads['a'].calls, loads['b'].calls) == (1, 2)
+    assert cache.stats()['evictions'] == 2
+
+
+def test_invalidation_drops_one_scope_a_namespace_or_everything():
+    cache = ReadCache()
+    for run_id in (1, 2):
+        cache.get_or_load('results', run_id, Loader(), scope=run_id)
+    cache.get_or_load('runs', 'list', Loader())
+    
+    cache.invalidate('results', 1)
+    assert cache.stats()['entries'] == 2
+    cache.invalidate('results')
+    assert cache.stats()['entries'] == 1
+    cache.invalidate()
+    assert cache.stats()['entries'] == 0
+
+
+def test_a_read_racing_an_invalidation_is_not_cached():
+    cache = ReadCache()
+    
+    def load_during_write():
+        # The write lands after the read started but before it returns
+        cache.invalidate('results', 1)
+        return 'old'
+    
+    assert cache.get_or_load('results', 1, load_during_write, scope=1) == 'old'
+    
+    load = Loader('new')
+    assert cache.get_or_load('results', 1, load, scope=1) == 'new'
+    assert load.calls == 1
+    assert cache.get_or_load('results', 1, load, scope=1) == 'new'
+    assert load.calls == 1
+
+
+def test_expired_and_uncacheable_values_are_reloaded():
+    cache = ReadCache()
+    load = Loader()
+    
+    cache.get_or_load('projects', 1, load, ttl=-1)
+    cache.get_or_load('projects', 1, load, ttl=-1)
+    cache.get_or_load('results', 1, load, cacheable=lambda value: False)
+    cache.get_or_load('results', 1, load, cacheable=lambda value: False)
+    
+    assert load.calls == 4
+
+
+@pytest.fixture
+def cached(tmp_path):
+    db = Database(tmp_path / 'validator.db')
+    yield CachedStorage(db, ReadCache())
+    db.close()
+
+
+def test_live_runs_are_read_through_and_finished_runs_cached(cached):
+    project_id = cached.create_project('Shop')
+    url_id = cached.add_url('https://example.com/a', project_id)
+    run_id = cached.create_validation_run(project_id, 1)
+    
+    assert cached.get_run_stats(run_id)['total'] == 0
+    cached.storage.write_results_batch([(run_id, url_id, {'status': 'success', 'validation': {'score': 80.0}})])
+    # Written behind the cache's back: a live run is never cached, so it shows
+    assert cached.get_run_stats(run_id)['total'] == 1
+    
+    cached.finish_validation_run(run_id, 'completed')
+    assert cached.get_validation_run(run_id)['status'] == 'completed'
+    cached.get_run_stats(run_id)
+    hits = cached.cache.stats()['namespaces']['results']['hits']
+    cached.get_run_stats(run_id)
+    assert cached.cache.stats()['namespaces']['results']['hits'] == hits + 1
+    
+    cached.delete_validation_run(run_id)
+    assert cached.get_validation_run(run_id) is None
+    assert cached.get_validation_runs(project_id) == []
+
+
+def test_project_writes_invalidate_project_reads(cached):
+    project_id = cached.create_project('Shop')
+    assert cached.get_project(project_id)['name'] == 'Shop'
+    
+    cached.update_project(project_id, name='Store')
+    
+    assert cached.get_project(project_id)['name'] == 'Store'
+    assert [project['name'] for project in cached.get_projects()] == ['Store']
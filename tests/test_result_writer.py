@@ -0,0 +1,151 @@
+"""
+ResultWriter tests: batching, retries of lock errors, and what is given up
+on when the store rejects a row.
+"""
+
+import sqlite3
+
+import pytest
+
+from schema_validator.web.database import Database
+from schema_validator.web.result_writer import ResultWriter
+from schema_validator.web.shards import ShardedDatabase
+
+RESULT = {'status': 'success', 'schema_data': {'@type': 'Product'},
+          'validation': {'score': 90.0, 'errors': [], 'warnings': []}, 'response_time': 1.0}
+
+
+class FlakyDatabase(Database):
+    """A Database whose next `failures` batch writes fail with a lock error."""
+    
+    failures = 0
+    attempts = 0
+    
+    def write_results_batch(self, results, progress=None):
+        self.attempts += 1
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError('database is locked')
+        return super().write_results_batch(results, progress)
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = FlakyDatabase(tmp_path / 'validator.db')
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def make_writer(db):
+    writers = []
+    
+    def factory(**kwargs):
+        writers.append(ResultWriter(db, flush_interval=0.05, retry_delay=0, **kwargs))
+        return writers[-1]
+    
+    yield factory
+    for writer in writers:
+        writer.close()
+
+
+def add_run(db, urls=2):
+    project_id = db.create_project('Shop')
+    url_ids = [db.add_url(f'https://example.com/p/{n}', project_id) for n in range(urls)]
+    return db.create_validation_run(project_id, urls), url_ids
+
+
+def test_results_and_latest_progress_are_written(db, make_writer):
+    run_id, url_ids = add_run(db, urls=3)
+    writer = make_writer()
+    
+    for processed, url_id in enumerate(url_ids, 1):
+        writer.submit_result(run_id, url_id, RESULT)
+        writer.submit_progress(run_id, processed)
+    
+    assert writer.flush(run_id=run_id)
+    assert len(db.get_validation_results(run_id)) == 3
+    assert db.get_validation_run(run_id)['processed_urls'] == 3
+    assert writer.stats()['rows_written'] == 3
+
+
+def test_lock_errors_are_retried(db, make_writer):
+    run_id, url_ids = add_run(db)
+    writer = make_writer(max_retries=3)
+    db.failures = 2
+    
+    writer.submit_result(run_id, url_ids[0], RESULT)
+    
+    assert writer.flush(run_id=run_id)
+    assert len(db.get_validation_results(run_id)) == 1
+    assert writer.stats()['write_retries'] == 2
+
+
+def test_batch_is_given_up_on_after_retries(db, make_writer):
+    run_id, url_ids = add_run(db)
+    writer = make_writer(max_retries=2)
+    db.failures = 10
+    
+    writer.submit_result(run_id, url_ids[0], RESULT)
+    writer.submit_progress(run_id, 1)
+    
+    assert not writer.flush(run_id=run_id)
+    assert db.attempts == 3
+    stats = writer.stats()
+    assert (stats['rows_dropped'], stats['write_errors']) == (1, 1)
+    assert writer.take_write_error(run_id) == 'OperationalError: database is locked'
+    assert writer.flush(run_id=run_id)
+
+
+def test_rejected_row_is_dropped_from_its_own_run_only(db, make_writer):
+    run_id, url_ids = add_run(db)
+    other_run, other_urls = add_run(db)
+    db.delete_url(url_ids[0])  # Deleted mid-run: its result breaks the foreign key
+    writer = make_writer()
+    
+    writer.submit_result(run_id, url_ids[0], RESULT)
+    writer.submit_result(run_id, url_ids[1], RESULT)
+    writer.submit_result(other_run, other_urls[0], RESULT)
+    writer.submit_progress(other_run, 1)
+    
+    assert writer.flush(run_id=other_run)
+    assert not writer.flush(run_id=run_id)
+    assert 'IntegrityError' in writer.take_write_error(run_id)
+    assert [result['url_id'] for result in db.get_validation_results(run_id)] == [url_ids[1]]
+    assert [result['url_id'] for result in db.get_validation_results(other_run)] == [other_urls[0]]
+    assert db.get_validation_run(other_run)['processed_urls'] == 1
+    stats = writer.stats()
+    assert (stats['rows_written'], stats['rows_dropped'], stats['write_retries']) == (2, 1, 0)
+
+
+@pytest.mark.parametrize('max_attached', [8, 1])
+def test_sharded_batch_is_not_written_twice_after_a_failure(tmp_path, max_attached):
+    db = ShardedDatabase(tmp_path / 'validator.db')
+    # With one shard attached at a time, the runs commit separately
+    db.MAX_ATTACHED = max_attached
+    runs = [add_run(db, urls=1) for _ in range(2)]
+    write_shard = db._write_shard
+    calls = []
+    
+    def flaky_write_shard(cursor, run_id, schema, items):
+        calls.append(run_id)
+        if run_id == runs[1][0] and calls.count(run_id) == 1:
+            raise sqlite3.OperationalError('database is locked')
+        return write_shard(cursor, run_id, schema, items)
+    
+    db._write_shard = flaky_write_shard
+    writer = ResultWriter(db, flush_interval=0.05, retry_delay=0)
+    for run_id, url_ids in runs:
+        writer.submit_result(run_id, url_ids[0], RESULT)
+        writer.submit_progress(run_id, 1)
+    
+    try:
+        assert writer.flush()
+        for run_id, _ in runs:
+            assert len(db.get_validation_results(run_id)) == 1
+            assert db.get_run_stats(run_id)['total'] == 1
+            assert db.get_validation_run(run_id)['processed_urls'] == 1
+        assert writer.stats()['rows_written'] == 2
+    finally:
+        writer.close()
+        db.close()
@@ -0,0 +1,75 @@
+"""
+Fair-share scheduling tests: how FairShareScheduler splits browser slots
+between runs and projects, and RunManager applying the split to engines.
+"""
+
+from schema_validator.core.validator import SchemaValidator
+from schema_validator.web.runs import FairShareScheduler, RunManager
+
+
+def make_run(run_id, project_id, requested=8, total_urls=5000, **project):
+    return {'run_id': run_id, 'project_id': project_id, 'requested': requested,
+            'total_urls': total_urls, 'interactive': False, **project}
+
+
+def test_projects_with_equal_weight_split_capacity_evenly():
+    scheduler = FairShareScheduler(8)
+    
+    shares = scheduler.allocate([make_run(1, 1), make_run(2, 2)])
+    
+    assert shares == {1: 4, 2: 4}
+
+
+def test_slots_follow_project_weights():
+    scheduler = FairShareScheduler(8)
+    
+    shares = scheduler.allocate([make_run(1, 1, weight=3), make_run(2, 2, weight=1)])
+    
+    assert shares == {1: 6, 2: 2}
+
+
+def test_runs_of_one_project_share_its_slots():
+    scheduler = FairShareScheduler(9)
+    
+    shares = scheduler.allocate([make_run(1, 1), make_run(2, 1), make_run(3, 2)])
+    
+    # The project share is per project, not per run; the odd slot goes to the older project
+    assert shares == {1: 3, 2: 2, 3: 4}
+
+
+def test_quotas_and_small_requests_leave_slots_to_others():
+    scheduler = FairShareScheduler(8)
+    
+    assert scheduler.allocate([make_run(1, 1, quota=2), make_run(2, 2)]) == {1: 2, 2: 6}
+    assert scheduler.allocate([make_run(1, 1, requested=1), make_run(2, 2)]) == {1: 1, 2: 7}
+    assert scheduler.allocate([make_run(1, 1, requested=2), make_run(2, 2, requested=3)]) == {1: 2, 2: 3}
+
+
+def test_small_and_interactive_runs_are_boosted():
+    scheduler = FairShareScheduler(5, small_run_urls=100, boost=4.0)
+    crawl = make_run(1, 1)
+    
+    assert scheduler.allocate([crawl, make_run(2, 2, total_urls=50)]) == {1: 1, 2: 4}
+    assert scheduler.allocate([crawl, make_run(2, 2, interactive=True)]) == {1: 1, 2: 4}
+
+
+def test_oldest_project_wins_a_tie():
+    scheduler = FairShareScheduler(1)
+    
+    assert scheduler.allocate([make_run(1, 1), make_run(2, 2)]) == {1: 1, 2: 0}
+    assert scheduler.allocate([]) == {}
+
+
+def test_run_manager_applies_shares_as_runs_come_and_go():
+    runs = RunManager(max_browsers=4)
+    first, second = SchemaValidator(concurrent_limit=4), SchemaValidator(concurrent_limit=4)
+    
+    runs.register(1, 1, first, total_urls=5000)
+    assert first.worker_limit == 4
+    
+    runs.register(2, 2, second, total_urls=5000)
+    assert (first.worker_limit, second.worker_limit) == (2, 2)
+    
+    runs.unregister(1)
+    assert second.worker_limit == 4
+    assert runs.get(1) is None
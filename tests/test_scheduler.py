@@ -0,0 +1,74 @@
+"""
+Scheduling tests for time-budgeted runs: URL order, cost estimates and
+coverage reports.
+"""
+
+from schema_validator.core.scheduler import RunBudget, domain_costs, prioritize_urls
+
+URLS = [f'https://example.com/p/{n}' for n in range(5)]
+
+
+def test_skipped_urls_come_first_then_never_validated_then_least_recent():
+    urls = [{'id': n, 'url': url} for n, url in enumerate(URLS)]
+    history = {
+        0: {'last_validated_at': '2024-03-01', 'avg_response_time': 1.0},
+        1: {'last_validated_at': '2024-01-01', 'avg_response_time': 1.0},
+        2: {'last_validated_at': '2024-02-01', 'avg_response_time': 1.0},
+        4: {'last_validated_at': '2024-03-01', 'avg_response_time': 0.5},
+    }
+    
+    ordered = prioritize_urls(urls, history, skipped_ids={2})
+    
+    # Equally stale URLs go cheapest first
+    assert [url['id'] for url in ordered] == [2, 3, 1, 4, 0]
+
+
+def test_costs_come_from_each_domains_history():
+    urls = [{'id': 1, 'url': 'https://a.example/1'}, {'id': 2, 'url': 'https://A.example/2'},
+            {'id': 3, 'url': 'https://b.example/3'}]
+    history = {1: {'avg_response_time': 2.0}, 2: {'avg_response_time': 4.0}, 3: {}}
+    
+    costs = domain_costs(history, urls)
+    budget = RunBudget(60, costs=costs, default_cost=10, overhead=1)
+    
+    assert costs == {'a.example': 3.0}
+    assert budget.estimate('https://a.example/new') == 4.0
+    assert budget.estimate('https://b.example/3') == 11.0
+
+
+def test_budget_admits_urls_that_fit_and_shortens_pages_near_the_deadline(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr('schema_validator.core.scheduler.time.monotonic', lambda: clock[0])
+    budget = RunBudget(30, costs={'example.com': 5.0}, default_cost=15, min_timeout=5000)
+    
+    assert budget.remaining() == 30
+    budget.start()
+    clock[0] += 20
+    
+    assert (budget.elapsed(), budget.remaining()) == (20, 10)
+    assert budget.fits('https://example.com/a')
+    assert not budget.fits('https://other.example/a')
+    assert budget.page_timeout(30000) == 10000
+    clock[0] += 8
+    assert budget.page_timeout(30000) == 5000
+    clock[0] += 10
+    assert (budget.remaining(), budget.fits('https://example.com/a')) == (0, False)
+
+
+def test_coverage_counts_urls_left_in_the_queue_as_skipped():
+    budget = RunBudget(60)
+    budget.start()
+    
+    # Stopped after two pages, with one URL already skipped for time
+    report = budget.coverage_report(URLS, [URLS[1], URLS[0]], [URLS[3]])
+    
+    assert report['skipped'] == [URLS[3], URLS[2], URLS[4]]
+    assert (report['total_urls'], report['processed_urls'], report['skipped_urls']) == (5, 2, 3)
+    assert report['coverage'] == 40.0
+
+
+def test_full_coverage_skips_nothing():
+    report = RunBudget(60).coverage_report(URLS, URLS, [])
+    
+    assert (report['skipped'], report['coverage']) == ([], 100.0)
+    assert RunBudget(60).coverage_report([], [], [])['coverage'] == 100.0
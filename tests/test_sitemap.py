@@ -0,0 +1,95 @@
+"""
+Sitemap import tests: which locations may be read, and the import route
+refusing the rest.
+"""
+
+import flask
+import pytest
+
+from schema_validator.config import Config
+from schema_validator.core.sitemap import iter_sitemap, resolve_sitemap_location
+from schema_validator.web import app as web_app
+from schema_validator.web import routes
+from schema_validator.web.database import Database
+
+SITEMAP = '''<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://example.com/a</loc><lastmod>2024-01-01</lastmod></url>
+  <url><loc>https://example.com/b</loc></url>
+</urlset>'''
+
+
+@pytest.fixture
+def import_dir(tmp_path):
+    directory = tmp_path / 'sitemaps'
+    directory.mkdir()
+    (directory / 'sitemap.xml').write_text(SITEMAP)
+    return directory
+
+
+@pytest.mark.parametrize('location', ['https://example.com/sitemap.xml', 'http://example.com/sitemap.xml.gz'])
+def test_http_sitemaps_are_always_allowed(location):
+    assert resolve_sitemap_location(location) == location
+
+
+@pytest.mark.parametrize('location', ['/etc/passwd', '~/.ssh/id_rsa', 'sitemap.xml', 'file:///etc/passwd'])
+def test_local_sitemaps_need_an_import_directory(location):
+    with pytest.raises(ValueError):
+        resolve_sitemap_location(location)
+
+
+@pytest.mark.parametrize('location', ['/etc/passwd', '../outside.xml', '~/sitemap.xml'])
+def test_local_sitemaps_must_be_inside_the_import_directory(import_dir, location):
+    with pytest.raises(ValueError, match='must be inside'):
+        resolve_sitemap_location(location, import_dir)
+
+
+@pytest.mark.parametrize('location', ['file:///etc/passwd', 'file://localhost/etc/passwd', 'ftp://example.com/s.xml'])
+def test_other_schemes_are_refused_even_with_an_import_directory(import_dir, location):
+    with pytest.raises(ValueError, match='http'):
+        resolve_sitemap_location(location, import_dir)
+
+
+def test_files_in_the_import_directory_are_read(import_dir):
+    assert resolve_sitemap_location('sitemap.xml', import_dir) == str(import_dir / 'sitemap.xml')
+    entries = list(iter_sitemap('sitemap.xml', local_dir=import_dir))
+    assert [(entry.loc, entry.lastmod) for entry in entries] == [
+        ('https://example.com/a', '2024-01-01T00:00:00'), ('https://example.com/b', None)]
+
+
+def test_remote_index_cannot_list_local_files():
+    with pytest.raises(ValueError, match='remote sitemap index'):
+        resolve_sitemap_location('file:///etc/passwd', parent='https://example.com/index.xml')
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    db = Database(tmp_path / 'validator.db')
+    monkeypatch.setattr(web_app, 'db', db)
+    app = flask.Flask(__name__)
+    app.register_blueprint(routes.bp)
+    yield app.test_client(), db
+    db.close()
+
+
+@pytest.mark.parametrize('location', ['/etc/passwd', 'file:///etc/passwd'])
+def test_import_route_refuses_server_files(client, import_dir, monkeypatch, location):
+    test_client, db = client
+    monkeypatch.setattr(Config, 'SITEMAP_IMPORT_DIR', str(import_dir))
+    project_id = db.create_project('Shop')
+    
+    response = test_client.post('/api/urls/sitemap', json={'sitemap': location, 'project_id': project_id})
+    
+    assert response.status_code == 400
+    assert db.get_urls(project_id) == []
+
+
+def test_import_route_reads_the_import_directory(client, import_dir, monkeypatch):
+    test_client, db = client
+    monkeypatch.setattr(Config, 'SITEMAP_IMPORT_DIR', str(import_dir))
+    project_id = db.create_project('Shop')
+    
+    response = test_client.post('/api/urls/sitemap', json={'sitemap': 'sitemap.xml', 'project_id': project_id})
+    
+    assert response.status_code == 200
+    assert (response.get_json()['added'], len(db.get_urls(project_id))) == (2, 2)
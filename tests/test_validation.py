@@ -0,0 +1,49 @@
+"""
+run_validation tests: a run that cannot start is recorded as failed.
+"""
+
+import pytest
+
+from schema_validator.web.database import Database
+from schema_validator.web.result_writer import ResultWriter
+from schema_validator.web.runs import RunManager
+from schema_validator.web.validation import run_validation
+
+
+class _Progress:
+    def submit(self, *args):
+        pass
+    
+    def finish(self, run_id):
+        pass
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(tmp_path / 'validator.db')
+    yield db
+    db.close()
+
+
+def test_run_that_fails_to_start_is_marked_failed(db, monkeypatch):
+    project_id = db.create_project('Shop')
+    url_id = db.add_url('https://example.com/a', project_id)
+    run_id = db.create_validation_run(project_id, 1)
+    
+    def broken_history(project_id):
+        raise RuntimeError('history unavailable')
+    
+    monkeypatch.setattr(db, 'get_url_history', broken_history)
+    writer = ResultWriter(db, flush_interval=0.05)
+    runs = RunManager()
+    notified = []
+    
+    try:
+        run_validation(run_id, [{'id': url_id, 'url': 'https://example.com/a'}], {'time_budget': 60},
+                       db, writer, runs, _Progress(), lambda event, payload: notified.append((event, payload)))
+    finally:
+        writer.close()
+    
+    assert db.get_validation_run(run_id)['status'] == 'failed'
+    assert notified == [('validation_error', {'run_id': run_id, 'error': 'history unavailable'})]
+    assert runs.active_runs() == []
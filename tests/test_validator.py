@@ -0,0 +1,143 @@
+"""
+Run control tests: ValidationState pause, resume, stop and worker-limit
+changes, signalled from the engine's loop or from controller threads.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from schema_validator.core.validator import SchemaValidator, ValidationState
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def from_thread(delay, action):
+    """Call `action` from another thread after `delay` seconds, as a Socket.IO handler would."""
+    thread = threading.Timer(delay, action)
+    thread.start()
+    return thread
+
+
+def test_pause_requested_before_start_applies():
+    state = ValidationState()
+    state.pause()
+    
+    async def main():
+        state.start()
+        assert not await state.wait_resumed(0.01)
+        state.resume()
+        assert await state.wait_resumed(0.01)
+    
+    run(main())
+
+
+def test_stop_from_another_thread_ends_a_sleep_early():
+    state = ValidationState()
+    
+    async def main():
+        state.start()
+        from_thread(0.05, state.stop)
+        started = time.monotonic()
+        await state.sleep(10)
+        return time.monotonic() - started
+    
+    assert run(main()) < 2
+    assert state.should_stop
+
+
+def test_stop_releases_a_paused_run():
+    state = ValidationState()
+    
+    async def main():
+        state.start()
+        state.pause()
+        from_thread(0.05, state.stop)
+        return await state.wait_resumed(5)
+    
+    assert run(main())
+    assert (state.is_paused, state.should_stop) == (False, True)
+
+
+def test_guard_returns_the_result_of_finished_work():
+    state = ValidationState()
+    
+    async def work():
+        return 42
+    
+    async def main():
+        state.start()
+        return await state.guard(work())
+    
+    assert run(main()) == (True, 42)
+
+
+@pytest.mark.parametrize('action', ['stop', 'pause'])
+def test_guard_cancels_in_flight_work(action):
+    state = ValidationState()
+    cancelled = []
+    
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+    
+    async def main():
+        state.start()
+        from_thread(0.05, getattr(state, action))
+        return await state.guard(work(), cancel_timeout=1)
+    
+    assert run(main()) == (False, None)
+    assert cancelled == [True]
+
+
+def test_pause_does_not_interrupt_unguarded_work():
+    state = ValidationState()
+    
+    async def work():
+        await asyncio.sleep(0.1)
+        return 'done'
+    
+    async def main():
+        state.start()
+        from_thread(0.02, state.pause)
+        return await state.guard(work(), interrupt_on_pause=False)
+    
+    assert run(main()) == (True, 'done')
+
+
+def test_worker_limit_change_wakes_waiting_workers():
+    validator = SchemaValidator(concurrent_limit=4)
+    
+    async def main():
+        validator.state.start()
+        waiters = [asyncio.ensure_future(validator.state.wait_limit_changed()) for _ in range(2)]
+        await asyncio.sleep(0)
+        from_thread(0.05, lambda: validator.set_worker_limit(2))
+        await asyncio.wait_for(asyncio.gather(*waiters), 2)
+    
+    run(main())
+    assert validator.worker_limit == 2
+    validator.set_worker_limit(10)
+    assert validator.worker_limit == 4
+
+
+def test_stop_requested_before_start_applies():
+    state = ValidationState()
+    state.stop()
+    
+    async def main():
+        state.start()
+        started = time.monotonic()
+        await state.sleep(10)
+        return time.monotonic() - started
+    
+    assert run(main()) < 1
+    state.reset()
+    assert (state.is_running, state.is_paused, state.should_stop) == (False, False, False)